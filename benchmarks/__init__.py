@@ -0,0 +1,237 @@
+"""Benchmarks for the wrapper overhead of the clitool2 package
+
+Each benchmark reports the best time per call in seconds:
+
+    import                  cumulative "import clitool2" time (-X importtime)
+    parser.N                CLITool.parser for a function with N parameters
+    docstr.N                parse_docstr for a docstring with N arguments
+    bind.N                  _getcallargs for a function with N parameters
+    toolbox.dispatch.N      CLIToolbox call for a toolbox with N commands
+    toolbox.help.N          CLIToolbox.format_help for a toolbox with N commands,
+                            without the memoized help text
+    call.direct             direct call of a no-op function
+    call.clitool            CLITool call of the no-op function
+    call.session            Session.run of the no-op function
+
+Run the suite with "python -m benchmarks"; see benchmarks.__main__.
+"""
+from __future__ import absolute_import, division, print_function
+import logging
+import os
+import platform
+import subprocess
+import sys
+import timeit
+import clitool2
+from clitool2 import CLITool, CLIToolbox, Session, parse_docstr
+from clitool2.clitool import _getcallargs
+
+__version__ = "1.1"
+
+PARSER_SIZES = (1, 10, 50, 200)
+TOOLBOX_SIZES = (10, 100, 1000, 5000)
+DOCSTR_SIZE = 200
+BIND_SIZE = 20
+
+class RegressionError(Exception):
+    """Raised when a benchmark is slower than its baseline by more than the
+    threshold"""
+
+def _make_function(count):
+    """Return function with count parameters and a Google style docstring.
+
+    The first half of the parameters are positional; the rest have defaults.
+    """
+    required = ["param%d" % num for num in range(count // 2)]
+    optional = ["param%d=%d" % (num, num) for num in range(count // 2, count)]
+    namespace = {}
+    exec("def func(%s):\n    return None\n" % ", ".join(required + optional),  # pylint: disable=exec-used
+         namespace)
+    func = namespace["func"]
+    lines = ["Function with %d parameters." % count, "", "Args:"]
+    lines.extend("    param%d: description of parameter %d, which is long enough\n"
+                 "        to continue on a second line." % (num, num) for num in range(count))
+    func.__doc__ = "\n".join(lines)
+    return func
+
+def _noop(value):
+    """Do nothing"""
+    return value
+
+def _command(*args):
+    """Toolbox command that returns a status code"""
+    return 0
+
+def _make_toolbox(count):
+    """Return toolbox with count commands"""
+    toolbox = CLIToolbox("Toolbox with %d commands" % count, prog="bench")
+
+    for num in range(count):
+        toolbox.add_command(_command, "command%05d" % num, "Command number %d" % num)
+
+    return toolbox
+
+def _format_help(toolbox):
+    """Return the help of the toolbox, formatted again on each call"""
+    toolbox._help = None  # pylint: disable=protected-access
+    return toolbox.format_help()
+
+def import_profile(module="clitool2"):
+    """Import the module in a new interpreter with "-X importtime" (Python 3.7+).
+
+    Returns:
+        dict: maps the name of each module imported by the statement,
+            including the module itself, to its cumulative import time in
+            seconds
+    """
+    # Run from the directory that contains the clitool2 package
+    root = os.path.dirname(os.path.dirname(os.path.abspath(clitool2.__file__)))
+    process = subprocess.Popen([sys.executable, "-X", "importtime", "-c", "import " + module],
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=root,
+                               universal_newlines=True)
+    _, stderr = process.communicate()
+
+    if process.returncode:
+        raise RuntimeError("import %s failed:\n%s" % (module, stderr))
+
+    # Lines are "import time: self [us] | cumulative | name"; nested imports
+    # are listed before their parent. The modules imported by the statement
+    # follow site, the last module imported during interpreter startup.
+    profile = {}
+
+    for line in stderr.splitlines():
+        fields = line.split("|")
+
+        if len(fields) == 3 and fields[1].strip().isdigit():
+            name = fields[2].strip()
+
+            if name == "site":
+                profile = {}
+            else:
+                profile[name] = int(fields[1]) / 1e6
+
+    return profile
+
+def _import_time():
+    """Return the seconds to import clitool2 in a new interpreter, less the
+    interpreter startup"""
+    if sys.version_info >= (3, 7):
+        return import_profile("clitool2")["clitool2"]
+
+    def run(code):
+        timer = timeit.default_timer
+        start = timer()
+        subprocess.check_call([sys.executable, "-c", code])
+        return timer() - start
+
+    return max(run("import clitool2") - run("pass"), 0.0)
+
+def _cases(quick=False):
+    """Yield (name, callable) for each benchmark"""
+    parser_sizes = PARSER_SIZES[:2] if quick else PARSER_SIZES
+    toolbox_sizes = TOOLBOX_SIZES[:1] if quick else TOOLBOX_SIZES
+
+    for count in parser_sizes:
+        func = _make_function(count)
+        yield "parser.%d" % count, lambda func=func: CLITool(func, parse_doc=True).parser
+
+    docstr = _make_function(DOCSTR_SIZE).__doc__
+    yield "docstr.%d" % DOCSTR_SIZE, lambda: parse_docstr(docstr)
+
+    func = _make_function(BIND_SIZE)
+    params = dict(("param%d" % num, num) for num in range(BIND_SIZE))
+    yield "bind.%d" % BIND_SIZE, lambda: _getcallargs(func, **params)
+
+    for count in toolbox_sizes:
+        toolbox = _make_toolbox(count)
+        name = "command%05d" % (count - 1)
+        yield "toolbox.dispatch.%d" % count, lambda toolbox=toolbox, name=name: toolbox(name, "x")
+        yield "toolbox.help.%d" % count, lambda toolbox=toolbox: _format_help(toolbox)
+
+    tool = CLITool(_noop)
+    session = Session(tool, logmngr=None)
+    yield "call.direct", lambda: _noop("x")
+    yield "call.clitool", lambda: tool("x")
+    yield "call.session", lambda: session.run(["x"])
+
+def measure(func, repeat=5, min_time=0.05):
+    """Return (seconds per call, number of calls per measurement).
+
+    The number of calls per measurement is increased until a measurement
+    takes at least min_time seconds; the best of repeat measurements is used.
+    """
+    timer = timeit.Timer(func)
+    number = 1
+
+    while True:
+        elapsed = timer.timeit(number)
+
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+
+        number *= 10 if elapsed < min_time / 10 else 2
+
+    times = [elapsed] + timer.repeat(repeat - 1, number) if repeat > 1 else [elapsed]
+    return min(times) / number, number
+
+def run_benchmarks(match=None, repeat=5, quick=False):
+    """Run the benchmarks and return the report.
+
+    Log records are created but not written, so the timings do not include
+    console or disk I/O.
+
+    Args:
+        match: If set, run only the benchmarks whose name contains match.
+        repeat: number of measurements per benchmark
+        quick: If True, run the smallest sizes once; for smoke tests.
+
+    Returns:
+        dict: {"python": version, "platform": platform, "results":
+            {name: {"seconds": seconds per call, "number": calls}}}
+    """
+    logger = logging.getLogger()
+    handlers, level = logger.handlers, logger.level
+    logger.handlers = [logging.NullHandler()]
+    results = {}
+    min_time = 0 if quick else 0.05
+    repeat = 1 if quick else repeat
+
+    try:
+        if not match or match in "import":
+            times = [_import_time() for _ in range(repeat)]
+            results["import"] = {"seconds": min(times), "number": 1}
+
+        for name, func in _cases(quick):
+            if not match or match in name:
+                seconds, number = measure(func, repeat, min_time)
+                results[name] = {"seconds": seconds, "number": number}
+    finally:
+        logger.handlers, logger.level = handlers, level
+
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "results": results}
+
+def compare(report, baseline, threshold=1.5):
+    """Return the regressions of report relative to baseline.
+
+    Args:
+        report: report returned by run_benchmarks
+        baseline: earlier report
+        threshold: maximum ratio of the current to the baseline time
+
+    Returns:
+        list: (name, baseline seconds, current seconds, ratio) for each
+            benchmark whose ratio exceeds the threshold
+    """
+    regressions = []
+
+    for name, item in sorted(report["results"].items()):
+        previous = baseline["results"].get(name)
+
+        if previous and previous["seconds"] > 0:
+            ratio = item["seconds"] / previous["seconds"]
+
+            if ratio > threshold:
+                regressions.append((name, previous["seconds"], item["seconds"], ratio))
+
+    return regressions
@@ -0,0 +1,56 @@
+"""Run the benchmarks for the clitool2 package
+
+Write the report as JSON:
+
+    python -m benchmarks --output baseline.json
+
+Compare with a baseline; the status is 1 if a benchmark is slower than its
+baseline by more than the threshold:
+
+    python -m benchmarks --baseline baseline.json --threshold 1.5
+"""
+from __future__ import absolute_import, division, print_function
+import json
+import logging
+import sys
+from clitool2 import CLITool
+from . import RegressionError, compare, run_benchmarks
+
+def main(output="-", baseline=None, threshold=1.5, match=None, repeat=5, quick=False):
+    """Benchmark the wrapper overhead of clitool2.
+
+    Args:
+        output: file name for the JSON report; default is stdout.
+        baseline: file name of an earlier JSON report to compare against.
+        threshold: maximum ratio of the current to the baseline time.
+        match: run only the benchmarks whose name contains this text.
+        repeat: number of measurements per benchmark.
+        quick: run the smallest sizes once; for smoke tests.
+
+    Returns:
+        int: number of benchmarks
+    """
+    report = run_benchmarks(match, repeat, quick)
+    text = json.dumps(report, indent=2, sort_keys=True)
+
+    if output == "-":
+        print(text)
+    else:
+        with open(output, "w") as fobj:
+            fobj.write(text + "\n")
+
+    if baseline:
+        with open(baseline, "r") as fobj:
+            regressions = compare(report, json.load(fobj), threshold)
+
+        for name, previous, current, ratio in regressions:
+            logging.warning("%s: %.3g s -> %.3g s (%.2fx)", name, previous, current, ratio)
+
+        if regressions:
+            raise RegressionError("%d of %d benchmarks exceed the threshold of %sx"
+                                  % (len(regressions), len(report["results"]), threshold))
+
+    return len(report["results"])
+
+if __name__ == "__main__":
+    sys.exit(CLITool(main, parse_doc=True)().status)
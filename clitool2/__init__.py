@@ -16,7 +16,21 @@ def main():
     sys.exit(result.status)
 '''
 from __future__ import absolute_import
-from clitool2.clitool import CLITool, Result, DocInfo, parse_docstr
+import sys
+from clitool2.clitool import CLITool, Result
 from clitool2.clitoolbox import CLIToolbox
+from clitool2.errors import ErrorInfo
+from clitool2.session import Session
 
 __version__ = "1.1"
+
+# The docstring parser is imported when first used (Python 3.7+)
+if sys.version_info >= (3, 7):
+    def __getattr__(name):
+        if name in ("DocInfo", "parse_docstr"):
+            from clitool2 import docstring
+            return getattr(docstring, name)
+
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+else:
+    from clitool2.docstring import DocInfo, parse_docstr  # pylint: disable=unused-import
@@ -0,0 +1,137 @@
+"""asyncio support for CLITool; requires Python 3.5 or later"""
+from __future__ import absolute_import, division, print_function
+import asyncio
+import functools
+import inspect
+from clitool2.deadline import CANCELLED, TIMED_OUT, TimedOut
+from clitool2.profiling import cpu_time
+
+__version__ = "1.1"
+
+async def _wait_for(awaitable, timeout):
+    """Await the object; cancel it and raise TimedOut after timeout seconds"""
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        raise TimedOut("timed out after %s seconds" % timeout) from None
+
+def _running_loop():
+    """Return the event loop running in this thread or None"""
+    get_loop = getattr(asyncio, "get_running_loop", None)
+
+    if get_loop is None:  # Python 3.5 and 3.6
+        return asyncio._get_running_loop()  # pylint: disable=protected-access
+
+    try:
+        return get_loop()
+    except RuntimeError:
+        return None
+
+def _run_new_loop(coro):
+    """Run the awaitable object on a new event loop"""
+    if hasattr(asyncio, "run") and inspect.iscoroutine(coro):
+        return asyncio.run(coro)
+
+    loop = asyncio.new_event_loop()
+
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+def run_coroutine(coro, timeout=None):
+    """Run the awaitable object on a new event loop and return its result.
+
+    If timeout is set, the task is cancelled and TimedOut is raised after
+    timeout seconds. If an event loop is already running in this thread, as
+    when CLITool.execute is called from a coroutine, the object runs on a new
+    loop in another thread and the running loop is blocked until it is done;
+    use CLITool.execute_async from coroutines instead.
+    """
+    if timeout is not None:
+        coro = _wait_for(coro, timeout)
+
+    if _running_loop() is None:
+        return _run_new_loop(coro)
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(1) as executor:
+        return executor.submit(_run_new_loop, coro).result()
+
+async def execute_async(tool, args, kwargs):
+    """Execute the function of the CLITool object and return Result object.
+
+    Coroutine functions are awaited; other functions are called in the default
+    executor of the running event loop. When the time limit of the tool
+    expires, a coroutine is cancelled; an executor thread cannot be stopped,
+    so its result is discarded. As for CLITool.execute, the result cache, map
+    mode, and the metrics hook are used, and the Result has the timings of
+    the call.
+
+    Args:
+        tool: CLITool object
+        args: positional arguments for the function
+        kwargs: keyword arguments for the function
+
+    Returns:
+        Result
+    """
+    # pylint: disable=protected-access
+    status, output, error, cached = 0, None, None, None
+    limit = getattr(tool, "timeout", None) or None
+
+    async def call():
+        if inspect.iscoroutinefunction(tool.func):
+            return await tool.func(*args, **kwargs)
+
+        loop = _running_loop()
+        output = await loop.run_in_executor(None, functools.partial(tool._invoke, args, kwargs))
+
+        if inspect.isawaitable(output):
+            output = await output
+
+        return output
+
+    try:
+        start = tool._emit_start()
+        cpu = cpu_time()
+        cache, key, cached, output = tool._lookup(args, kwargs)
+
+        if not cached:
+            output = await (call() if limit is None else _wait_for(call(), limit))
+            tool._store(cache, key, output)
+    except TimedOut:
+        error, status = tool._fail(), TIMED_OUT
+    except asyncio.CancelledError:
+        # Report the cancellation and let it propagate to the caller
+        status = CANCELLED
+        raise
+    except Exception:  # pylint: disable=broad-except
+        error, status = tool._fail(), 1
+    finally:
+        timings = tool._end(start, cpu, status, cached)
+
+    return tool._result(status, output, error, timings)
+
+async def execute_many_async(tool, calls, limit=None):
+    """Execute the function of the CLITool object for each (args, kwargs).
+
+    Args:
+        tool: CLITool object
+        calls: iterable of (args, kwargs)
+        limit: maximum number of concurrent calls; None for no limit.
+
+    Returns:
+        list: Result objects in the same order as calls
+    """
+    semaphore = asyncio.Semaphore(limit) if limit else None
+
+    async def bounded(args, kwargs):
+        if semaphore is None:
+            return await execute_async(tool, args, kwargs)
+
+        async with semaphore:
+            return await execute_async(tool, args, kwargs)
+
+    return await asyncio.gather(*[bounded(args, kwargs) for args, kwargs in calls])
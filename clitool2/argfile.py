@@ -0,0 +1,104 @@
+"""Read command line arguments from argument files one line at a time
+
+Syntax of an argument file:
+
+    # Lines starting with "#" and text after an unquoted "#" are comments.
+    --name "value with spaces" 'single quoted'
+    C:\\data\\in.txt backslashes are kept, so Windows paths need no quoting
+    @other.txt     arguments from another file; relative paths are resolved
+                   from the directory of the including file.
+
+Files are read lazily, so a parameter can iterate over the arguments of a
+very large file without holding them in memory; see ArgFile.
+"""
+from __future__ import absolute_import, division, print_function
+import os
+import shlex
+import sys
+
+__version__ = "1.1"
+
+# Maximum nesting of argument files
+MAX_DEPTH = 16
+
+def _split(line):
+    """Return the arguments of the line; quotes and comments as for
+    shlex.split, but backslashes are not escape characters"""
+    lexer = shlex.shlex(line, posix=True)
+    lexer.whitespace_split = True
+    lexer.escape = ""
+    return list(lexer)
+
+def iter_argfile(path, prefix="@", max_depth=MAX_DEPTH, _chain=()):
+    """Yield the arguments in the argument file.
+
+    Args:
+        path: file name; "-" for stdin
+        prefix: characters that mark a reference to another argument file
+        max_depth: maximum nesting of argument files
+
+    Raises:
+        ValueError: if the nesting exceeds max_depth or a file includes itself
+    """
+    if len(_chain) >= max_depth:
+        raise ValueError("argument files are nested more than %s levels: %s"
+                         % (max_depth, path))
+
+    key = path if path == "-" else os.path.realpath(path)
+
+    if key in _chain:
+        raise ValueError("argument file includes itself: %s" % path)
+
+    directory = os.path.dirname(path) if path != "-" else ""
+    fobj = sys.stdin if path == "-" else open(path, "r")
+
+    try:
+        for line in fobj:
+            line = line.strip()
+
+            if not line or line.startswith("#"):
+                continue
+
+            for arg in _split(line):
+                if arg[:1] and arg[0] in prefix:
+                    name = os.path.join(directory, arg[1:])
+
+                    for item in iter_argfile(name, prefix, max_depth, _chain + (key,)):
+                        yield item
+                else:
+                    yield arg
+    finally:
+        if fobj is not sys.stdin:
+            fobj.close()
+
+def expand_args(args, prefix="@", max_depth=MAX_DEPTH):
+    """Return list of arguments with argument file references replaced by the
+    arguments in the files"""
+    result = []
+
+    for arg in args:
+        if arg[:1] and arg[0] in prefix:
+            result.extend(iter_argfile(arg[1:], prefix, max_depth))
+        else:
+            result.append(arg)
+
+    return result
+
+class ArgFile(object):
+    """Iterable over the arguments in an argument file.
+
+    The file is read lazily each time the object is iterated. Parameters
+    annotated with Iterable[str] or Iterator[str] receive an ArgFile for the
+    file name supplied on the command line ("-" for stdin).
+
+    Attributes:
+        path: file name; "-" for stdin
+    """
+    def __init__(self, path):
+        self.path = path
+
+    def __iter__(self):
+        return iter_argfile(self.path)
+
+    def __repr__(self):
+        return "ArgFile(%r)" % self.path
@@ -0,0 +1,183 @@
+"""Read argument sets and write result reports for CLITool batch mode
+
+Each non-blank line of a batch file is one argument set:
+
+    ["A", "B", "--flag", "1"]        JSON list of command line arguments
+    {"param1": "A", "param2": 5}     JSON object mapping parameters to values
+    A B --flag 1                     command line arguments (shell syntax)
+
+Lines starting with "#" are ignored.
+"""
+from __future__ import absolute_import, division, print_function
+import logging
+import shlex
+import signal
+from clitool2.errors import ErrorInfo
+
+__version__ = "1.1"
+
+# CLITool used by the tasks in a worker process; set by _init_worker
+_worker_tool = None  # pylint: disable=invalid-name
+
+try:
+    _string_types = basestring  # pylint: disable=invalid-name
+except NameError:
+    _string_types = str
+
+def parse_record(line):
+    """Parse one line of a batch file.
+
+    Args:
+        line: str
+
+    Returns:
+        object: list of arguments, dict of parameter values, or None if the
+            line is blank or a comment.
+    """
+    line = line.strip()
+
+    if not line or line.startswith("#"):
+        return None
+    elif line[0] in "[{":
+        import json
+        record = json.loads(line)
+
+        if isinstance(record, list):
+            record = [item if isinstance(item, _string_types) else json.dumps(item)
+                      for item in record]
+
+        return record
+
+    return shlex.split(line)
+
+def read_records(fobj):
+    """Yield the argument sets in the file object, one line at a time"""
+    for line in fobj:
+        record = parse_record(line)
+
+        if record is not None:
+            yield record
+
+def format_report(index, result):
+    """Return a JSON line describing the result of one argument set.
+
+    Args:
+        index: zero-based position of the argument set in the batch
+        result: Result object
+
+    Returns:
+        str: JSON object terminated by a newline
+    """
+    import json
+    error = result.error
+
+    if isinstance(error, ErrorInfo):
+        error = str(error)
+    elif error:
+        error = "%s: %s" % (error[0].__name__, error[1])
+
+    report = {"index": index, "status": result.status, "output": result.output,
+              "error": error}
+    return json.dumps(report, default=str) + "\n"
+
+def portable_result(result):
+    """Return a copy of result that can be sent between processes.
+
+    An exc_info tuple in the error attribute is replaced by an ErrorInfo
+    record, since tracebacks cannot be pickled.
+    """
+    if result.error and not isinstance(result.error, ErrorInfo):
+        result = result._replace(error=ErrorInfo.from_exc_info(result.error))
+
+    return result
+
+def worker_log_params(params):
+    """Return the logging arguments for the batch workers.
+
+    Forked workers inherit the log handlers of the parent, and the logging
+    manager leaves them unchanged. Spawned workers configure logging again,
+    so a file that the parent opened in write mode (logwrite) is opened in
+    append mode (logfile) instead of being truncated by each worker. If both
+    are set, the workers write to logfile only.
+
+    Args:
+        params: dict of parsed command line arguments
+
+    Returns:
+        dict: copy of params
+    """
+    params = dict(params)
+
+    if params.get("logwrite"):
+        params["logfile"] = params.get("logfile") or params["logwrite"]
+        params["logwrite"] = None
+
+    return params
+
+def _init_worker(tool, logparams):
+    """Initialize a worker process"""
+    global _worker_tool  # pylint: disable=global-statement,invalid-name
+    _worker_tool = tool
+
+    # A forked worker inherits the signal handlers that cancel the batch;
+    # the parent handles SIGINT and terminates the workers with SIGTERM.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    # A forked worker inherits the handlers of the parent; handlers that
+    # write on a background thread need a new thread in the worker.
+    for handler in logging.getLogger().handlers:
+        if hasattr(handler, "after_fork"):
+            handler.after_fork()
+
+    if logparams:
+        tool.logmngr(*logparams[0], **logparams[1])
+
+def _run_worker_task(task):
+    """Run a batch task in a worker process"""
+    index, result = _worker_tool.run_task(task)
+
+    # Workers are terminated without logging.shutdown, so the records are
+    # written before the result is returned.
+    for handler in logging.getLogger().handlers:
+        handler.flush()
+
+    return index, portable_result(result)
+
+def map_tasks(tool, tasks, jobs, pool="process", ordered=True, logparams=None):
+    """Run the batch tasks on a pool of workers and yield (index, Result).
+
+    Args:
+        tool: CLITool object; must be picklable for a process pool.
+        tasks: iterable of (index, args, kwargs, result); see CLITool.run_task.
+        jobs: number of worker processes or threads
+        pool: "process" for a process pool or "thread" for a thread pool
+        ordered: If True, yield results in input order; otherwise, yield
+            results in completion order.
+        logparams: (args, kwargs) for the logging manager in worker processes
+    """
+    # multiprocessing is imported only when a pool is used
+    import multiprocessing
+    from multiprocessing.pool import ThreadPool
+
+    if pool == "thread":
+        workers = ThreadPool(jobs)
+        func = tool.run_task
+    elif pool == "process":
+        workers = multiprocessing.Pool(jobs, _init_worker, (tool, logparams))
+        func = _run_worker_task
+        tasks = ((index, args, kwargs, result and portable_result(result))
+                 for index, args, kwargs, result in tasks)
+    else:
+        raise ValueError("Expected 'process' or 'thread'; got '%s'" % pool)
+
+    try:
+        mapper = workers.imap if ordered else workers.imap_unordered
+
+        for item in mapper(func, tasks):
+            yield item
+
+        workers.close()
+    finally:
+        workers.terminate()
+        workers.join()
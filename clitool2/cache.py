@@ -0,0 +1,198 @@
+"""On-disk caches used by CLITool and CLIToolbox"""
+from __future__ import absolute_import, division, print_function
+import os
+import sys
+
+__version__ = "1.1"
+
+try:
+    _string_types = basestring  # pylint: disable=invalid-name
+except NameError:
+    _string_types = str
+
+# Incremented when the format of the cached specification changes.
+SPEC_FORMAT = 5
+
+def _source_stamp(func):
+    """Return (path, mtime, size, name) that identifies the source of func.
+
+    Returns None if the source file of func cannot be determined.
+    """
+    module = sys.modules.get(getattr(func, "__module__", None))
+    path = getattr(module, "__file__", None)
+
+    if not path:
+        return None
+
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    name = getattr(func, "__qualname__", None) or getattr(func, "__name__", None) \
+        or type(func).__name__
+    return (os.path.abspath(path), stat.st_mtime, stat.st_size, name)
+
+def _module_path(module_name):
+    """Return the file of the module without importing it, or None"""
+    try:
+        from importlib.util import find_spec
+    except ImportError:  # Python 2
+        return _find_module_path(module_name)
+
+    try:
+        spec = find_spec(module_name)
+    except (ImportError, ValueError, AttributeError):
+        return None
+
+    return spec.origin if spec is not None else None
+
+def _find_module_path(module_name):
+    """Return the file of the module with the imp module (Python 2)"""
+    import imp
+    path, filename = None, None
+
+    try:
+        for part in module_name.split("."):
+            handle, filename, description = imp.find_module(part, path)
+
+            if handle is not None:
+                handle.close()
+
+            if description[2] == imp.PKG_DIRECTORY:
+                path = [filename]
+                filename = os.path.join(filename, "__init__.py")
+    except ImportError:
+        return None
+
+    return filename
+
+def _ref_stamp(ref):
+    """Return (path, mtime, size, name) for a "package.module:attribute"
+    reference without importing the module.
+
+    Returns None if the module file cannot be found.
+    """
+    module_name, _, attr = ref.partition(":")
+    module = sys.modules.get(module_name)
+
+    if module is not None:
+        path = getattr(module, "__file__", None)
+    else:
+        path = _module_path(module_name)
+
+    try:
+        stat = os.stat(path)
+    except (OSError, TypeError):
+        return None
+
+    return (os.path.abspath(path), stat.st_mtime, stat.st_size, attr)
+
+def source_stamps(funcs):
+    """Return list of [path, mtime, size] for the source files of funcs;
+    None if a source file cannot be determined"""
+    stamps = [_source_stamp(func) for func in funcs]
+    return None if None in stamps else [list(stamp[:3]) for stamp in stamps]
+
+def is_current(stamps):
+    """Return True if the files in the list from source_stamps are unchanged"""
+    for path, mtime, size in stamps:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+
+        if stat.st_mtime != mtime or stat.st_size != size:
+            return False
+
+    return True
+
+def terminal_width():
+    """Return the terminal width used by argparse to format help messages"""
+    try:
+        import shutil
+        return shutil.get_terminal_size().columns
+    except (AttributeError, ValueError, OSError):
+        return int(os.environ.get("COLUMNS", 80))
+
+def atomic_write(path, data):
+    """Write data (bytes) to path; readers never observe a partial file.
+
+    The data is written to a temporary file in the same directory, which is
+    then renamed to path.
+    """
+    import tempfile
+    directory = os.path.dirname(path) or "."
+    handle, temp = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+
+    try:
+        with os.fdopen(handle, "wb") as fobj:
+            fobj.write(data)
+
+        if hasattr(os, "replace"):
+            os.replace(temp, path)
+        else:
+            os.rename(temp, path)
+    except Exception:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+
+class SpecCache(object):
+    """On-disk cache of the argument specifications and help messages built
+    by CLITool and CLIToolbox.
+
+    Each entry is a JSON file named after a hash of the source file path,
+    modification time, and size of the cached functions, so an entry is
+    rebuilt when any of those files change.
+
+    Attributes:
+        directory: cache directory; created on first store.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+
+    def key(self, funcs, **options):
+        """Return the cache key for the functions and options.
+
+        Args:
+            funcs: sequence of functions that contribute to the specification;
+                "package.module:attribute" references are not imported.
+            options: JSON serializable options that affect the specification
+
+        Returns:
+            str: cache key or None if a function cannot be cached
+        """
+        import hashlib
+        import json
+        stamps = [_ref_stamp(func) if isinstance(func, _string_types) else _source_stamp(func)
+                  for func in funcs]
+
+        if None in stamps:
+            return None
+
+        text = json.dumps([SPEC_FORMAT, stamps, options], sort_keys=True, default=repr)
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def load(self, key):
+        """Return the cached specification or None if not found"""
+        import json
+
+        try:
+            with open(os.path.join(self.directory, key + ".json"), "r") as fobj:
+                return json.load(fobj)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def store(self, key, spec):
+        """Store the specification; errors are ignored since the cache is optional"""
+        import json
+
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+
+            data = json.dumps(spec, sort_keys=True).encode("utf-8")
+            atomic_write(os.path.join(self.directory, key + ".json"), data)
+        except (IOError, OSError):
+            pass
@@ -18,241 +18,436 @@ def main():
 from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
-from argparse import ArgumentParser
 from collections import namedtuple, OrderedDict
-from itertools import takewhile
-import datetime
-import inspect
-import json
+from contextlib import contextmanager
+import copy
 import logging
 import os
-import re
 import sys
-from traceback import format_exc
-from dateutil.parser import parse as to_date
+import threading
+import time
+from clitool2.argfile import expand_args
+from clitool2.batch import format_report, map_tasks, read_records, worker_log_params
+from clitool2.cache import SpecCache, terminal_width
+from clitool2.converters import convert, get_converter, is_list, type_key
+from clitool2.converters import to_bool as _to_bool  # pylint: disable=unused-import
+from clitool2.deadline import CANCELLED, TIMED_OUT, Cancelled, TimedOut, cancel_on_signals
+from clitool2.deadline import cancel_status
+from clitool2.deadline import run_with_timeout
+from clitool2.errors import ErrorInfo
+from clitool2.profiling import clock, cpu_time, peak_rss, profiled
+from clitool2.streaming import FORMATS, Sink, StreamGate, is_iterator
 
 # Updated on June 4, 2019 to emit trace entries at the debug level.
 # Update on August 31, 2019 to remove dependency on arcpy.
 __version__ = "1.1"
 
-# Result provides information from a wrapped function
-Result = namedtuple("Result", ("status", "output", "error"))
+_DATEFMT = "%Y-%m-%d %H:%M:%S"
 
-# DocInfo represents the results from parsing a Google style docstring
-DocInfo = namedtuple("DocInfo", ("summary", "description", "args", "returns", "yields", "raises"))
+# Code flags of generator and coroutine functions; see the inspect module
+_CO_GENERATOR = 0x20
+_CO_COROUTINE = 0x80
 
-def _to_bool(text):
-    """Convert str value to bool.
+if sys.version_info >= (3, 7):
+    def __getattr__(name):
+        """Import DocInfo and parse_docstr when first used"""
+        if name in ("DocInfo", "parse_docstr"):
+            from clitool2 import docstring
+            return getattr(docstring, name)
 
-    Returns True if text is "True" or "1" and False if text is "False" or "0".
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+else:
+    from clitool2.docstring import DocInfo, parse_docstr  # pylint: disable=unused-import
 
-    Args:
-        text: str value
+def _isawaitable(obj):
+    """Return True if obj can be used in an await expression"""
+    return hasattr(obj, "__await__")
 
-    Returns:
-        bool
+def _has_code_flag(func, flag):
+    """Return True if the code object of the function has the flag"""
+    func = getattr(func, "__func__", func)
+    return bool(getattr(getattr(func, "__code__", None), "co_flags", 0) & flag)
+
+_ResultTuple = namedtuple("Result", ("status", "output", "error"))
+
+class Result(_ResultTuple):
+    """Provides information from a wrapped function.
+
+    Result is a (status, output, error) tuple, so it can be unpacked into
+    three values. The timings attribute is not part of the tuple; it is a dict
+    with the duration of each phase in seconds, the CPU time, and the peak
+    RSS, or None.
     """
-    if text.title() in ("True", "1"):
-        result = True
-    elif text.title() in ("False", "0"):
-        result = False
-    else:
-        raise ValueError("Expected 'True', 'False', '1', '0'; got '%s'" % text)
+    timings = None
 
-    return result
+    def __new__(cls, status, output, error, timings=None):
+        self = _ResultTuple.__new__(cls, status, output, error)
+        self.timings = timings
+        return self
 
-def _parse_docargs(text):
-    """Parse the supplied text and return OrderedDict that maps parameter names
-    to descriptions.
+    def __reduce__(self):
+        return (Result, (self.status, self.output, self.error, self.timings))
 
-    Args:
-        text: Args section of a Google style docstring.
+    def _replace(self, **kwargs):
+        timings = kwargs.pop("timings", self.timings)
+        return Result(*_ResultTuple._replace(self, **kwargs), timings=timings)
 
-    Returns:
-        dict: OrderedDict that maps parameter names to descriptions.
+try:
+    _string_types = basestring  # pylint: disable=invalid-name
+except NameError:
+    _string_types = str
+
+# Parser state for the current thread
+_parse_state = threading.local()
+
+class ParseError(ValueError):
+    """Invalid command line arguments.
+
+    Raised by the parser instead of exiting when parse errors are returned as
+    data; see _raise_parse_errors.
     """
-    pattern = r"^(\w+):(.+)$"
-    prog = re.compile(pattern)
-    result = OrderedDict()
-    name = None
-
-    for line in text.splitlines():
-        match = prog.match(line)
-
-        if match:
-            # If line matches regex pattern, then add match results to dict.
-            name = match.group(1)
-            desc = match.group(2).strip()
-            result[name] = desc
-        elif name:
-            # If line does not match regex pattern, then append line to
-            # previous argument description.
-            result[name] += " " + line.strip()
-        else:
-            raise ValueError("Expected name: value pair; got '%s'" % line)
 
-    return result
+# ArgumentParser subclass; created by _new_parser since argparse is slow to import
+_parser_class = None  # pylint: disable=invalid-name
 
-def _config_parser(parser, func, func_help=None):
-    """Update parser to be compatible with the supplied function.
+def _new_parser(**kwargs):
+    """Return ArgumentParser that can raise ParseError instead of exiting.
 
-    This function supports positional arguments, keyword arguments,
-    var-positional, and var-keyword. var-keywords are added as an
-    optional argument that supports JSON string.
+    Argument files are read with clitool2.argfile, which supports quoting,
+    comments, and nested argument files.
+    """
+    global _parser_class  # pylint: disable=global-statement,invalid-name
+
+    if _parser_class is None:
+        from argparse import ArgumentParser
+
+        class _ArgumentParser(ArgumentParser):
+            def _read_args_from_files(self, arg_strings):
+                try:
+                    return expand_args(arg_strings, self.fromfile_prefix_chars)
+                except (IOError, OSError, ValueError) as err:
+                    self.error(str(err))
+
+            def error(self, message):
+                if getattr(_parse_state, "raise_errors", False):
+                    raise ParseError(message)
+
+                ArgumentParser.error(self, message)
+
+        _parser_class = _ArgumentParser
+
+    return _parser_class(**kwargs)
+
+@contextmanager
+def _raise_parse_errors():
+    """Raise ParseError from parsers used by the current thread"""
+    previous = getattr(_parse_state, "raise_errors", False)
+    _parse_state.raise_errors = True
+
+    try:
+        yield
+    finally:
+        _parse_state.raise_errors = previous
+
+def _wants_help(args):
+    """Return True if the arguments request the help message"""
+    for arg in args:
+        if arg == "--":
+            break
+        elif arg in ("-h", "--help"):
+            return True
+
+    return False
+
+def _get_annotations(func, argspec):
+    """Return dict mapping parameter names to annotations.
+
+    String annotations (PEP 563) are resolved with typing.get_type_hints when
+    possible.
+    """
+    annotations = getattr(argspec, "annotations", None) or {}
+
+    if any(isinstance(value, _string_types) for value in annotations.values()):
+        try:
+            import inspect
+            import typing
+            target = func if inspect.isroutine(func) else getattr(func, "__call__", func)
+            annotations = typing.get_type_hints(target)
+        except Exception:  # pylint: disable=broad-except
+            pass
+
+    return annotations
+
+def _default_type(default):
+    """Return the converter key for the type of the default value"""
+    # Modified on 11/9/2017 to improve handling of default value type.
+    # https://stackoverflow.com/questions/15008758/parsing-boolean-values-with-argparse
+    import datetime
+
+    if isinstance(default, bool):
+        type_ = "bool"
+    elif isinstance(default, int):
+        type_ = "int"
+    elif isinstance(default, float):
+        type_ = "float"
+    elif isinstance(default, datetime.datetime):
+        type_ = "datetime"
+    elif isinstance(default, datetime.date):
+        type_ = "date"
+    else:
+        type_ = None
+
+    return type_
+
+def _build_spec(func, func_help=None):
+    """Return the argument specification for the supplied function.
+
+    The specification is a list of dicts with the keys kind ("positional",
+    "optional", "varargs", "kwonly", or "varkw"), name, help, and type (the
+    converter key; see clitool2.converters). kwonly items also have the key
+    required. The converter is selected by the parameter
+    annotation or, if there is no supported annotation, by the type of the
+    default value. Default values are not included; they are read from the
+    function when the specification is applied.
 
     Args:
-        parser: ArgumentParser object
         func: target function
         func_help: dict mapping parameter name to their description
 
     Returns:
-        object: ArgumentParser
+        list: argument specification
     """
-    # A short option is one character long.
+    import inspect
+
     # Note: inspect.getargspec() is deprecated since Python 3.0.
     if hasattr(inspect, "getfullargspec"):
-        args, varargs, keywords, defaults = inspect.getfullargspec(func)[:4]
+        argspec = inspect.getfullargspec(func)
+        args, varargs, keywords, defaults = argspec[:4]
     else:
+        argspec = None
         args, varargs, keywords, defaults = inspect.getargspec(func)
 
     func_help = func_help or {}
+    annotations = _get_annotations(func, argspec)
     defaults = defaults or []
     required = args[:len(args) - len(defaults)]
     optional = list(zip(args[len(args) - len(defaults):], defaults))
+    spec = []
 
     # Positional arguments have no default value.
     for arg in required:
         if arg == "self":
             continue
-        text = func_help.get(arg, None)
-        parser.add_argument(arg, help=text)
+        spec.append(dict(kind="positional", name=arg, help=func_help.get(arg, None),
+                         type=type_key(annotations.get(arg))))
 
     # Optional arguments have default value.
-    # Modified on 11/9/2017 to improve handling of default value type.
-    # https://stackoverflow.com/questions/15008758/parsing-boolean-values-with-argparse
     for name, default in optional:
-        argname = "-" + name if len(name) == 1 else "--" + name
-        text = func_help.get(name, None)
-
-        if isinstance(default, bool):
-            type_ = _to_bool
-        elif isinstance(default, int):
-            type_ = int
-        elif isinstance(default, float):
-            type_ = float
-        elif isinstance(default, datetime.datetime):
-            type_ = to_date
+        if name in annotations:
+            type_ = type_key(annotations[name])
         else:
-            type_ = None
+            type_ = _default_type(default)
 
-        parser.add_argument(argname, default=default, help=text, type=type_)
+        spec.append(dict(kind="optional", name=name, help=func_help.get(name, None),
+                         type=type_))
 
-    # varargs support multiple values.
+    # varargs support multiple values; the annotation is the type of each value.
     if varargs:
-        text = func_help.get(varargs, None)
-        parser.add_argument(varargs, help=text, nargs="*")
+        spec.append(dict(kind="varargs", name=varargs, help=func_help.get(varargs, None),
+                         type=type_key(annotations.get(varargs))))
+
+    # Keyword-only arguments are options; they are required if there is no default.
+    kwonlyargs = getattr(argspec, "kwonlyargs", None) or []
+    kwonlydefaults = getattr(argspec, "kwonlydefaults", None) or {}
+
+    for name in kwonlyargs:
+        if name in annotations:
+            type_ = type_key(annotations[name])
+        else:
+            type_ = _default_type(kwonlydefaults.get(name))
+
+        spec.append(dict(kind="kwonly", name=name, help=func_help.get(name, None),
+                         type=type_, required=name not in kwonlydefaults))
 
     # keywords support key-value pairs supplied as json string
     if keywords:
-        argname = "-" + keywords if len(keywords) == 1 else "--" + keywords
-        text = func_help.get(keywords, None)
-        parser.add_argument(argname, help=text, type=json.loads)
+        spec.append(dict(kind="varkw", name=keywords, help=func_help.get(keywords, None),
+                         type="json"))
+
+    return spec
+
+def _get_defaults(func):
+    """Return the default values of the positional parameters of func.
+
+    The defaults are read from the function attributes, which avoids a call
+    to inspect when the argument specification is loaded from a cache.
+    """
+    for target in (func, getattr(func, "__call__", None)):
+        try:
+            return target.__defaults__ or ()
+        except AttributeError:
+            pass
+
+    import inspect
+
+    # Note: inspect.getargspec() is deprecated since Python 3.0.
+    if hasattr(inspect, "getfullargspec"):
+        return inspect.getfullargspec(func)[3] or ()
+
+    return inspect.getargspec(func)[3] or ()
+
+def _get_kwdefaults(func):
+    """Return dict with the default values of the keyword-only parameters"""
+    for target in (func, getattr(func, "__call__", None)):
+        try:
+            return target.__kwdefaults__ or {}
+        except AttributeError:
+            pass
+
+    import inspect
+
+    if hasattr(inspect, "getfullargspec"):
+        return inspect.getfullargspec(func).kwonlydefaults or {}
+
+    return {}
+
+def _apply_spec(parser, spec, func):
+    """Add the arguments in the specification to the parser.
+
+    Args:
+        parser: ArgumentParser object or argument group
+        spec: argument specification created by _build_spec
+        func: target function; supplies the default values
+
+    Returns:
+        object: ArgumentParser
+    """
+    defaults = iter(_get_defaults(func))
+    kwdefaults = _get_kwdefaults(func)
+
+    for item in spec:
+        kind, name, text = item["kind"], item["name"], item["help"]
+        type_ = get_converter(item["type"])
+        argname = "-" + name if len(name) == 1 else "--" + name
+
+        if kind == "positional":
+            nargs = "+" if is_list(item["type"]) else None
+            parser.add_argument(name, help=text, type=type_, nargs=nargs)
+        elif kind == "optional":
+            nargs = "*" if is_list(item["type"]) else None
+            parser.add_argument(argname, default=next(defaults), help=text, type=type_,
+                                nargs=nargs)
+        elif kind == "varargs":
+            parser.add_argument(name, help=text, type=type_, nargs="*")
+        elif kind == "kwonly":
+            nargs = "*" if is_list(item["type"]) else None
+            parser.add_argument(argname, default=kwdefaults.get(name), help=text, type=type_,
+                                nargs=nargs, required=item["required"])
+        elif kind == "varkw":
+            parser.add_argument(argname, help=text, type=type_)
 
     return parser
 
-def _getcallargs(func, **kwargs):
-    """Transform parsed command line arguments to be compatible with function
-    that may have var-positional and var-argument parameters.
+def _config_parser(parser, func, func_help=None):
+    """Update parser to be compatible with the supplied function.
+
+    This function supports positional arguments, keyword arguments,
+    var-positional, and var-keyword. var-keywords are added as an
+    optional argument that supports JSON string.
 
     Args:
+        parser: ArgumentParser object
         func: target function
-        kwargs: dict of argument name and values
+        func_help: dict mapping parameter name to their description
 
     Returns:
-        tuple: (args, kwargs)
+        object: ArgumentParser
     """
-    # This method was developed to support varargs and keywords since the
-    # results from parse_arguments cannot be passed directly to function.
-    # Note: inspect.getargspec() is deprecated since Python 3.0.
-    if hasattr(inspect, "getfullargspec"):
-        names, varargs, keywords, defaults = inspect.getfullargspec(func)[:4]
-    else:
-        names, varargs, keywords, defaults = inspect.getargspec(func)
+    return _apply_spec(parser, _build_spec(func, func_help), func)
 
-    defaults = defaults or []
-    optional = list(zip(names[len(names) - len(defaults):], defaults))
-    funcargs, funckwargs = [], {}
+class _BindingPlan(object):
+    """Maps parameter values to the (args, kwargs) of a function call.
 
-    for name in names:
-        if name == "self":
-            pass
-        elif name in kwargs:
-            funcargs.append(kwargs[name])
-        elif name in optional:
-            funcargs.append(optional[name])
-        else:
-            raise ValueError("No value available for '{0}'".format(name))
+    The plan is compiled once from the argument specification, so binding
+    parsed arguments requires no introspection.
 
-    if varargs and varargs in kwargs:
-        items = kwargs[varargs]
+    Attributes:
+        positional: names of the positional parameters in order
+        defaults: dict mapping parameter names to default values
+        varargs: name of the var-positional parameter or None
+        keywords: names of the keyword-only parameters
+        varkw: name of the var-keyword parameter or None
+    """
+    __slots__ = ("positional", "defaults", "varargs", "keywords", "varkw")
+
+    def __init__(self, spec, func):
+        self.positional = tuple(item["name"] for item in spec
+                                if item["kind"] in ("positional", "optional"))
+        optional = [item["name"] for item in spec if item["kind"] == "optional"]
+        self.defaults = dict(zip(optional, _get_defaults(func)))
+        self.defaults.update(_get_kwdefaults(func))
+        self.keywords = tuple(item["name"] for item in spec if item["kind"] == "kwonly")
+        self.varargs = next((item["name"] for item in spec if item["kind"] == "varargs"), None)
+        self.varkw = next((item["name"] for item in spec if item["kind"] == "varkw"), None)
+
+    def _get(self, params, name):
+        """Return the value of the parameter or its default value"""
+        if name in params:
+            return params[name]
+        elif name in self.defaults:
+            return self.defaults[name]
+
+        raise ValueError("No value available for '{0}'".format(name))
+
+    def bind(self, params):
+        """Return (args, kwargs) for the dict of parameter values"""
+        try:
+            funcargs = [params[name] for name in self.positional]
+        except KeyError:
+            funcargs = [self._get(params, name) for name in self.positional]
 
-        if isinstance(items, (tuple, list)):
-            funcargs.extend(items)
-        else:
-            raise TypeError("Expected sequence; got %s" % type(items).__name__)
+        funckwargs = {}
 
-    if keywords and keywords in kwargs:
-        mapping = kwargs[keywords]
+        if self.varargs and self.varargs in params:
+            items = params[self.varargs]
 
-        if mapping is None:
-            pass
-        elif isinstance(mapping, dict):
-            funckwargs.update(mapping)
-        else:
-            raise TypeError("Expected dict; got %s" % type(mapping).__name__)
+            if isinstance(items, (tuple, list)):
+                funcargs.extend(items)
+            else:
+                raise TypeError("Expected sequence; got %s" % type(items).__name__)
+
+        for name in self.keywords:
+            funckwargs[name] = self._get(params, name)
 
-    return funcargs, funckwargs
+        if self.varkw and self.varkw in params:
+            mapping = params[self.varkw]
+
+            if mapping is None:
+                pass
+            elif isinstance(mapping, dict):
+                funckwargs.update(mapping)
+            else:
+                raise TypeError("Expected dict; got %s" % type(mapping).__name__)
 
-def parse_docstr(text):
-    """Parse Google style docstring and return DocInfo object.
+        return funcargs, funckwargs
+
+def _getcallargs(func, **kwargs):
+    """Transform parsed command line arguments to be compatible with function
+    that may have var-positional and var-argument parameters.
 
-    The sections consist of Summary (no heading), Description (no heading),
-    Args, Returns, Yields, and Raises.  All sections are optional, but the
-    sections must be in correct order for successful parsing.
+    CLITool compiles a _BindingPlan once instead of calling this function for
+    each invocation.
 
     Args:
-        text: Google style docstring
+        func: target function
+        kwargs: dict of argument name and values
 
     Returns:
-        namedtuple: DocInfo(summary, description, args, returns, yields, raises)
+        tuple: (args, kwargs)
     """
-    lines = [line.strip() for line in text.strip().splitlines()]
-    sections = DocInfo._fields
-    scratch = {}
-
-    # test is used to detect section break
-    test = lambda line: line.lower().rstrip(":") not in sections
-
-    for section in sections:
-        matches = []
-
-        if section == "summary":
-            if len(lines) == 1 or lines[1] == "":
-                matches = lines[0:1]
-        elif section == "description":
-            matches = [line for line in takewhile(test, lines)]
-        elif lines and lines[0] == section.title() + ":":
-            del lines[0]
-            matches = [line for line in takewhile(test, lines)]
-
-        if matches:
-            del lines[:len(matches)]
-            value = os.linesep.join(matches)
-            scratch[section] = value.strip()
-        else:
-            scratch[section] = None
-
-    return DocInfo(**scratch)
+    # This method was developed to support varargs and keywords since the
+    # results from parse_arguments cannot be passed directly to function.
+    return _BindingPlan(_build_spec(func), func).bind(kwargs)
 
 def config_logging(logfile=None, logwrite=None, loglevel=20):
     """Configure logging to emit messages to the console and optional log files.
@@ -308,74 +503,615 @@ class CLITool(object):
         parse_doc: If True, parse Google style docstring for label,
             description, and func_help.
         logmngr: Logging manager function.
+        cache_dir: If set, directory used to cache the argument specification.
+        batch: If True, add the batch arguments; see run_batch.
+        stream: If True, write the items of the iterator returned by the
+            function as they are produced and set the output of the Result to
+            the number of items. If None, generator functions are streamed.
+        profile: If True, add the profiling arguments, which run the function
+            under cProfile or tracemalloc.
+        timeout: If set, add the --timeout argument with this default time
+            limit in seconds; 0 for no limit. The limit also applies to
+            execute, execute_async, and batch mode.
+        isolation: "thread" or "process"; where a function with a time limit
+            runs. A thread that exceeds the limit cannot be stopped and is
+            abandoned; a process is terminated. Coroutine functions are
+            cancelled on the event loop.
+        result_cache: If set, clitool2.memo.ResultCache that stores the output
+            of successful calls; adds the --cache and --no-cache arguments.
+        memoize: If True, use result_cache by default.
+        metrics: If set, metrics hook called with the command name and the
+            Result of each run; see clitool2.metrics.
+        map_jobs: If set, enable map mode, which splits the values of the
+            var-positional parameter into chunks and calls the function for
+            each chunk on this number of worker processes (0 for the number
+            of CPUs); adds the map arguments. See clitool2.mapreduce.
+        chunk_size: number of values per call in map mode; None to divide
+            the values evenly among the workers.
+        reducer: callable that merges the list of outputs in map mode;
+            default is clitool2.mapreduce.default_reducer.
         parser: ArgumentParser object
     """
     def __init__(self, func, label=None, description=None, func_help=None, parse_doc=False,
-                 logmngr=None):
+                 logmngr=None, cache_dir=None, batch=False, stream=None, profile=False,
+                 timeout=None, isolation="thread", result_cache=None, memoize=False,
+                 metrics=None, map_jobs=None, chunk_size=None, reducer=None):
         self.func = func
         self.label = label
         self.description = description or label
         self.func_help = func_help
         self.parse_doc = parse_doc
         self.logmngr = logmngr or config_logging
+        self.cache_dir = cache_dir
+        self.batch = batch
+        self.stream = stream
+        self.profile = profile
+        self.timeout = timeout
+        self.isolation = isolation
+        self.result_cache = result_cache
+        self.memoize = memoize
+        self.metrics = metrics
+        self.map_jobs = map_jobs
+        self.chunk_size = chunk_size
+        self.reducer = reducer
         self._parser = None
+        self._spec = None
+        self._plans = None
+        self._help = None
+
+    def __getstate__(self):
+        # The parser is rebuilt on demand; ArgumentParser cannot be pickled.
+        state = self.__dict__.copy()
+        state["_parser"] = None
+        return state
+
+    def _build_spec(self):
+        """Return dict with the label, description, and argument specifications
+        for the target function and logging manager function."""
+        from clitool2.docstring import get_docinfo
+
+        if self.parse_doc:
+            # Parse the function docstring; parameters take precedent over docstring
+            parsed = get_docinfo(self.func)
+            label = self.label or parsed.summary
+            description = self.description or parsed.description
+
+            if not self.func_help and parsed.params:
+                func_help = OrderedDict((item.name, item.description) for item in parsed.params)
+            else:
+                func_help = self.func_help
+        else:
+            label = self.label
+            description = self.description
+            func_help = self.func_help
+
+        # Parse the logging manager docstring for the logging arguments
+        parsed = get_docinfo(self.logmngr)
+
+        if parsed.params:
+            log_help = OrderedDict((item.name, item.description) for item in parsed.params)
+        else:
+            log_help = None
+
+        return {"label": label, "description": description,
+                "func": _build_spec(self.func, func_help),
+                "logmngr": _build_spec(self.logmngr, log_help)}
+
+    @property
+    def spec(self):
+        """dict with the label, description, and argument specifications.
+
+        If cache_dir is set, the specification is loaded from the cache and is
+        rebuilt only when the source file of the function changes.
+        """
+        if self._spec is None:
+            self._spec = self._load_spec()
+
+        return self._spec
+
+    def _load_spec(self):
+        """Load the specification from the cache or build it"""
+        if self.cache_dir is None:
+            return self._build_spec()
+
+        cache = SpecCache(self.cache_dir)
+        key = self._cache_key(cache)
+        spec = cache.load(key) if key else None
+
+        if spec is None:
+            spec = self._build_spec()
+
+            if key:
+                cache.store(key, spec)
+
+        return spec
+
+    def _cache_key(self, cache, **options):
+        """Return the cache key for the functions, options, and extra options"""
+        return cache.key((self.func, self.logmngr), label=self.label,
+                         description=self.description, func_help=self.func_help,
+                         parse_doc=self.parse_doc, **options)
+
+    def format_help(self):
+        """Return the help message.
+
+        The message is rendered once. If cache_dir is set, it is stored with
+        the specification, so later processes print it without building the
+        parser.
+        """
+        if self._help is None:
+            self._help = self._load_help()
+
+        return self._help
+
+    def _load_help(self):
+        """Load the help message from the cache or render it"""
+        if self.cache_dir is None:
+            return self.parser.format_help()
+
+        # The help message depends on the program name and terminal width
+        cache = SpecCache(self.cache_dir)
+        key = self._cache_key(cache, help=True, prog=os.path.basename(sys.argv[0]),
+                              width=terminal_width(), batch=self.batch, stream=self.stream,
+                              profile=self.profile, timeout=self.timeout,
+                              memoize=self.memoize if self.result_cache else None,
+                              map_jobs=self.map_jobs, chunk_size=self.chunk_size)
+        text = cache.load(key) if key else None
+
+        if text is None:
+            text = self.parser.format_help()
+
+            if key:
+                cache.store(key, text)
+
+        return text
+
+    @property
+    def streams(self):
+        """True if the items produced by the function are streamed"""
+        if self.stream is None:
+            return _has_code_flag(self.func, _CO_GENERATOR)
+
+        return self.stream
+
+    @property
+    def plans(self):
+        """Binding plans for the target function and logging manager function"""
+        if self._plans is None:
+            spec = self.spec
+            self._plans = (_BindingPlan(spec["func"], self.func),
+                           _BindingPlan(spec["logmngr"], self.logmngr))
+
+        return self._plans
 
     @property
     def parser(self):
         """ArgumentParser object"""
         if not self._parser:
-            if self.parse_doc:
-                # Parse the function docstring; parameters take precedent over docstring
-                parsed = parse_docstr(inspect.getdoc(self.func))
-                label = self.label or parsed.summary
-                description = self.description or parsed.description
-
-                if not self.func_help and parsed.args:
-                    func_help = _parse_docargs(parsed.args)
-                else:
-                    func_help = self.func_help
-            else:
-                label = self.label
-                description = self.description
-                func_help = self.func_help
+            spec = self.spec
 
             # Create parser
-            parser = ArgumentParser(description=label, epilog=description,
-                                    fromfile_prefix_chars="@")
+            parser = _new_parser(description=spec["label"], epilog=spec["description"],
+                                 fromfile_prefix_chars="@")
 
             # Add arguments for the target function
-            _config_parser(parser, self.func, func_help)
+            _apply_spec(parser, spec["func"], self.func)
+
+            if self.streams:
+                group = parser.add_argument_group("output arguments")
+                group.add_argument("--stream-output", metavar="FILE", default="-",
+                                   help="write the items produced by the function to FILE; "
+                                   "default is stdout")
+                group.add_argument("--stream-format", default="jsonl", choices=FORMATS,
+                                   help="format of the items; default is jsonl")
+
+            if self.map_jobs is not None:
+                if not self.plans[0].varargs:
+                    raise ValueError("map mode requires a var-positional parameter")
+
+                group = parser.add_argument_group("map arguments")
+                group.add_argument("--map-jobs", default=self.map_jobs, type=int, metavar="N",
+                                   help="number of worker processes that call the function "
+                                   "for chunks of %s; 0 for the number of CPUs"
+                                   % self.plans[0].varargs)
+                group.add_argument("--chunk-size", default=self.chunk_size, type=int,
+                                   metavar="N", help="number of values per call; default "
+                                   "divides the values evenly among the workers")
+
+            if self.profile:
+                group = parser.add_argument_group("profiling arguments")
+                group.add_argument("--profile", metavar="FILE",
+                                   help="run the function under cProfile and write the "
+                                   "statistics to FILE; read them with pstats")
+                group.add_argument("--memprofile", metavar="FILE",
+                                   help="trace memory allocations with tracemalloc and "
+                                   "write the snapshot to FILE")
+
+            self._add_tool_arguments(parser)
+            self._parser = parser
 
-            # Add arguments for the logging manager function
-            parsed = parse_docstr(inspect.getdoc(self.logmngr))
+        return self._parser
 
-            if parsed.args:
-                func_help = _parse_docargs(parsed.args)
-            else:
-                func_help = None
+    @property
+    def batch_parser(self):
+        """ArgumentParser object for batch mode.
+
+        The parser accepts the logging and batch arguments, but not the
+        arguments of the target function, which are read from the batch file.
+        """
+        # Abbreviations are disabled so function options are not mistaken for
+        # batch options; allow_abbrev is available since Python 3.5.
+        kwargs = {"allow_abbrev": False} if sys.version_info >= (3, 5) else {}
+        parser = _new_parser(prog=self.parser.prog, add_help=False,
+                             fromfile_prefix_chars="@", **kwargs)
+        self._add_tool_arguments(parser)
+        return parser
+
+    def _add_tool_arguments(self, parser):
+        """Add the logging and optional batch arguments to the parser"""
+        # Create a group for the logging arguments
+        group = parser.add_argument_group("logging arguments")
+        _apply_spec(group, self.spec["logmngr"], self.logmngr)
+
+        if self.timeout is not None or self.result_cache is not None:
+            group = parser.add_argument_group("execution arguments")
+
+        if self.timeout is not None:
+            group.add_argument("--timeout", default=self.timeout, type=float, metavar="SECONDS",
+                               help="stop waiting for the function after SECONDS and report "
+                               "TIMED OUT (status %d); 0 for no limit" % TIMED_OUT)
+
+        if self.result_cache is not None:
+            group.add_argument("--cache", action="store_true", default=self.memoize,
+                               help="reuse the output of an earlier call with the same "
+                               "arguments%s" % ("; default" if self.memoize else ""))
+            group.add_argument("--no-cache", action="store_false", dest="cache",
+                               help="call the function even if its output is cached")
+
+        if self.batch:
+            group = parser.add_argument_group("batch arguments")
+            group.add_argument("--batch", metavar="FILE",
+                               help="read argument sets from FILE ('-' for stdin); one "
+                               "JSON list, JSON object, or command line per line")
+            group.add_argument("--batch-report", metavar="FILE",
+                               help="write the JSON lines report to FILE instead of stdout")
+            group.add_argument("--jobs", default=1, type=int, metavar="N",
+                               help="number of argument sets to execute in parallel")
+            group.add_argument("--pool", default="process", choices=("process", "thread"),
+                               help="worker pool used when jobs is greater than 1")
+            group.add_argument("--unordered", action="store_true",
+                               help="report results in completion order")
+
+    def _parse_record(self, record):
+        """Return dict of parameter values for one batch argument set.
+
+        Args:
+            record: list of command line arguments or dict of parameter values
+
+        Returns:
+            dict: parameter values
+        """
+        if not isinstance(record, dict):
+            # The help action writes to stdout and exits, ending the batch
+            if _wants_help(record):
+                raise ParseError("help is not available for an argument set")
+
+            return vars(self.parser.parse_args(record))
+
+        params = {}
+
+        for item in self.spec["func"]:
+            kind, name = item["kind"], item["name"]
+
+            if name in record:
+                params[name] = convert(item["type"], record[name])
+            elif kind == "positional" or (kind == "kwonly" and item["required"]):
+                raise ParseError("the following arguments are required: %s" % name)
+
+        unknown = set(record) - set(item["name"] for item in self.spec["func"])
+
+        if unknown:
+            raise ParseError("unrecognized arguments: %s" % ", ".join(sorted(unknown)))
+
+        return params
+
+    def _batch_tasks(self, records):
+        """Yield (index, args, kwargs, result) for each argument set.
+
+        result is a Result object for an invalid argument set; otherwise, it
+        is None and args and kwargs are the arguments for the function.
+        """
+        for index, record in enumerate(records):
+            try:
+                with _raise_parse_errors():
+                    params = self._parse_record(record)
+
+                execargs, execkwargs = self.plans[0].bind(params)
+            except (ParseError, ValueError, TypeError):
+                logging.error("Argument set %s: %s", index, sys.exc_info()[1])
+                yield index, None, None, Result(2, None, ErrorInfo.from_exc_info())
+                continue
+
+            yield index, execargs, execkwargs, None
+
+    def run_task(self, task):
+        """Execute one batch task and return (index, Result)"""
+        index, args, kwargs, result = task
+
+        if result is None:
+            result = self.execute(*args, **kwargs)
+
+        return index, result
+
+    def iter_batch(self, records, jobs=1, pool="process", ordered=True, logparams=None):
+        """Execute function for each argument set and yield (index, Result).
+
+        The parser and logging configuration are reused for all argument sets.
+        Invalid argument sets produce a Result with status 2 and the
+        ParseError in the error attribute.
+
+        If jobs is greater than 1, the argument sets are executed on a pool
+        of worker processes or threads. A process pool requires a function
+        that can be pickled, and the tracebacks of the errors are removed.
+
+        Args:
+            records: iterable of argument sets; each is a list of command line
+                arguments or a dict mapping parameter names to values.
+            jobs: number of worker processes or threads
+            pool: "process" for a process pool or "thread" for a thread pool
+            ordered: If True, yield results in input order; otherwise, yield
+                results in completion order.
+            logparams: (args, kwargs) for the logging manager in worker processes
+        """
+        tasks = self._batch_tasks(records)
+
+        if jobs > 1:
+            for item in map_tasks(self, tasks, jobs, pool, ordered, logparams):
+                yield item
+        else:
+            for task in tasks:
+                yield self.run_task(task)
+
+    def run_batch(self, records, report=None, **kwargs):
+        """Execute function for each argument set and return Result object.
+
+        Args:
+            records: iterable of argument sets; see iter_batch.
+            report: file object; receives one JSON line per argument set.
+            kwargs: jobs, pool, ordered, and logparams; see iter_batch.
+
+        Returns:
+            Result: status is 0 if every argument set succeeded, otherwise 1,
+                or the cancellation status if the batch was cancelled; output
+                is a dict with the total and failed counts.
+        """
+        total, failed = 0, 0
+        status, error = None, None
+        items = self.iter_batch(records, **kwargs)
 
-            # Create a group for the logging arguments
-            group = parser.add_argument_group("logging arguments")
-            _config_parser(group, self.logmngr, func_help)
-            self._parser = parser
+        try:
+            for index, result in items:
+                total += 1
+                failed += 1 if result.status else 0
+
+                if report is not None:
+                    report.write(format_report(index, result))
+                    report.flush()
+
+                # Stop at the first argument set cancelled by SIGINT or SIGTERM
+                if result.error:
+                    status = cancel_status(result.error[1])
+
+                    if status is not None:
+                        break
+        except Cancelled:
+            # Cancelled while waiting for or stopping the workers; the
+            # reported argument sets are kept.
+            error = ErrorInfo.from_exc_info()
+            status = error[1].status
+        finally:
+            # Terminate and join the workers of an unfinished batch
+            items.close()
 
-        return self._parser
+        if status is None:
+            status = 1 if failed else 0
+
+        return Result(status, {"total": total, "failed": failed}, error)
+
+    def _call_batch(self, params):
+        """Run batch mode with the parsed logging and batch arguments"""
+        logargs, logkwargs = self.plans[1].bind(params)
+        self.logmngr(*logargs, **logkwargs)
+        tool = self
+
+        if self.timeout is not None or self.result_cache is not None:
+            # Workers receive the execution options with a copy of the tool
+            tool = copy.copy(self)
+            tool.timeout = params.get("timeout", self.timeout)
+            tool.memoize = params.get("cache", self.memoize)
+
+        source = sys.stdin if params["batch"] == "-" else open(params["batch"], "r")
+        report = sys.stdout if not params["batch_report"] else open(params["batch_report"], "w")
 
-    def execute(self, *args, **kwargs):
-        """Execute function and return Result object"""
         try:
-            status, output, error = 0, None, None
-            datefmt = "%Y-%m-%d %H:%M:%S"
-            start = datetime.datetime.now()
+            with cancel_on_signals():
+                result = tool.run_batch(read_records(source), report, jobs=params["jobs"],
+                                        pool=params["pool"], ordered=not params["unordered"],
+                                        logparams=self.plans[1].bind(worker_log_params(params)))
+        finally:
+            if source is not sys.stdin:
+                source.close()
+            if report is not sys.stdout:
+                report.close()
 
-            # Construct and emit start message
-            if self.label:
-                logging.info(self.label)
+            # Flush and close the log handlers, including queued handlers
+            logging.shutdown()
 
-            logging.info("Start Time: %s", start.strftime(datefmt))
+        return result
+
+    def _emit_start(self):
+        """Emit the start message and return the start time as a tuple of
+        time.time() and clock value"""
+        start = time.time(), clock()
+
+        # Construct and emit start message
+        if self.label:
+            logging.info(self.label)
+
+        logging.info("Start Time: %s", time.strftime(_DATEFMT, time.localtime(start[0])))
+        return start
+
+    @staticmethod
+    def _emit_error(error):
+        """Emit error messages for the ErrorInfo record"""
+        logging.error("%s: %s", error.name, error.message)
+        logging.debug(error.traceback)
+
+    @staticmethod
+    def _emit_end(start, status, cached=None):
+        """Emit the end message for the start time and status.
+
+        cached is True for a result cache hit, False for a miss, and None if
+        the result cache is not used.
+        """
+        # Construct and emit end message
+        # Modified on 2/12/2016 to use '\n' instead of '\r\n' to create new line.
+        # With '\r\n', the log file contained a mix of 'r' and '\r\n' line terminators.
+        end = time.localtime()
+        minutes, seconds = divmod(clock() - start[1], 60)
+        elapsed = "%d:%02d:%05.2f" % (minutes // 60, minutes % 60, seconds)
+
+        if status == 0:
+            closing = "SUCCEEDED at %s (Elapsed Time: %s)\n"
+        elif status == TIMED_OUT:
+            closing = "TIMED OUT at %s (Elapsed Time: %s)\n"
+        elif status > 128:
+            closing = "CANCELLED at %s (Elapsed Time: %s)\n"
+        else:
+            closing = "FAILED at %s (Elapsed Time: %s)\n"
 
-            # Call wrapped function
-            output = self.func(*args, **kwargs)
+        if cached is not None:
+            elapsed += "; Result Cache: %s" % ("HIT" if cached else "MISS")
+
+        logging.info(closing, time.strftime(_DATEFMT, end), elapsed)
+
+    def _record(self, result):
+        """Pass the result to the metrics hook; errors are logged, not raised"""
+        if self.metrics is None:
+            return
+
+        name = getattr(self.func, "__name__", None) or type(self.func).__name__
+
+        try:
+            self.metrics(name, result)
+        except Exception:  # pylint: disable=broad-except
+            logging.warning("Metrics hook failed: %s", sys.exc_info()[1])
+
+    def _invoke(self, args, kwargs):
+        """Call the function; in map mode, call it for each chunk of the
+        var-positional values and return the reduced output"""
+        if self.map_jobs is None:
+            return self.func(*args, **kwargs)
+
+        from clitool2.mapreduce import map_call
+        plan = self.plans[0]
+
+        if not plan.varargs:
+            raise ValueError("map mode requires a var-positional parameter")
+
+        count = len(plan.positional)
+        return map_call(self.func, args[:count], args[count:], kwargs, self.map_jobs,
+                        self.chunk_size, self.reducer)
+
+    def execute(self, *args, **kwargs):
+        """Execute function and return Result object.
+
+        If the function returns an awaitable object, such as the coroutine
+        returned by an async function, it is run to completion on an event loop.
+        """
+        return self._execute(args, kwargs)
+
+    def execute_timeout(self, timeout, *args, **kwargs):
+        """Execute function with a time limit and return Result object.
+
+        If the limit expires, the status of the Result is 124 and the error is
+        the TimedOut exception; see the isolation attribute.
+
+        Args:
+            timeout: time limit in seconds; 0 for no limit, None for the
+                default limit of the tool.
+        """
+        return self._execute(args, kwargs, timeout=timeout)
+
+    def _execute(self, args, kwargs, sink=None, profile=None, memprofile=None, timeout=None,
+                 memoize=None, record=True):
+        """Execute function and return Result object.
+
+        The timings of the Result include the duration of the call, the CPU
+        time of the process during the call, and the peak RSS.
+
+        Args:
+            args: positional arguments for the function
+            kwargs: keyword arguments for the function
+            sink: If set, callable that consumes an iterator returned by the
+                function and returns the number of items; see
+                clitool2.streaming.Sink. The output of the Result is the count.
+            profile: If set, file name for the cProfile statistics
+            memprofile: If set, file name for the tracemalloc snapshot
+            timeout: time limit in seconds; 0 for no limit, None for the
+                default limit of the tool.
+            memoize: If True, use the result cache; None for the default of
+                the tool.
+            record: If True, pass the Result to the metrics hook.
+        """
+        limit = (self.timeout if timeout is None else timeout) or None
+
+        def call(gate=None):
+            """Call the function, run an awaitable, and stream the items; the
+            gate stops the items when the call is abandoned"""
+            with profiled(profile, memprofile):
+                # Call wrapped function
+                output = self._invoke(args, kwargs)
+
+                if _isawaitable(output):
+                    # A coroutine is cancelled when the time limit expires
+                    from clitool2.aio import run_coroutine
+                    output = run_coroutine(output, limit)
+
+                # Stream the items of a generator; errors raised while the items
+                # are produced are reported like errors raised by the function.
+                if sink is not None and is_iterator(output):
+                    output = sink(output if gate is None else gate.items(output))
+
+            return output
+
+        try:
+            status, output, error, cached = 0, None, None, None
+            start = self._emit_start()
+            cpu = cpu_time()
+            cache, key, cached, output = self._lookup(args, kwargs, memoize)
+
+            if not cached:
+                if limit is None or _has_code_flag(self.func, _CO_COROUTINE):
+                    output = call()
+                elif self.isolation == "process" and self.map_jobs is None:
+                    output = run_with_timeout(self.func, args, kwargs, limit, "process")
+
+                    if sink is not None and is_iterator(output):
+                        output = sink(output)
+                else:
+                    # The thread cannot be stopped; its items are discarded
+                    # once the caller stops waiting.
+                    gate = StreamGate()
+
+                    try:
+                        output = run_with_timeout(call, (gate,), timeout=limit)
+                    finally:
+                        gate.close()
+
+                # Streamed items are not cached
+                if sink is None:
+                    self._store(cache, key, output)
 ##        except arcpy.ExecuteError:
 ##            # Log arcpy error message
 ##            exc_type = "ExecuteError"
@@ -384,42 +1120,172 @@ class CLITool(object):
 ##            logging.error("%s: %s", exc_type, exc_value)
 ##            logging.debug(format_exc(exc_tb))
 ##            status = 1
+        except TimedOut:
+            error, status = self._fail(), TIMED_OUT
         except Exception:
             # Emit error messages
-            error = sys.exc_info()
-            logging.error("%s: %s", error[0].__name__, error[1])
-            logging.debug(format_exc())
-            status = 1
+            error, status = self._fail(), 1
+        except Cancelled as err:
+            # SIGINT or SIGTERM cancelled the call; see cancel_on_signals
+            error, status = self._fail(), cancel_status(err)
+        except KeyboardInterrupt:
+            # Raised to API callers; the command line converts SIGINT to Cancelled
+            status = CANCELLED
+            raise
         finally:
-            # Construct and emit end message
-            # Modified on 2/12/2016 to use '\n' instead of '\r\n' to create new line.
-            # With '\r\n', the log file contained a mix of 'r' and '\r\n' line terminators.
-            end = datetime.datetime.now()
-            elapsed = str(end - start)[:-4]
-
-            if status == 0:
-                closing = "SUCCEEDED at %s (Elapsed Time: %s)\n"
-            else:
-                closing = "FAILED at %s (Elapsed Time: %s)\n"
-
-            logging.info(closing, end.strftime(datefmt), elapsed)
+            timings = self._end(start, cpu, status, cached)
 
         # Return result object
-        return Result(status, output, error)
+        return self._result(status, output, error, timings, record)
+
+    # The steps below are shared by _execute and clitool2.aio.execute_async.
+
+    def _lookup(self, args, kwargs, memoize=None):
+        """Return (cache, key, hit, output) for the result cache; cache and
+        key are None if the result cache is not used"""
+        cache = self.result_cache if (self.memoize if memoize is None else memoize) else None
+
+        if cache is None:
+            return None, None, None, None
+
+        key = cache.key(self.func, args, kwargs)
+
+        # Calls with arguments that have no value-based key are not cached
+        if key is None:
+            return None, None, None, None
+
+        hit, output = cache.load(key)
+        return cache, key, hit, output
+
+    @staticmethod
+    def _store(cache, key, output):
+        """Store the output in the result cache; iterators are not cached"""
+        if cache is not None and not is_iterator(output):
+            cache.store(key, output)
+
+    def _fail(self):
+        """Emit the error being handled and return its ErrorInfo record"""
+        error = ErrorInfo.from_exc_info()
+        self._emit_error(error)
+        return error
+
+    def _end(self, start, cpu, status, cached=None):
+        """Emit the end message and return the timings of the call"""
+        timings = {"call": clock() - start[1], "cpu": cpu_time() - cpu}
+        self._emit_end(start, status, cached)
+        return timings
+
+    def _result(self, status, output, error, timings, record=True):
+        """Return Result object and pass it to the metrics hook if record is True"""
+        timings["peak_rss"] = peak_rss()
+        result = Result(status, output, error, timings)
+
+        if record:
+            self._record(result)
+
+        return result
+
+    def _execute_params(self, args, kwargs, params, record=True):
+        """Execute function with the streaming, profiling, time limit, result
+        cache, and map options in the parsed arguments; see _execute.
+
+        Args:
+            args: positional arguments for the function
+            kwargs: keyword arguments for the function
+            params: dict of parsed command line arguments
+            record: If True, pass the Result to the metrics hook.
+        """
+        sink = Sink(params["stream_output"], params["stream_format"]) if self.streams else None
+        profiling = (params["profile"], params["memprofile"]) if self.profile else (None, None)
+        timeout = params["timeout"] if self.timeout is not None else None
+        memoize = params["cache"] if self.result_cache is not None else None
+        tool = self
+
+        if self.map_jobs is not None:
+            # The map options of the command line apply to this call only
+            tool = copy.copy(self)
+            tool.map_jobs, tool.chunk_size = params["map_jobs"], params["chunk_size"]
+
+        # pylint: disable=protected-access
+        return tool._execute(args, kwargs, sink, *profiling, timeout=timeout, memoize=memoize,
+                             record=record)
+
+    def execute_async(self, *args, **kwargs):
+        """Return coroutine that executes function and returns Result object.
+
+        Coroutine functions are awaited on the running event loop; other
+        functions are called in the default executor so they do not block it.
+        Requires Python 3.5 or later.
+        """
+        from clitool2.aio import execute_async
+        return execute_async(self, args, kwargs)
+
+    def execute_many_async(self, calls, limit=None):
+        """Return coroutine that executes function for each (args, kwargs) in
+        calls and returns a list of Result objects in the same order.
+
+        Args:
+            calls: iterable of (args, kwargs)
+            limit: maximum number of concurrent calls; None for no limit.
+        """
+        from clitool2.aio import execute_many_async
+        return execute_many_async(self, calls, limit)
 
     def __call__(self, *args):
-        """Parse command line arguments, execute callable, and return Result object"""
+        """Parse command line arguments, execute callable, and return Result object.
+
+        SIGINT and SIGTERM cancel the call; the status of the Result is 128
+        plus the signal number. The execute methods raise KeyboardInterrupt
+        instead.
+
+        The timings of the Result include the duration in seconds of each
+        phase: parser (building the parser), parse, bind, logging (calling the
+        logging manager), call, shutdown (logging.shutdown), and total.
+        """
         # Parse arguments
         args = args or sys.argv[1:]
-        params = vars(self.parser.parse_args(args))
+        timings = {}
+        begin = clock()
+
+        if _wants_help(args):
+            sys.stdout.write(self.format_help())
+            sys.exit(0)
+
+        if self.batch:
+            params, extra = self.batch_parser.parse_known_args(args)
+
+            if params.batch is not None:
+                if extra:
+                    self.batch_parser.error("unrecognized arguments: %s" % " ".join(extra))
+
+                return self._call_batch(vars(params))
+
+        parser = self.parser
+        mark = clock()
+        timings["parser"] = mark - begin
+        params = vars(parser.parse_args(args))
+        timings["parse"], mark = clock() - mark, clock()
 
         # Separate logging from func arguments
-        logargs, logkwargs = _getcallargs(self.logmngr, **params)
-        execargs, execkwargs = _getcallargs(self.func, **params)
+        logargs, logkwargs = self.plans[1].bind(params)
+        execargs, execkwargs = self.plans[0].bind(params)
+        timings["bind"], mark = clock() - mark, clock()
 
         # Configure logging and call targt function
         self.logmngr(*logargs, **logkwargs)
-        result = self.execute(*execargs, **execkwargs)
-        logging.shutdown()
+        timings["logging"] = clock() - mark
+
+        try:
+            with cancel_on_signals():
+                result = self._execute_params(execargs, execkwargs, params, record=False)
+        finally:
+            # Flush and close the log handlers, including queued handlers
+            mark = clock()
+            logging.shutdown()
+            timings["shutdown"] = clock() - mark
+
+        timings["total"] = clock() - begin
+        result.timings.update(timings)
+        self._record(result)
 
         return result
@@ -1,12 +1,99 @@
 """Command line interface for multiple commands"""
 from __future__ import absolute_import, division, print_function
-from argparse import ArgumentParser
-import inspect
+from bisect import bisect_left
+from collections import namedtuple, OrderedDict
+from itertools import islice
+import importlib
+import os
 import sys
-from clitool2.clitool import parse_docstr, Result
+from clitool2.argfile import expand_args
+from clitool2.cache import SpecCache, is_current, source_stamps, terminal_width
+from clitool2.clitool import CLITool, Result
+from clitool2.clitool import _isawaitable, _new_parser, _wants_help
 
 __version__ = "1.1"
 
+try:
+    _string_types = basestring  # pylint: disable=invalid-name
+except NameError:
+    _string_types = str
+
+# Command registered in a toolbox
+_Command = namedtuple("_Command", ("func", "name", "description", "aliases"))
+
+def _import_ref(ref):
+    """Import and return the object named by a dotted reference.
+
+    Args:
+        ref: reference in the form "package.module:attribute"; the attribute
+            may be a dotted path such as "module:Class.method".
+
+    Returns:
+        object: referenced object
+    """
+    module_name, _, attr = ref.partition(":")
+
+    if not module_name or not attr:
+        raise ValueError("Expected 'package.module:attribute'; got '%s'" % ref)
+
+    obj = importlib.import_module(module_name)
+
+    for name in attr.split("."):
+        obj = getattr(obj, name)
+
+    return obj
+
+def _summarize(func):
+    """Return the summary (or description) from the docstring of func.
+
+    For a CLITool object, the label or the docstring of the target function
+    is used instead of the CLITool docstring.
+    """
+    if isinstance(func, CLITool):
+        if func.label:
+            return func.label
+
+        func = func.func
+
+    from clitool2.docstring import get_docinfo
+    parsed = get_docinfo(func)
+    return parsed.summary or parsed.description
+
+class _LazyCommand(object):
+    """Command referenced by "package.module:attribute".
+
+    The module is imported when the command is first called, so registering
+    a command does not import the command module or its dependencies.
+
+    Attributes:
+        ref: reference in the form "package.module:attribute"
+        parse_doc: If True, the summary is parsed from the target docstring.
+    """
+    def __init__(self, ref, parse_doc=False):
+        self.ref = ref
+        self.parse_doc = parse_doc
+        self._target = None
+        self._summary = None
+
+    @property
+    def target(self):
+        """Referenced object; the module is imported on first access"""
+        if self._target is None:
+            self._target = _import_ref(self.ref)
+
+        return self._target
+
+    @property
+    def summary(self):
+        """Summary parsed from the target docstring; imports the module"""
+        if self._summary is None and self.parse_doc:
+            self._summary = _summarize(self.target)
+
+        return self._summary
+
+    def __call__(self, *args):
+        return self.target(*args)
+
 def _format_epilog(commands):
     """Create a epilog string for the specified commands.
 
@@ -39,76 +126,329 @@ def _format_epilog(commands):
 class CLIToolbox(object):
     """Provides a command line interface for multiple commands.
 
+    Commands are indexed by name and alias, so dispatch does not depend on the
+    number of commands and does not build a parser. A command can also be
+    selected by an unambiguous prefix of its name or alias.
+
+    The help messages are rendered once. If cache_dir is set, they are also
+    stored on disk, so the toolbox help and the help of a command registered
+    by reference are printed without importing the command modules or
+    building parsers. A cached message is rendered again when the source
+    file of the command changes.
+
+    "prog --script FILE" runs the steps of a script in one process; see
+    run_script and clitool2.pipeline.
+
     Attributes:
         description: Text to display before the argument help
+        prog: Program name displayed in the help message; None for the
+            name of the script.
+        cache_dir: If set, directory used to cache the help messages, e.g. a
+            directory next to the toolbox module.
     """
-    def __init__(self, description=None):
+    def __init__(self, description=None, prog=None, cache_dir=None):
         self.description = description
+        self.prog = prog
+        self.cache_dir = cache_dir
         self._parser = None
-        self._commands = []
+        self._commands = OrderedDict()
+        self._index = {}
+        self._sorted = None
+        self._help = None
 
     @property
     def parser(self):
-        """ArgumentParser object"""
+        """ArgumentParser object; used for the help and error messages"""
         if self._parser is None:
-            parser = ArgumentParser(description=self.description, add_help=False,
-                                    fromfile_prefix_chars="@")
-            choices = [item[1] for item in self._commands]
+            parser = _new_parser(prog=self.prog, description=self.description,
+                                 add_help=False, fromfile_prefix_chars="@")
+            choices = list(self._commands)
             parser.add_argument("subcommand", choices=choices, nargs="?")
             self._parser = parser
 
         return self._parser
 
-    def add_command(self, func, name, description=None, parse_doc=False):
+    def add_command(self, func, name, description=None, parse_doc=False, aliases=()):
         """Add command to toolbox.
 
         func can be a CLITool object, function, or callable object that accepts
         command line arguments and returns a Result object or status code.
+        func can also be a "package.module:attribute" reference to such an
+        object; the module is imported only when the command is executed.
 
         Args:
-            func: CLITool object, function, or other callable object
+            func: CLITool object, function, other callable object, or reference
             name: command name
             description: Text to display in help message
             parse_doc: If True, parse Google style docstring for description.
+            aliases: alternative names for the command
 
         Returns:
             None
         """
-        if " " in name:
-            raise ValueError("name cannot contain spaces; got '%s'" % name)
+        for item in (name,) + tuple(aliases):
+            if " " in item:
+                raise ValueError("name cannot contain spaces; got '%s'" % item)
+            elif item in self._index:
+                raise ValueError("name is already used; got '%s'" % item)
 
-        # description overrides the function doc string
-        if parse_doc and not description:
-            parsed = parse_docstr(inspect.getdoc(func))
-            description = parsed.summary or parsed.description
+        # description overrides the function doc string. The docstring of a
+        # lazy command is parsed when the help message is displayed.
+        if isinstance(func, _string_types):
+            func = _LazyCommand(func, parse_doc=parse_doc and not description)
+        elif parse_doc and not description:
+            description = _summarize(func)
 
         self._parser = None
-        self._commands.append((func, name, description))
+        self._sorted = None
+        self._help = None
+        self._commands[name] = _Command(func, name, description, tuple(aliases))
+
+        for item in (name,) + tuple(aliases):
+            self._index[item] = name
+
+    def add_group(self, name, description=None, aliases=()):
+        """Add a group of commands to toolbox and return it.
+
+        The group is a CLIToolbox object; commands added to it are invoked as
+        "prog group command ...".
+
+        Args:
+            name: group name
+            description: Text to display in help message
+            aliases: alternative names for the group
+
+        Returns:
+            CLIToolbox
+        """
+        prog = "%s %s" % (self.prog or os.path.basename(sys.argv[0]), name)
+        group = CLIToolbox(description, prog=prog, cache_dir=self.cache_dir)
+        self.add_command(group, name, description, aliases=aliases)
+        return group
+
+    def get_command(self, name):
+        """Return the command for the name, alias, or unambiguous prefix.
+
+        Args:
+            name: command name, alias, or prefix
+
+        Returns:
+            tuple: (func, name, description, aliases) or None if not found
+
+        Raises:
+            ValueError: if the prefix matches more than one command
+        """
+        if name in self._index:
+            return self._commands[self._index[name]]
+
+        # Prefix matching uses binary search over the sorted names and aliases
+        if self._sorted is None:
+            self._sorted = sorted(self._index)
+
+        start = bisect_left(self._sorted, name)
+        matches = []
+
+        for item in islice(self._sorted, start, None):
+            if not item.startswith(name):
+                break
+            elif self._index[item] not in matches:
+                matches.append(self._index[item])
+
+        if len(matches) > 1:
+            raise ValueError("ambiguous command: '%s' could match %s"
+                             % (name, ", ".join(matches)))
+
+        return self._commands[matches[0]] if matches else None
+
+    def _describe(self):
+        """Return (func, name, description) for each command.
+
+        The docstring of a lazy command registered with parse_doc is parsed
+        here, so its module is imported only when the help message is shown.
+        """
+        commands = []
+
+        for func, name, description, aliases in self._commands.values():
+            if description is None and isinstance(func, _LazyCommand):
+                description = func.summary
+
+            if aliases:
+                name = "%s (%s)" % (name, ", ".join(aliases))
+
+            commands.append((func, name, description))
+
+        return commands
+
+    def format_help(self):
+        """Return the help message with the list of commands"""
+        if self._help is None:
+            self._help = self._load_help()
+
+        return self._help
+
+    def _load_help(self):
+        """Load the help message from the cache or render it"""
+        cache = SpecCache(self.cache_dir) if self.cache_dir else None
+        key = None
+
+        if cache is not None:
+            # Only lazy commands without a description contribute their
+            # docstrings; their modules are not imported to compute the key.
+            refs = [command.func.ref for command in self._commands.values()
+                    if isinstance(command.func, _LazyCommand) and command.func.parse_doc]
+            commands = [(command.name, command.aliases, command.description,
+                         getattr(command.func, "ref", None))
+                        for command in self._commands.values()]
+            key = cache.key(refs, help="toolbox", description=self.description,
+                            prog=self.prog or os.path.basename(sys.argv[0]),
+                            width=terminal_width(), commands=commands)
+
+        text = cache.load(key) if key else None
+
+        if text is None:
+            text = "%s\n%s" % (self.parser.format_help(), _format_epilog(self._describe()))
+
+            if key:
+                cache.store(key, text)
+
+        return text
+
+    def _command_help(self, command):
+        """Return the help message of the command or None if it has none.
+
+        The help of a CLITool command registered by reference is read from the
+        cache without importing the command module when the source files of
+        the command are unchanged.
+        """
+        func = command.func
+        cache = SpecCache(self.cache_dir) if self.cache_dir else None
+        key = None
+
+        if cache is not None and isinstance(func, _LazyCommand):
+            key = cache.key([func.ref], help="command", prog=os.path.basename(sys.argv[0]),
+                            width=terminal_width())
+            entry = cache.load(key) if key else None
+
+            if entry and is_current(entry["sources"]):
+                return entry["help"]
+
+        # Groups print their own help, which is cached by the group
+        target = func.target if isinstance(func, _LazyCommand) else func
+
+        if not isinstance(target, CLITool):
+            return None
+
+        text = target.format_help()
+        sources = source_stamps([target.func, target.logmngr])
+
+        if key and sources is not None:
+            cache.store(key, {"help": text, "sources": sources})
+
+        return text
+
+    def run_script(self, fobj, jobs=1, on_failure="stop", session=None):
+        """Run the steps of a script and return Result object.
+
+        Steps run on a Session, so each command module is imported once and
+        independent steps run concurrently; see clitool2.pipeline.
+
+        Args:
+            fobj: file object with one step per line
+            jobs: maximum number of concurrent steps
+            on_failure: "stop" or "continue"
+            session: Session used to run the steps; default is a session
+                for this toolbox that leaves logging to the caller.
+
+        Returns:
+            Result: output is the list of StepResult in script order
+        """
+        from clitool2.pipeline import run_script
+        from clitool2.session import Session
+        session = session or Session(self, logmngr=None)
+        return run_script(session, fobj, jobs, on_failure)
+
+    def _call_script(self, args):
+        """Parse the script arguments and run the script"""
+        from clitool2.pipeline import FAILURE_POLICIES, read_script, run_steps
+        from clitool2.session import Session
+        parser = _new_parser(prog=self.prog, description="Run the steps of a script",
+                             fromfile_prefix_chars="@")
+        parser.add_argument("--script", metavar="FILE", required=True,
+                            help="read steps from FILE ('-' for stdin); one command line "
+                            "per line with optional 'name:' and 'after:' clauses")
+        parser.add_argument("--jobs", default=1, type=int, metavar="N",
+                            help="number of steps to run concurrently")
+        parser.add_argument("--on-failure", default="stop", choices=FAILURE_POLICIES,
+                            help="start no more steps after a failure (stop) or run every "
+                            "step whose dependencies succeeded (continue)")
+        params = parser.parse_args(args)
+
+        try:
+            if params.script == "-":
+                steps = read_script(sys.stdin)
+            else:
+                with open(params.script, "r") as fobj:
+                    steps = read_script(fobj)
+        except (IOError, OSError, ValueError) as error:
+            parser.error(str(error))
+
+        with Session(self) as session:
+            return run_steps(session, steps, params.jobs, params.on_failure)
+
+    def print_help(self):
+        """Print the help message with the list of commands"""
+        print(self.format_help())
 
     def __call__(self, *args):
         """Parse command line arguments, execute callable, and return Result object."""
-        # Parse known arguments; remaining arguments are passed to subcommand
+        # The first argument selects the subcommand; remaining arguments are
+        # passed to subcommand. The subcommand expands its own argument files.
         args = args or sys.argv[1:]
-        this, extra = self.parser.parse_known_args(args)
 
-        if not this.subcommand:
-            self.parser.print_help()
-            print("")
-            print(_format_epilog(self._commands))
+        if args and args[0].startswith("@"):
+            try:
+                args = expand_args(args[:1]) + list(args[1:])
+            except (IOError, OSError, ValueError) as error:
+                self.parser.error(str(error))
+
+        if not args or args[0] in ("-h", "--help"):
+            self.print_help()
             sys.exit(0)
 
+        if args[0] == "--script" or args[0].startswith("--script="):
+            return self._call_script(args)
+
+        try:
+            command = self.get_command(args[0])
+        except ValueError as error:
+            self.parser.error(str(error))
+
+        if command is None:
+            self.parser.error("invalid choice: '%s'" % args[0])
+
         # Execute subcommand.
         # If no arguments remain, pass "-h" to prevent parse_args from
         # using sys.argv[1:]. This approach assumes that each tool has
         # at least one required argument.
-        subparser = next((item[0] for item in self._commands \
-                          if item[1] == this.subcommand), None)
+        subparser, extra = command.func, args[1:]
+
+        if not extra or _wants_help(extra):
+            text = self._command_help(command)
+
+            if text is not None:
+                sys.stdout.write(text)
+                sys.exit(0)
 
         if extra:
             result = subparser(*extra)
         else:
             result = subparser("-h")
 
+        # Run the coroutine returned by an async command
+        if _isawaitable(result):
+            from clitool2.aio import run_coroutine
+            result = run_coroutine(result)
+
         # If result is not a Result object, assume it is a status code.
         if not isinstance(result, Result):
             result = Result(result, None, None)
@@ -0,0 +1,212 @@
+"""Shell completion for CLIToolbox and CLITool from a precomputed index
+
+The index is a JSON file generated once from a toolbox, e.g. at install time:
+
+    from clitool2.completion import write_index, script
+    write_index(toolbox, "/etc/mytool/completion.json")
+    print(script("bash", "mytool", "/etc/mytool/completion.json"))
+
+The generated shell function runs this file as a script, not as part of the
+clitool2 package, so completion imports only json and never imports the
+command modules:
+
+    python -S completion.py INDEX CWORD WORDS...
+
+prints the candidates for WORDS[CWORD], one per line. WORDS[0] is the program
+name. No output means the shell should fall back to file name completion.
+"""
+from __future__ import absolute_import, division, print_function
+import json
+import os
+import sys
+
+__version__ = "1.1"
+
+# Format of the index; incremented when the structure changes.
+INDEX_FORMAT = 1
+
+def _tool_node(tool):
+    """Return the index node for a CLITool object"""
+    from clitool2.converters import key_choices
+    spec = tool.spec
+    types = dict((item["name"], item["type"]) for item in spec["func"] + spec["logmngr"])
+    options, positionals = {}, []
+
+    # pylint: disable=protected-access
+    for action in tool.parser._actions:
+        type_ = types.get(action.dest)
+        choices = list(action.choices) if action.choices else key_choices(type_)
+        item = {"nargs": action.nargs, "choices": choices, "type": type_}
+
+        if action.option_strings:
+            for option in action.option_strings:
+                options[option] = item
+        else:
+            positionals.append(item)
+
+    return {"options": options, "positionals": positionals}
+
+def _node(func, summary=None):
+    """Return the index node for a command"""
+    from clitool2.clitool import CLITool
+    from clitool2.clitoolbox import CLIToolbox, _LazyCommand
+
+    if isinstance(func, _LazyCommand):
+        func = func.target
+
+    if isinstance(func, CLIToolbox):
+        node = {"options": {"-h": {"nargs": 0}, "--help": {"nargs": 0}}, "positionals": [],
+                "commands": {}, "aliases": {}}
+
+        # pylint: disable=protected-access
+        for command, described in zip(func._commands.values(), func._describe()):
+            node["commands"][command.name] = _node(command.func, described[2])
+
+            for alias in command.aliases:
+                node["aliases"][alias] = command.name
+    elif isinstance(func, CLITool):
+        node = _tool_node(func)
+    else:
+        node = {"options": {}, "positionals": []}
+
+    node["summary"] = summary
+    return node
+
+def build_index(toolbox):
+    """Return the completion index for a CLIToolbox or CLITool object.
+
+    Every command is imported and its parser is built, so the index should be
+    generated once and stored with write_index.
+
+    Args:
+        toolbox: CLIToolbox or CLITool object
+
+    Returns:
+        dict: completion index
+    """
+    index = _node(toolbox)
+    index["format"] = INDEX_FORMAT
+    return index
+
+def write_index(toolbox, path):
+    """Build the completion index and write it to path as JSON"""
+    with open(path, "w") as fobj:
+        json.dump(build_index(toolbox), fobj, sort_keys=True)
+
+def _find(node, word):
+    """Return the subcommand node for the name, alias, or unambiguous prefix"""
+    commands, aliases = node.get("commands") or {}, node.get("aliases") or {}
+    name = aliases.get(word, word)
+
+    if name not in commands:
+        matches = set(aliases.get(item, item) for item in list(commands) + list(aliases)
+                      if item.startswith(word))
+        name = matches.pop() if len(matches) == 1 else None
+
+    return commands.get(name)
+
+def complete(index, words, current):
+    """Return the completion candidates for the current word.
+
+    Args:
+        index: completion index
+        words: preceding words, excluding the program name
+        current: word being completed; may be empty
+
+    Returns:
+        list: candidates; empty if the shell should complete file names
+    """
+    node, pending, position = index, None, 0
+
+    for word in words:
+        if pending is not None:
+            # Value of the preceding option
+            pending = None
+        elif word.startswith("-"):
+            option = node["options"].get(word.split("=", 1)[0])
+
+            if option and option.get("nargs") != 0 and "=" not in word:
+                pending = option
+        elif node.get("commands") is not None:
+            # Unknown commands have no options or positional arguments
+            node = _find(node, word) or {"options": {}, "positionals": []}
+        else:
+            position += 1
+
+    if pending is not None:
+        candidates = pending.get("choices") or []
+    elif current.startswith("-"):
+        candidates = node["options"]
+    elif node.get("commands"):
+        candidates = list(node["commands"]) + list(node["aliases"])
+    elif position < len(node["positionals"]):
+        candidates = node["positionals"][position].get("choices") or []
+    elif node["positionals"] and node["positionals"][-1].get("nargs") in ("*", "+"):
+        candidates = node["positionals"][-1].get("choices") or []
+    else:
+        candidates = []
+
+    return sorted(item for item in candidates if item.startswith(current))
+
+_SCRIPTS = {
+    "bash": """_clitool2_{name}() {{
+    local IFS=$'\\n'
+    COMPREPLY=($("{python}" -S "{script}" "{index}" "$COMP_CWORD" "${{COMP_WORDS[@]}}"))
+}}
+complete -o default -F _clitool2_{name} {prog}
+""",
+    "zsh": """_clitool2_{name}() {{
+    local -a candidates
+    candidates=("${{(@f)$("{python}" -S "{script}" "{index}" $((CURRENT - 1)) "${{words[@]}}")}}")
+    if (( ${{#candidates[@]}} )) && [[ -n "${{candidates[1]}}" ]]; then
+        compadd -- "${{candidates[@]}}"
+    else
+        _files
+    fi
+}}
+compdef _clitool2_{name} {prog}
+""",
+    "fish": """function __clitool2_{name}
+    set -l words (commandline -opc)
+    "{python}" -S "{script}" "{index}" (count $words) $words (commandline -ct)
+end
+complete -c {prog} -a '(__clitool2_{name})'
+"""}
+
+def script(shell, prog, index_path):
+    """Return the completion script for the shell.
+
+    Args:
+        shell: "bash", "zsh", or "fish"
+        prog: program name
+        index_path: path of the index created by write_index
+
+    Returns:
+        str: shell script; source it from the shell startup file
+    """
+    if shell not in _SCRIPTS:
+        raise ValueError("Expected one of %s; got '%s'" % (", ".join(sorted(_SCRIPTS)), shell))
+
+    name = "".join(char if char.isalnum() else "_" for char in os.path.basename(prog))
+    script_path = os.path.abspath(__file__)
+
+    if script_path.endswith((".pyc", ".pyo")):
+        script_path = script_path[:-1]
+
+    return _SCRIPTS[shell].format(name=name, prog=prog, python=sys.executable,
+                                  script=script_path, index=os.path.abspath(index_path))
+
+def main(argv):
+    """Print the completion candidates; see the module docstring"""
+    index_path, cword, words = argv[0], int(argv[1]), argv[2:]
+
+    with open(index_path, "r") as fobj:
+        index = json.load(fobj)
+
+    current = words[cword] if cword < len(words) else ""
+
+    for candidate in complete(index, words[1:cword], current):
+        print(candidate)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
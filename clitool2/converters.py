@@ -0,0 +1,289 @@
+"""Convert command line argument strings to the types of function parameters
+
+Converters are identified by str keys, so argument specifications that refer
+to them can be cached as JSON:
+
+    bool, int, float, bytes, json   built-in types and JSON strings
+    datetime, date                  ISO 8601 or any format supported by dateutil
+    path                            pathlib.Path
+    argfile                         lazy iterable over the arguments in a file
+    mmap, memoryview                read-only memory map of a file
+    enum:<module>:<name>            Enum member by name or value
+    list:<key>                      list of values; one command line argument each
+
+Converters are compiled once per key and shared by all CLITool objects.
+"""
+from __future__ import absolute_import, division, print_function
+import importlib
+import os
+import sys
+
+__version__ = "1.1"
+
+# Compiled converters by key
+_compiled = {}  # pylint: disable=invalid-name
+
+try:
+    _string_types = basestring  # pylint: disable=invalid-name
+except NameError:
+    _string_types = str
+
+def to_bool(text):
+    """Convert str value to bool.
+
+    Returns True if text is "True" or "1" and False if text is "False" or "0".
+
+    Args:
+        text: str value
+
+    Returns:
+        bool
+    """
+    if text.title() in ("True", "1"):
+        result = True
+    elif text.title() in ("False", "0"):
+        result = False
+    else:
+        raise ValueError("Expected 'True', 'False', '1', '0'; got '%s'" % text)
+
+    return result
+
+def to_datetime(text):
+    """Convert str value to datetime; ISO 8601 strings avoid dateutil"""
+    import datetime
+
+    try:
+        return datetime.datetime.fromisoformat(text)
+    except (AttributeError, ValueError):
+        from dateutil.parser import parse
+        return parse(text)
+
+def to_date(text):
+    """Convert str value to date; ISO 8601 strings avoid dateutil"""
+    import datetime
+
+    try:
+        return datetime.date.fromisoformat(text)
+    except (AttributeError, ValueError):
+        from dateutil.parser import parse
+        return parse(text).date()
+
+def to_bytes(text):
+    """Convert str value to bytes using the file system encoding"""
+    if hasattr(os, "fsencode"):
+        return os.fsencode(text)
+
+    return text
+
+def to_json(text):
+    """Convert JSON string to the decoded value"""
+    import json
+    return json.loads(text)
+
+def to_path(text):
+    """Convert str value to pathlib.Path"""
+    from pathlib import Path
+    return Path(text)
+
+def to_argfile(text):
+    """Convert file name to lazy iterable over the arguments in the file"""
+    from clitool2.argfile import ArgFile
+    return ArgFile(text)
+
+def to_mmap(text):
+    """Convert file name to read-only memory map of the file.
+
+    Returns empty bytes for an empty file, which cannot be mapped.
+    """
+    import mmap
+
+    with open(text, "rb") as fobj:
+        if os.fstat(fobj.fileno()).st_size == 0:
+            return b""
+
+        return mmap.mmap(fobj.fileno(), 0, access=mmap.ACCESS_READ)
+
+def to_memoryview(text):
+    """Convert file name to read-only memoryview of a memory map of the file"""
+    return memoryview(to_mmap(text))
+
+def _import_name(module_name, qualname):
+    """Import and return the object with the qualified name from the module"""
+    obj = importlib.import_module(module_name)
+
+    for name in qualname.split("."):
+        obj = getattr(obj, name)
+
+    return obj
+
+def _enum_converter(cls):
+    """Return converter for the members of the Enum class"""
+    def convert(text):
+        """Return the member with the name or value"""
+        try:
+            return cls[text]
+        except KeyError:
+            pass
+
+        for member in cls:
+            if str(member.value) == text:
+                return member
+
+        raise ValueError("Expected one of %s; got '%s'" % (", ".join(cls.__members__), text))
+
+    # argparse includes the name of the converter in error messages
+    convert.__name__ = cls.__name__
+    return convert
+
+_SIMPLE = {"bool": to_bool, "int": int, "float": float, "bytes": to_bytes,
+           "json": to_json, "datetime": to_datetime, "date": to_date, "path": to_path,
+           "argfile": to_argfile, "mmap": to_mmap, "memoryview": to_memoryview}
+
+def get_converter(key):
+    """Return the converter for one value of the key or None for str values.
+
+    Args:
+        key: converter key or None
+
+    Returns:
+        function: accepts str and returns converted value
+    """
+    if key is None or key == "str":
+        return None
+
+    try:
+        return _compiled[key]
+    except KeyError:
+        pass
+
+    if key in _SIMPLE:
+        converter = _SIMPLE[key]
+    elif key.startswith("list:"):
+        converter = get_converter(key[5:])
+    elif key.startswith("enum:"):
+        converter = _enum_converter(_import_name(*key[5:].split(":", 1)))
+    else:
+        raise ValueError("Unknown converter '%s'" % key)
+
+    _compiled[key] = converter
+    return converter
+
+def is_list(key):
+    """Return True if the key converts multiple command line arguments"""
+    return bool(key) and key.startswith("list:")
+
+def convert(key, value):
+    """Convert str value, or each str in list value, with the converter for key.
+
+    Lists are converted item by item for list keys and for var-positional
+    parameters, whose key is the type of each value.
+    """
+    converter = get_converter(key)
+
+    if converter is None:
+        return value
+    elif isinstance(value, (list, tuple)):
+        return [converter(item) if isinstance(item, _string_types) else item
+                for item in value]
+    elif isinstance(value, _string_types):
+        return converter(value)
+
+    return value
+
+def key_choices(key):
+    """Return the str values accepted by the key or None if not enumerable.
+
+    Used for shell completion of bool and Enum parameters.
+    """
+    if key == "bool":
+        return ["True", "False"]
+    elif key and key.startswith("list:"):
+        return key_choices(key[5:])
+    elif key and key.startswith("enum:"):
+        return list(_import_name(*key[5:].split(":", 1)).__members__)
+
+    return None
+
+def _typing_parts(annotation):
+    """Return (origin, args) of a typing annotation such as List[int]"""
+    try:
+        import typing
+    except ImportError:
+        return None, ()
+
+    if hasattr(typing, "get_origin"):
+        return typing.get_origin(annotation), typing.get_args(annotation)
+
+    return getattr(annotation, "__origin__", None), getattr(annotation, "__args__", None) or ()
+
+def type_key(annotation):
+    """Return the converter key for the annotation or None for str values.
+
+    Supports bool, int, float, bytes, datetime, date, pathlib paths, Enum
+    classes, List[...] and list[...], Optional[...], Iterable[str] and
+    Iterator[str] (argument files), and mmap.mmap and memoryview (files).
+
+    Args:
+        annotation: parameter annotation
+
+    Returns:
+        str: converter key or None
+    """
+    import datetime
+    import mmap
+    simple = ((bool, "bool"), (int, "int"), (float, "float"), (bytes, "bytes"),
+              (datetime.datetime, "datetime"), (datetime.date, "date"),
+              (mmap.mmap, "mmap"), (memoryview, "memoryview"))
+
+    for type_, key in simple:
+        if annotation is type_:
+            return key
+
+    origin, args = _typing_parts(annotation)
+
+    if origin is not None:
+        import typing
+        args = [item for item in args if item is not type(None)]
+
+        if _is_union(origin, typing) and len(args) == 1:
+            return type_key(args[0])
+        elif origin in (list, getattr(typing, "List", list)) and len(args) == 1:
+            return "list:" + (type_key(args[0]) or "str")
+        elif _is_iterable(origin, typing) and args in ([str], []):
+            return "argfile"
+
+        return None
+
+    if isinstance(annotation, type):
+        module_name = getattr(annotation, "__module__", "")
+        mro = [(item.__module__, item.__name__) for item in annotation.__mro__]
+
+        # Python 3.13 defines the path classes in pathlib._local; a class
+        # cannot derive from PurePath unless pathlib has been imported.
+        pathlib = sys.modules.get("pathlib")
+
+        if pathlib is not None and issubclass(annotation, pathlib.PurePath):
+            return "path"
+        elif ("enum", "Enum") in mro:
+            name = getattr(annotation, "__qualname__", annotation.__name__)
+            return "enum:%s:%s" % (module_name, name)
+
+    return None
+
+def _is_iterable(origin, typing):
+    """Return True if origin is Iterable or Iterator"""
+    try:
+        from collections import abc
+    except ImportError:
+        abc = None
+
+    return origin in (getattr(typing, "Iterable", None), getattr(typing, "Iterator", None),
+                      getattr(abc, "Iterable", None), getattr(abc, "Iterator", None))
+
+def _is_union(origin, typing):
+    """Return True if origin is typing.Union or types.UnionType (X | Y)"""
+    if origin is typing.Union:
+        return True
+
+    import types
+    return origin is getattr(types, "UnionType", typing.Union)
@@ -0,0 +1,356 @@
+"""Warm-process server for CLIToolbox and CLITool over a Unix domain socket
+
+The server keeps the interpreter, the imported command modules, and the
+parsers resident. A client sends its command line arguments, working
+directory, and environment; the server runs the command on a worker thread,
+streams stdout, stderr, and log output back, and returns the status.
+
+Start the server from the toolbox module:
+
+    from clitool2.daemon import serve
+    serve(toolbox, "/tmp/mytool.sock", workers=8, idle_timeout=600)
+
+Run a command with the client, which uses only the standard library:
+
+    python -S /path/to/clitool2/daemon.py /tmp/mytool.sock subcommand args...
+
+The protocol uses one JSON object per line. The request is
+{"argv": [...], "cwd": "...", "env": {...}}; the response is a sequence of
+{"stream": "stdout" | "stderr", "data": "..."} followed by {"status": N}.
+
+Requests with the same working directory and environment run concurrently;
+requests with a different working directory or environment wait until the
+active requests finish, since both are process-wide. Changes that a command
+makes to either remain in effect for later requests. Output written by
+threads started by a command goes to the server's own streams.
+
+Commands run on a Session, so the server's logging stays configured between
+requests. Log messages are sent to the client's stderr at the level of the
+server; a request that sets the logging arguments of a tool, such as
+--logfile or --loglevel, fails with status 2.
+
+The socket is created with mode 0600, so only the user running the server
+can connect; commands run with the server's permissions.
+"""
+from __future__ import absolute_import, division, print_function
+from contextlib import contextmanager
+import json
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+import traceback
+
+__version__ = "1.1"
+
+class _StreamProxy(object):
+    """File object that writes to the stream of the current request thread"""
+    def __init__(self, default):
+        self.default = default
+        self._local = threading.local()
+
+    @property
+    def stream(self):
+        """Stream for the current thread"""
+        return getattr(self._local, "stream", None) or self.default
+
+    @stream.setter
+    def stream(self, value):
+        self._local.stream = value
+
+    def write(self, data):
+        return self.stream.write(data)
+
+    def flush(self):
+        return self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.default, name)
+
+class _FrameWriter(object):
+    """Writes response frames to the client connection"""
+    def __init__(self, conn):
+        self.conn = conn
+        self.lock = threading.Lock()
+
+    def send(self, frame):
+        """Send one frame; a closed connection is ignored"""
+        data = (json.dumps(frame) + "\n").encode("utf-8")
+
+        with self.lock:
+            try:
+                self.conn.sendall(data)
+            except (IOError, OSError):
+                pass
+
+class _RequestStream(object):
+    """File object that sends everything written to it as frames"""
+    def __init__(self, writer, name):
+        self.writer = writer
+        self.name = name
+
+    def write(self, data):
+        if data:
+            self.writer.send({"stream": self.name, "data": data})
+
+        return len(data)
+
+    def flush(self):
+        pass
+
+    @staticmethod
+    def isatty():
+        return False
+
+class _ContextGate(object):
+    """Serializes requests whose working directory or environment differ.
+
+    Requests with the same working directory and environment run
+    concurrently; the process state is switched only when no request is
+    active.
+    """
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._key = None
+        self._active = 0
+
+    @contextmanager
+    def enter(self, cwd, env):
+        """Apply the working directory and environment for a request"""
+        key = (cwd, tuple(sorted(env.items())) if env is not None else None)
+
+        with self._cond:
+            while self._active and self._key != key:
+                self._cond.wait()
+
+            if self._key != key:
+                if cwd is not None:
+                    os.chdir(cwd)
+
+                if env is not None:
+                    os.environ.clear()
+                    os.environ.update(env)
+
+                self._key = key
+
+            self._active += 1
+
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._active -= 1
+                self._cond.notify_all()
+
+class Server(object):
+    """Serves a CLIToolbox or CLITool object over a Unix domain socket.
+
+    Attributes:
+        target: CLIToolbox object, CLITool object, or callable that accepts
+            command line arguments and returns a Result object or status code.
+        path: path of the Unix domain socket
+        workers: number of requests executed concurrently
+        idle_timeout: seconds without requests before the server stops;
+            None to run until shutdown is called.
+        loglevel: level of the log messages sent to clients
+    """
+    def __init__(self, target, path, workers=4, idle_timeout=None, loglevel=logging.INFO):
+        self.target = target
+        self.path = path
+        self.workers = workers
+        self.idle_timeout = idle_timeout
+        self.loglevel = loglevel
+        self._gate = _ContextGate()
+        self._lock = threading.Lock()
+        self._active = 0
+        self._last = time.time()
+        self._stopped = threading.Event()
+        self._session = None
+
+    def _bind(self):
+        """Return listening socket; removes a stale socket file"""
+        if os.path.exists(self.path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+            try:
+                probe.connect(self.path)
+                raise OSError("Server is already running at '%s'" % self.path)
+            except socket.error:
+                os.remove(self.path)
+            finally:
+                probe.close()
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        # Other users must not connect: they would run commands as this user.
+        # The umask covers the window between bind and chmod.
+        umask = os.umask(0o177)
+
+        try:
+            sock.bind(self.path)
+        finally:
+            os.umask(umask)
+
+        os.chmod(self.path, 0o600)
+        sock.listen(max(self.workers * 4, 16))
+        sock.settimeout(0.2)
+        return sock
+
+    def _run(self, argv, writer):
+        """Run the command with output sent to the client; return status"""
+        sys.stdout.stream = _RequestStream(writer, "stdout")
+        sys.stderr.stream = _RequestStream(writer, "stderr")
+
+        try:
+            # The session does not close the log handlers of the server
+            result = self._session.run(argv)
+
+            if result.status == 2 and result.error is not None:
+                sys.stderr.write("error: %s\n" % result.error.message)
+            elif result.status == 0 and self._shows_help(argv):
+                sys.stdout.write(result.output)
+
+            return result.status or 0
+        except SystemExit as error:
+            code = error.code
+
+            if code is not None and not isinstance(code, int):
+                sys.stderr.write("%s\n" % code)
+                code = 1
+
+            return code or 0
+        except Exception:  # pylint: disable=broad-except
+            sys.stderr.write(traceback.format_exc())
+            return 1
+        finally:
+            sys.stdout.stream = None
+            sys.stderr.stream = None
+
+    def _shows_help(self, argv):
+        """Return True if the session returns the help message for argv"""
+        from clitool2.clitool import _wants_help
+        from clitool2.clitoolbox import CLIToolbox
+
+        if _wants_help(argv):
+            return True
+
+        # A toolbox without a command or a command without arguments shows
+        # its help
+        return isinstance(self.target, CLIToolbox) and len(argv) <= 1
+
+    def _handle(self, conn):
+        """Handle one client connection"""
+        try:
+            fobj = conn.makefile("rb")
+            request = json.loads(fobj.readline().decode("utf-8"))
+            fobj.close()
+            writer = _FrameWriter(conn)
+
+            with self._gate.enter(request.get("cwd"), request.get("env")):
+                status = self._run(request.get("argv") or [], writer)
+
+            writer.send({"status": status})
+        except Exception:  # pylint: disable=broad-except
+            logging.getLogger(__name__).debug(traceback.format_exc())
+        finally:
+            conn.close()
+
+            with self._lock:
+                self._active -= 1
+                self._last = time.time()
+
+    def _idle(self):
+        """Return True if the idle timeout has expired"""
+        with self._lock:
+            return bool(self.idle_timeout) and self._active == 0 \
+                and time.time() - self._last > self.idle_timeout
+
+    def serve_forever(self):
+        """Accept and run requests until shutdown or the idle timeout"""
+        from multiprocessing.pool import ThreadPool
+        stdout, stderr = sys.stdout, sys.stderr
+        sys.stdout, sys.stderr = _StreamProxy(stdout), _StreamProxy(stderr)
+
+        # Log messages are written to the stderr of the requesting client
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter("[%(levelname)s] %(message)s"))
+        handler.setLevel(self.loglevel)
+        logger = logging.getLogger()
+        logger.addHandler(handler)
+        logger.setLevel(logging.NOTSET)
+
+        from clitool2.session import Session
+        self._session = Session(self.target, logmngr=None, reject_log_options=True)
+        pool = ThreadPool(self.workers)
+        sock = self._bind()
+
+        try:
+            while not self._stopped.is_set() and not self._idle():
+                try:
+                    conn, _ = sock.accept()
+                except socket.timeout:
+                    continue
+
+                conn.settimeout(None)
+
+                with self._lock:
+                    self._active += 1
+
+                pool.apply_async(self._handle, (conn,))
+        finally:
+            sock.close()
+            os.remove(self.path)
+            pool.close()
+            pool.join()
+            logger.removeHandler(handler)
+            sys.stdout, sys.stderr = stdout, stderr
+
+    def shutdown(self):
+        """Stop accepting requests; active requests are completed"""
+        self._stopped.set()
+
+def serve(target, path, workers=4, idle_timeout=None, loglevel=logging.INFO):
+    """Serve the toolbox or tool over a Unix domain socket; see Server"""
+    Server(target, path, workers, idle_timeout, loglevel).serve_forever()
+
+def request(path, argv, cwd=None, env=None, stdout=None, stderr=None):
+    """Run a command on the server and return its status.
+
+    Args:
+        path: path of the Unix domain socket
+        argv: command line arguments
+        cwd: working directory; default is the current directory
+        env: environment variables; default is the current environment
+        stdout: file object for the command output; default is sys.stdout
+        stderr: file object for errors and log messages; default is sys.stderr
+
+    Returns:
+        int: status of the command
+    """
+    streams = {"stdout": stdout or sys.stdout, "stderr": stderr or sys.stderr}
+    message = {"argv": list(argv), "cwd": cwd or os.getcwd(),
+               "env": dict(os.environ) if env is None else env}
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+    try:
+        sock.connect(path)
+        sock.sendall((json.dumps(message) + "\n").encode("utf-8"))
+
+        for line in sock.makefile("rb"):
+            frame = json.loads(line.decode("utf-8"))
+
+            if "status" in frame:
+                return frame["status"]
+
+            streams[frame["stream"]].write(frame["data"])
+            streams[frame["stream"]].flush()
+    finally:
+        sock.close()
+
+    # The connection was closed without a status
+    return 255
+
+if __name__ == "__main__":
+    sys.exit(request(sys.argv[1], sys.argv[2:]))
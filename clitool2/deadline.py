@@ -0,0 +1,172 @@
+"""Time limits and cancellation for CLITool
+
+A function with a time limit runs on a worker thread or in a worker process.
+When the limit expires, the caller stops waiting and the Result reports
+TIMED OUT. A worker process is terminated; a worker thread cannot be stopped,
+so it is abandoned and ends with the process. The items it streams after the
+limit expires are discarded; see clitool2.streaming.StreamGate. Use process
+isolation for functions that must be stopped. Coroutine functions are
+cancelled on the event loop instead; see clitool2.aio.
+
+On the command line, SIGINT and SIGTERM cancel the call in progress and the
+Result reports CANCELLED. Called through the API, KeyboardInterrupt is raised
+to the caller.
+"""
+from __future__ import absolute_import, division, print_function
+from contextlib import contextmanager
+import signal
+import sys
+import threading
+
+__version__ = "1.1"
+
+# Exit status of a call that exceeded its time limit, as for timeout(1)
+TIMED_OUT = 124
+
+# Exit status of a call cancelled by SIGINT; SIGTERM uses 128 + 15
+CANCELLED = 128 + signal.SIGINT
+
+ISOLATIONS = ("thread", "process")
+
+class TimedOut(Exception):
+    """The function did not finish within the time limit"""
+
+class Cancelled(BaseException):
+    """The call was cancelled by a signal.
+
+    Like KeyboardInterrupt, it is not caught by "except Exception".
+
+    Attributes:
+        status: exit status; 128 plus the signal number
+    """
+    def __init__(self, message="cancelled", status=CANCELLED):
+        BaseException.__init__(self, message)
+        self.status = status
+
+def cancel_status(error):
+    """Return the exit status for a cancellation exception or None"""
+    if isinstance(error, Cancelled):
+        return error.status
+    elif isinstance(error, KeyboardInterrupt):
+        return CANCELLED
+
+    return None
+
+def _raise_cancelled(signum, frame):  # pylint: disable=unused-argument
+    """Signal handler that raises Cancelled"""
+    raise Cancelled("cancelled by signal %s" % signum, 128 + signum)
+
+@contextmanager
+def cancel_on_signals():
+    """Raise Cancelled in the main thread when SIGINT or SIGTERM is received.
+
+    Outside the main thread, signal handlers cannot be installed and the
+    block runs unchanged.
+    """
+    previous = {}
+
+    try:
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            previous[signum] = signal.signal(signum, _raise_cancelled)
+    except (ValueError, AttributeError):
+        pass
+
+    try:
+        yield
+    finally:
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
+
+def _run_thread(func, args, kwargs, timeout):
+    """Call func on a daemon thread and wait up to timeout seconds"""
+    outcome = {}
+
+    def target():
+        try:
+            outcome["value"] = func(*args, **kwargs)
+        except BaseException:  # pylint: disable=broad-except
+            outcome["error"] = sys.exc_info()[1]
+
+    thread = threading.Thread(target=target, name="clitool2-call")
+    thread.daemon = True
+    thread.start()
+    thread.join(timeout)
+
+    if thread.is_alive():
+        raise TimedOut("timed out after %s seconds" % timeout)
+    elif "error" in outcome:
+        raise outcome["error"]
+
+    return outcome["value"]
+
+def _process_main(conn, func, args, kwargs):
+    """Call func in the worker process and send (ok, value) to the parent"""
+    try:
+        output = func(*args, **kwargs)
+
+        if hasattr(output, "__await__"):
+            from clitool2.aio import run_coroutine
+            output = run_coroutine(output)
+
+        conn.send((True, output))
+    except Exception as error:  # pylint: disable=broad-except
+        try:
+            conn.send((False, error))
+        except Exception:  # pylint: disable=broad-except
+            conn.send((False, RuntimeError("%s: %s" % (type(error).__name__, error))))
+    finally:
+        conn.close()
+
+def _run_process(func, args, kwargs, timeout):
+    """Call func in a worker process; the process is terminated when the time
+    limit expires or the call is cancelled"""
+    import multiprocessing
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=_process_main, args=(sender, func, args, kwargs))
+    process.daemon = True
+    process.start()
+    sender.close()
+
+    try:
+        if not receiver.poll(timeout):
+            raise TimedOut("timed out after %s seconds" % timeout)
+
+        try:
+            success, value = receiver.recv()
+        except EOFError:
+            raise RuntimeError("worker process exited with status %s" % process.exitcode)
+    finally:
+        if process.is_alive():
+            process.terminate()
+
+        process.join()
+        receiver.close()
+
+    if not success:
+        raise value
+
+    return value
+
+def run_with_timeout(func, args=(), kwargs=None, timeout=None, isolation="thread"):
+    """Call func and return its result; raise TimedOut after timeout seconds.
+
+    Args:
+        func: function to call; must be picklable for process isolation.
+        args: positional arguments
+        kwargs: keyword arguments
+        timeout: time limit in seconds; None for no limit.
+        isolation: "thread" or "process"
+
+    Raises:
+        TimedOut: if the time limit expires
+    """
+    kwargs = kwargs or {}
+
+    if timeout is None:
+        return func(*args, **kwargs)
+    elif isolation == "thread":
+        return _run_thread(func, args, kwargs, timeout)
+    elif isolation == "process":
+        return _run_process(func, args, kwargs, timeout)
+
+    raise ValueError("Expected one of %s; got '%s'" % (", ".join(ISOLATIONS), isolation))
@@ -0,0 +1,235 @@
+"""Parse Google, NumPy, and reST (Sphinx) style docstrings in a single pass
+
+    Google                  NumPy                   reST
+    ------                  -----                   ----
+    Args:                   Parameters              :param int name: text
+        name (int): text    ----------              :type name: int
+                            name : int              :returns: text
+    Returns:                    text                :rtype: int
+        int: text                                   :raises ValueError: text
+                            Returns
+                            -------
+                            int
+                                text
+
+Sections may appear in any order. Each line is examined once, so parsing time
+is linear in the length of the docstring.
+"""
+from __future__ import absolute_import, division, print_function
+from collections import namedtuple, OrderedDict
+import inspect
+import os
+import re
+import weakref
+
+__version__ = "1.1"
+
+# DocInfo represents the results from parsing a docstring. args, returns,
+# yields, and raises are the text of the sections; params is a tuple of ArgInfo.
+DocInfo = namedtuple("DocInfo", ("summary", "description", "args", "returns", "yields",
+                                 "raises", "params"))
+DocInfo.__new__.__defaults__ = (None,)
+
+# ArgInfo describes one documented parameter; type is None if not documented
+ArgInfo = namedtuple("ArgInfo", ("name", "type", "description"))
+
+# Section headings mapped to DocInfo fields; None for sections that are skipped
+_SECTIONS = {
+    "args": "args", "arguments": "args", "parameters": "args", "params": "args",
+    "keyword args": "args", "keyword arguments": "args", "other parameters": "args",
+    "returns": "returns", "return": "returns", "yields": "yields", "yield": "yields",
+    "raises": "raises", "raise": "raises", "exceptions": "raises", "except": "raises",
+    "attributes": None, "example": None, "examples": None, "methods": None, "note": None,
+    "notes": None, "references": None, "see also": None, "todo": None, "warning": None,
+    "warnings": None, "warns": None}
+
+_GOOGLE_ARG = re.compile(r"^\*{0,2}(\w+)\s*(?:\(([^)]*)\))?\s*:(.*)$")
+_FIELD = re.compile(r"^:(\w+)\s*([^:]*):(.*)$")
+_FIELD_KINDS = {
+    "param": "param", "parameter": "param", "arg": "param", "argument": "param",
+    "key": "param", "keyword": "param", "type": "type", "returns": "returns",
+    "return": "returns", "rtype": "rtype", "raises": "raises", "raise": "raises",
+    "except": "raises", "exception": "raises", "yields": "yields", "yield": "yields",
+    "ytype": "ytype"}
+
+# Parsed docstrings by function; see get_docinfo
+_memo = weakref.WeakKeyDictionary()  # pylint: disable=invalid-name
+
+class _Param(object):
+    """Mutable parameter entry used while parsing"""
+    __slots__ = ("type", "lines")
+
+    def __init__(self, type_=None, text=None):
+        self.type = type_
+        self.lines = [text] if text else []
+
+def _is_underline(line):
+    """Return True if line is a NumPy section underline"""
+    return len(line) >= 3 and not line.strip("-")
+
+def _join(lines):
+    """Join stripped lines; None if there is no text"""
+    return os.linesep.join(lines).strip() or None
+
+def _margin(lines):
+    """Return the indentation of the first non-blank line after the first line"""
+    for line in lines[1:]:
+        body = line.lstrip()
+
+        if body:
+            return len(line) - len(body)
+
+    return 0
+
+def _add_field(match, params, buffers, fields):
+    """Add the reST field and return the list that receives its continuation
+    lines, or None"""
+    kind = _FIELD_KINDS[match.group(1)]
+    words, value = match.group(2).split(), match.group(3).strip()
+
+    if kind == "param" and words:
+        param = params.setdefault(words[-1], _Param())
+        param.type = " ".join(words[:-1]) or param.type
+
+        if value:
+            param.lines.append(value)
+
+        return param.lines
+    elif kind == "type" and words:
+        params.setdefault(words[-1], _Param()).type = value
+    elif kind in ("rtype", "ytype"):
+        fields[kind] = value
+    elif kind == "raises":
+        buffers["raises"].append("%s: %s" % (" ".join(words), value) if words else value)
+        return buffers["raises"]
+    elif kind in buffers:
+        buffers[kind].append(value)
+        return buffers[kind]
+
+    return None
+
+def parse_docstr(text):
+    """Parse Google, NumPy, or reST style docstring and return DocInfo object.
+
+    The summary is the first line if it is followed by a blank line. The
+    description is the text before the first section. Section headings and
+    reST fields start at the margin, which is the indentation of the first
+    non-blank line after the first line.
+
+    Args:
+        text: docstring; may be None
+
+    Returns:
+        namedtuple: DocInfo(summary, description, args, returns, yields, raises,
+            params)
+    """
+    lines = (text or "").strip().splitlines()
+    count, margin = len(lines), _margin(lines)
+    buffers = {"description": [], "args": [], "returns": [], "yields": [], "raises": []}
+    params, fields, current = OrderedDict(), {}, []
+    section, style, args_style, target, base = "description", None, None, None, None
+    summary, index = None, 0
+
+    if lines and (count == 1 or not lines[1].strip()) \
+            and lines[0].strip().lower().rstrip(":") not in _SECTIONS:
+        summary, index = lines[0].strip() or None, 1
+
+    while index < count:
+        line = lines[index]
+        body = line.lstrip()
+        index += 1
+
+        if not body:
+            if section in buffers:
+                buffers[section].append("")
+            continue
+
+        indent = len(line) - len(body)
+        stripped = body.rstrip()
+
+        if indent <= margin:
+            # Section headings and reST fields start at the margin
+            lowered = stripped.lower()
+
+            if stripped[-1] == ":" and lowered[:-1] in _SECTIONS:
+                section, style, target, base = _SECTIONS[lowered[:-1]], "google", None, None
+                continue
+            elif lowered in _SECTIONS and index < count and _is_underline(lines[index].strip()):
+                section, style, target, base = _SECTIONS[lowered], "numpy", None, None
+                index += 1
+                continue
+            elif stripped[0] == ":":
+                match = _FIELD.match(stripped)
+
+                if match and match.group(1) in _FIELD_KINDS:
+                    section, style = "fields", "rest"
+                    target = _add_field(match, params, buffers, fields)
+                    continue
+
+        if section == "args":
+            args_style = style
+            buffers["args"].append(stripped)
+            base = indent if base is None else base
+
+            if indent > base:
+                # Continuation of the current parameters
+                for param in current:
+                    param.lines.append(stripped)
+            elif style == "numpy":
+                names, _, type_ = stripped.partition(":")
+                current = [_Param(type_.strip() or None) for _ in names.split(",")]
+
+                for name, param in zip(names.split(","), current):
+                    params[name.strip().lstrip("*")] = param
+            else:
+                match = _GOOGLE_ARG.match(stripped)
+
+                if match:
+                    current = [_Param(match.group(2), match.group(3).strip())]
+                    params[match.group(1)] = current[0]
+                else:
+                    for param in current:
+                        param.lines.append(stripped)
+        elif section == "fields":
+            if target is not None:
+                target.append(stripped)
+        elif section is not None:
+            buffers[section].append(stripped)
+
+    params = tuple(ArgInfo(name, param.type, " ".join(param.lines))
+                   for name, param in params.items())
+
+    # Google style keeps the text of the Args section; other styles are
+    # rendered as "name: description" lines.
+    args = _join(buffers["args"]) if args_style == "google" else \
+        _join(["%s: %s" % (item.name, item.description) for item in params])
+
+    for kind, key in (("rtype", "returns"), ("ytype", "yields")):
+        if kind in fields:
+            value = buffers[key][0] if buffers[key] else ""
+            buffers[key][:1] = ["%s: %s" % (fields[kind], value) if value else fields[kind]]
+
+    return DocInfo(summary, _join(buffers["description"]), args, _join(buffers["returns"]),
+                   _join(buffers["yields"]), _join(buffers["raises"]), params)
+
+def get_docinfo(func):
+    """Return the DocInfo for the docstring of func.
+
+    The result is memoized per function object and reused until the
+    docstring of the function is replaced.
+    """
+    key = getattr(func, "__func__", func)
+    doc = getattr(func, "__doc__", None)
+
+    try:
+        cached = _memo.get(key)
+    except TypeError:
+        # Objects that cannot be weakly referenced or hashed are not memoized
+        return parse_docstr(inspect.getdoc(func))
+
+    if cached is not None and cached[0] is doc:
+        return cached[1]
+
+    info = parse_docstr(inspect.getdoc(func))
+    _memo[key] = (doc, info)
+    return info
@@ -0,0 +1,121 @@
+"""Compact error records for the Result of CLITool
+
+An ErrorInfo keeps the exception type, the exception, the name, the message,
+the formatted traceback, and the chain of causes. The traceback objects are
+released when the record is created, so failed results do not keep the frames
+and their local variables alive.
+
+For compatibility with exc_info tuples, error[0] is the exception type,
+error[1] is the exception, and error[2] is the formatted traceback.
+"""
+from __future__ import absolute_import, division, print_function
+import sys
+from traceback import format_exception
+
+__version__ = "1.1"
+
+class RemoteError(Exception):
+    """Replaces an exception that cannot be pickled"""
+
+def _message(exc_value):
+    """Return str(exc_value); exceptions that fail to convert return their repr"""
+    try:
+        return str(exc_value)
+    except Exception:  # pylint: disable=broad-except
+        return repr(exc_value)
+
+def _cause(exc_value):
+    """Return the exception that caused exc_value or None (Python 3)"""
+    cause = getattr(exc_value, "__cause__", None)
+
+    if cause is None and not getattr(exc_value, "__suppress_context__", False):
+        cause = getattr(exc_value, "__context__", None)
+
+    return cause
+
+def _release(exc_value):
+    """Drop the traceback of the exception, which references the frames"""
+    try:
+        exc_value.__traceback__ = None
+    except (AttributeError, TypeError):
+        pass
+
+def _rebuild(exc_type, exc_value, name, message, traceback, chain):
+    """Create ErrorInfo from pickled fields"""
+    return ErrorInfo(exc_type, exc_value, name, message, traceback, chain)
+
+class ErrorInfo(object):
+    """Error record that can be pickled and converted to JSON.
+
+    Attributes:
+        exc_type: exception type; RemoteError after pickling if the type or
+            exception cannot be pickled.
+        exc_value: exception without its traceback
+        name: name of the exception type
+        message: exception message
+        traceback: formatted traceback, including the chained exceptions
+        chain: tuple of (name, message) for the causes, innermost last
+    """
+    __slots__ = ("exc_type", "exc_value", "name", "message", "traceback", "chain")
+
+    def __init__(self, exc_type, exc_value, name=None, message=None, traceback="", chain=()):
+        self.exc_type = exc_type
+        self.exc_value = exc_value
+        self.name = name or exc_type.__name__
+        self.message = _message(exc_value) if message is None else message
+        self.traceback = traceback
+        self.chain = tuple(tuple(item) for item in chain)
+
+    @classmethod
+    def from_exc_info(cls, exc_info=None):
+        """Return ErrorInfo for the exc_info tuple; default is the exception
+        being handled"""
+        exc_type, exc_value, exc_tb = exc_info or sys.exc_info()
+        text = "".join(format_exception(exc_type, exc_value, exc_tb))
+        chain, seen = [], set([id(exc_value)])
+        cause = _cause(exc_value)
+
+        while cause is not None and id(cause) not in seen:
+            seen.add(id(cause))
+            chain.append((type(cause).__name__, _message(cause)))
+            _release(cause)
+            cause = _cause(cause)
+
+        _release(exc_value)
+        return cls(exc_type, exc_value, exc_type.__name__, _message(exc_value), text, chain)
+
+    def _fields(self):
+        return (self.exc_type, self.exc_value, self.traceback)
+
+    def __getitem__(self, index):
+        return self._fields()[index]
+
+    def __iter__(self):
+        return iter(self._fields())
+
+    def __len__(self):
+        return 3
+
+    def __repr__(self):
+        return "ErrorInfo(%s: %s)" % (self.name, self.message)
+
+    def __str__(self):
+        return "%s: %s" % (self.name, self.message)
+
+    def __reduce__(self):
+        import pickle
+        exc_type, exc_value = self.exc_type, self.exc_value
+
+        try:
+            # Some exceptions are pickled but cannot be unpickled
+            pickle.loads(pickle.dumps((exc_type, exc_value), pickle.HIGHEST_PROTOCOL))
+        except Exception:  # pylint: disable=broad-except
+            exc_type, exc_value = RemoteError, RemoteError(str(self))
+
+        return (_rebuild, (exc_type, exc_value, self.name, self.message, self.traceback,
+                           self.chain))
+
+    def to_dict(self):
+        """Return dict that can be serialized as JSON"""
+        return {"type": self.name, "message": self.message, "traceback": self.traceback,
+                "chain": [{"type": name, "message": message} for name, message in self.chain]}
@@ -0,0 +1,110 @@
+"""Split the var-positional arguments of a call across worker processes
+
+In map mode, CLITool calls the function once per chunk of the values of its
+var-positional parameter. Each call receives the same positional and keyword
+arguments, and the outputs are merged by a reducer:
+
+    def count_lines(encoding, *paths):
+        ...
+
+    tool = CLITool(count_lines, map_jobs=0, reducer=sum)
+    tool("utf-8", *paths)   # count_lines("utf-8", *chunk) for each chunk
+
+The function and its arguments must be picklable. Iterators returned by the
+function are collected into lists in the worker processes.
+"""
+from __future__ import absolute_import, division, print_function
+import multiprocessing
+import numbers
+
+__version__ = "1.1"
+
+def _chunk_size(count, jobs, chunk_size=None):
+    """Return the chunk size for count values; by default, each worker
+    receives about four chunks, so uneven chunks are balanced"""
+    if chunk_size:
+        return chunk_size
+
+    return max(1, -(-count // (jobs * 4)))
+
+def split(values, size):
+    """Return list of tuples with size values each; the last may be shorter"""
+    values = tuple(values)
+    return [values[index:index + size] for index in range(0, len(values), size)]
+
+def default_reducer(outputs):
+    """Merge the outputs of the chunks.
+
+    None outputs are ignored. Lists and tuples are concatenated, numbers are
+    added, and dicts are merged in chunk order; otherwise, the list of outputs
+    is returned.
+    """
+    outputs = [item for item in outputs if item is not None]
+
+    if not outputs:
+        return None
+    elif all(isinstance(item, (list, tuple)) for item in outputs):
+        return [value for item in outputs for value in item]
+    elif all(isinstance(item, numbers.Number) and not isinstance(item, bool)
+             for item in outputs):
+        return sum(outputs)
+    elif all(isinstance(item, dict) for item in outputs):
+        merged = {}
+
+        for item in outputs:
+            merged.update(item)
+
+        return merged
+
+    return outputs
+
+def _run_chunk(task):
+    """Call the function for one chunk and return a picklable output"""
+    func, fixed, chunk, kwargs = task
+    output = func(*(tuple(fixed) + tuple(chunk)), **kwargs)
+
+    if hasattr(output, "__await__"):
+        from clitool2.aio import run_coroutine
+        output = run_coroutine(output)
+    elif hasattr(output, "__next__") or hasattr(output, "next"):
+        output = list(output)
+
+    return output
+
+def map_call(func, fixed, values, kwargs=None, jobs=0, chunk_size=None, reducer=None):
+    """Call func for each chunk of values and return the reduced output.
+
+    Args:
+        func: function with a var-positional parameter
+        fixed: positional arguments passed to every call
+        values: values of the var-positional parameter
+        kwargs: keyword arguments passed to every call
+        jobs: number of worker processes; 0 for the number of CPUs. With 1,
+            the chunks are called in this process.
+        chunk_size: number of values per call; None to divide the values
+            evenly among the workers.
+        reducer: callable that receives the list of outputs in chunk order;
+            default is default_reducer.
+
+    Returns:
+        object: reduced output
+    """
+    jobs = jobs or multiprocessing.cpu_count()
+    values = tuple(values)
+    chunks = split(values, _chunk_size(len(values), jobs, chunk_size)) or [()]
+    tasks = [(func, fixed, chunk, kwargs or {}) for chunk in chunks]
+    reducer = reducer or default_reducer
+
+    if jobs == 1 or len(tasks) == 1:
+        return reducer([_run_chunk(task) for task in tasks])
+
+    pool = multiprocessing.Pool(min(jobs, len(tasks)))
+
+    try:
+        outputs = pool.map(_run_chunk, tasks, chunksize=1)
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+    return reducer(outputs)
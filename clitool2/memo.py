@@ -0,0 +1,296 @@
+"""On-disk cache of function results for CLITool
+
+Usage:
+
+    tool = CLITool(report, result_cache=ResultCache(".results", ttl=3600), memoize=True)
+
+The key of an entry is a hash of the function name, a hash of its code (or
+the version supplied to ResultCache), and the bound, converted arguments.
+Only the results of successful calls are stored; iterators returned by
+generator functions are not cached. Calls are not cached if an argument has
+no value-based key, such as mmap, memoryview, file, and ArgFile objects.
+pathlib paths are keyed by their absolute path, size, and modification time,
+so a changed input file is a miss; other file names are keyed as text.
+
+Each entry is a file written atomically with two pickles, the creation time
+and the output, so processes that share the directory never read a partial
+entry. The creation time decides expiry. Reading an entry updates its
+modification time, which orders the entries for least recently used eviction.
+
+Pickles can run code when they are loaded, so the directory is created with
+mode 0700 and entries owned by other users are ignored.
+"""
+from __future__ import absolute_import, division, print_function
+import hashlib
+import json
+import marshal
+import os
+import pickle
+import sys
+import time
+from clitool2.cache import atomic_write
+
+__version__ = "1.1"
+
+# Incremented when the format of the cache entries changes.
+MEMO_FORMAT = 2
+
+# Modules whose values have a repr that identifies the value
+_REPR_MODULES = ("datetime", "decimal", "fractions", "uuid")
+
+_SUFFIX = ".pkl"
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # pylint: disable=invalid-name
+
+def code_hash(func):
+    """Return a hash of the code of func or None if it has no code object"""
+    target = getattr(func, "__func__", func)
+    code = getattr(target, "__code__", None)
+
+    if code is None:
+        code = getattr(getattr(target, "__call__", None), "__code__", None)
+
+    if code is None:
+        return None
+
+    return hashlib.sha1(marshal.dumps(code)).hexdigest()
+
+def _key_value(value):
+    """Return a JSON value that identifies the argument for the cache key.
+
+    Raises:
+        TypeError: if the argument has no value-based key
+    """
+    pathlib = sys.modules.get("pathlib")
+    enum = sys.modules.get("enum")
+
+    if pathlib is not None and isinstance(value, pathlib.PurePath):
+        path = os.path.abspath(str(value))
+
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return ["path", path]
+
+        return ["path", path, stat.st_size, stat.st_mtime]
+    elif isinstance(value, (bytes, bytearray, complex)) \
+            or type(value).__module__ in _REPR_MODULES \
+            or (enum is not None and isinstance(value, enum.Enum)):
+        return [type(value).__name__, repr(value)]
+
+    raise TypeError("%s arguments are not cached" % type(value).__name__)
+
+def _owned(stat):
+    """Return True if the file is owned by the current user; True where
+    ownership is not available"""
+    getuid = getattr(os, "getuid", None)
+    return getuid is None or stat.st_uid == getuid()
+
+class ResultCache(object):
+    """On-disk cache of function results with expiry and a size bound.
+
+    Attributes:
+        directory: cache directory; created on first store.
+        ttl: If set, seconds after which an entry expires.
+        max_entries: If set, maximum number of entries.
+        max_bytes: If set, maximum total size of the entries in bytes.
+        version: If set, identifies the version of the cached functions
+            instead of a hash of their code.
+        hits: number of lookups that found an entry in this process
+        misses: number of lookups that did not find an entry in this process
+    """
+    def __init__(self, directory, ttl=None, max_entries=None, max_bytes=None, version=None):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, func, args, kwargs):
+        """Return the cache key for the call or None if it cannot be cached.
+
+        Arguments are serialized as JSON. Values that JSON does not support
+        must have a value-based key; otherwise, the call is not cached.
+        """
+        version = self.version or code_hash(func)
+
+        if version is None:
+            return None
+
+        name = "%s.%s" % (getattr(func, "__module__", None),
+                          getattr(func, "__qualname__", None) or getattr(func, "__name__", None)
+                          or type(func).__name__)
+
+        try:
+            text = json.dumps([MEMO_FORMAT, name, version, list(args), kwargs],
+                              sort_keys=True, default=_key_value)
+        except (TypeError, ValueError):
+            return None
+
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        """Return the path of the entry"""
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    def _expired(self, created, now=None):
+        """Return True if an entry with the creation time has expired"""
+        if not isinstance(created, float):
+            return True
+
+        return self.ttl is not None and (now or time.time()) - created > self.ttl
+
+    def load(self, key):
+        """Return (True, output) for a current entry; otherwise, (False, None)"""
+        path = self._path(key)
+        expired = False
+
+        try:
+            with open(path, "rb") as fobj:
+                # Entries written by other users are not trusted
+                if not _owned(os.fstat(fobj.fileno())):
+                    raise ValueError("entry is owned by another user")
+
+                expired = self._expired(pickle.load(fobj))
+
+                if not expired:
+                    output = pickle.load(fobj)
+        except Exception:  # pylint: disable=broad-except
+            # Missing, partially evicted, or unreadable entries are misses
+            self.misses += 1
+            return False, None
+
+        if expired:
+            self._remove(path)
+            self.misses += 1
+            return False, None
+
+        try:
+            # Mark the entry as recently used
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        self.hits += 1
+        return True, output
+
+    def store(self, key, output):
+        """Store the output; errors are ignored since the cache is optional.
+
+        Returns:
+            bool: True if the output was stored
+        """
+        try:
+            data = pickle.dumps(time.time(), pickle.HIGHEST_PROTOCOL) + \
+                pickle.dumps(output, pickle.HIGHEST_PROTOCOL)
+        except Exception:  # pylint: disable=broad-except
+            return False
+
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory, 0o700)
+
+            atomic_write(self._path(key), data)
+        except (IOError, OSError):
+            return False
+
+        if self.max_entries is not None or self.max_bytes is not None:
+            self.evict()
+
+        return True
+
+    def clear(self):
+        """Remove all entries"""
+        for path, _ in self._entries():
+            self._remove(path)
+
+    def _entries(self):
+        """Return list of (path, stat) for the entries of the current user"""
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+
+        entries = []
+
+        for name in names:
+            if name.endswith(_SUFFIX):
+                path = os.path.join(self.directory, name)
+
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+
+                if _owned(stat):
+                    entries.append((path, stat))
+
+        return entries
+
+    def _created(self, path):
+        """Return the creation time of the entry or None if it cannot be read"""
+        try:
+            with open(path, "rb") as fobj:
+                return pickle.load(fobj)
+        except Exception:  # pylint: disable=broad-except
+            return None
+
+    @staticmethod
+    def _remove(path):
+        """Remove the entry; another process may have removed it"""
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def evict(self):
+        """Remove expired entries, then the least recently used entries until
+        the size bounds are met.
+
+        Processes that share the directory evict one at a time if fcntl is
+        available.
+        """
+        lock = None
+
+        try:
+            if fcntl is not None:
+                lock = open(os.path.join(self.directory, ".lock"), "a")
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+
+            now = time.time()
+            entries = sorted(self._entries(), key=lambda item: item[1].st_mtime)
+
+            if self.ttl is not None:
+                # Expiry uses the creation time, as load does; the
+                # modification time is the time of the last use.
+                current = []
+
+                for path, stat in entries:
+                    if self._expired(self._created(path), now):
+                        self._remove(path)
+                    else:
+                        current.append((path, stat))
+
+                entries = current
+
+            count = len(entries)
+            size = sum(item[1].st_size for item in entries)
+
+            for path, stat in entries:
+                if (self.max_entries is None or count <= self.max_entries) and \
+                        (self.max_bytes is None or size <= self.max_bytes):
+                    break
+
+                self._remove(path)
+                count -= 1
+                size -= stat.st_size
+        except (IOError, OSError):
+            pass
+        finally:
+            if lock is not None:
+                lock.close()
@@ -0,0 +1,216 @@
+"""Record run metrics for CLITool in Prometheus textfile or StatsD format
+
+Usage:
+
+    tool = CLITool(report, metrics=PrometheusTextfile("/var/lib/node_exporter/report.prom"))
+    tool = CLITool(report, metrics=StatsdClient("127.0.0.1", 8125))
+
+A metrics hook is called with the command name and the Result of each run.
+The metrics are the number of runs and failures, a histogram of the total
+duration, the sum of each phase timing, and the peak RSS.
+
+PrometheusTextfile keeps the totals in a JSON file next to the textfile.
+Updates hold an exclusive lock (where fcntl is available) and replace both
+files atomically, so processes can record runs concurrently and the
+textfile collector never reads a partial file.
+"""
+from __future__ import absolute_import, division, print_function
+import json
+import socket
+from clitool2.cache import atomic_write
+
+__version__ = "1.1"
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # pylint: disable=invalid-name
+
+# Upper bounds of the duration histogram in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0,
+           900.0, 3600.0)
+
+def _duration(result):
+    """Return the total duration of the run in seconds or None"""
+    timings = result.timings or {}
+    return timings.get("total", timings.get("call"))
+
+def _phases(result):
+    """Return dict of the phase timings in seconds"""
+    return dict((name, value) for name, value in (result.timings or {}).items()
+                if name not in ("total", "peak_rss") and isinstance(value, (int, float)))
+
+def _escape(value):
+    """Escape a Prometheus label value"""
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _format_value(value):
+    """Format a sample value"""
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class PrometheusTextfile(object):
+    """Metrics hook that writes a Prometheus textfile-collector file.
+
+    Attributes:
+        path: textfile; should end with ".prom".
+        prefix: prefix of the metric names
+        buckets: upper bounds of the duration histogram in seconds
+    """
+    def __init__(self, path, prefix="clitool", buckets=BUCKETS):
+        self.path = path
+        self.prefix = prefix
+        self.buckets = tuple(buckets)
+
+    def __call__(self, name, result):
+        lock = None
+
+        try:
+            if fcntl is not None:
+                lock = open(self.path + ".lock", "a")
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+
+            state = self._load()
+            self._update(state, name, result)
+            atomic_write(self.path + ".json", json.dumps(state, sort_keys=True).encode("utf-8"))
+            atomic_write(self.path, self.format(state).encode("utf-8"))
+        finally:
+            if lock is not None:
+                lock.close()
+
+    def _load(self):
+        """Return the totals recorded so far"""
+        try:
+            with open(self.path + ".json", "r") as fobj:
+                state = json.load(fobj)
+        except (IOError, OSError, ValueError):
+            return {}
+
+        # The histogram is reset when the buckets change
+        for item in state.values():
+            if len(item["buckets"]) != len(self.buckets):
+                item["buckets"] = [0] * len(self.buckets)
+
+        return state
+
+    def _update(self, state, name, result):
+        """Add the result to the totals of the command"""
+        item = state.setdefault(name, {"runs": 0, "failures": 0, "sum": 0.0, "count": 0,
+                                       "buckets": [0] * len(self.buckets), "phases": {},
+                                       "peak_rss": None})
+        item["runs"] += 1
+        item["failures"] += 1 if result.status else 0
+        duration = _duration(result)
+
+        if duration is not None:
+            item["sum"] += duration
+            item["count"] += 1
+
+            for index, bound in enumerate(self.buckets):
+                if duration <= bound:
+                    item["buckets"][index] += 1
+
+        for phase, value in _phases(result).items():
+            item["phases"][phase] = item["phases"].get(phase, 0.0) + value
+
+        if (result.timings or {}).get("peak_rss") is not None:
+            item["peak_rss"] = result.timings["peak_rss"]
+
+    def format(self, state):
+        """Return the totals in Prometheus text exposition format"""
+        prefix = self.prefix
+        lines = []
+
+        def add(metric, kind, text, samples):
+            lines.append("# HELP %s_%s %s" % (prefix, metric, text))
+            lines.append("# TYPE %s_%s %s" % (prefix, metric, kind))
+            lines.extend(samples)
+
+        names = sorted(state)
+        labels = dict((name, "command=\"%s\"" % _escape(name)) for name in names)
+        add("runs_total", "counter", "Number of runs.",
+            ["%s_runs_total{%s} %d" % (prefix, labels[name], state[name]["runs"])
+             for name in names])
+        add("failures_total", "counter", "Number of runs with a nonzero status.",
+            ["%s_failures_total{%s} %d" % (prefix, labels[name], state[name]["failures"])
+             for name in names])
+
+        samples = []
+
+        for name in names:
+            item = state[name]
+
+            for bound, count in zip(self.buckets, item["buckets"]):
+                samples.append("%s_duration_seconds_bucket{%s,le=\"%s\"} %d"
+                               % (prefix, labels[name], bound, count))
+
+            samples.append("%s_duration_seconds_bucket{%s,le=\"+Inf\"} %d"
+                           % (prefix, labels[name], item["count"]))
+            samples.append("%s_duration_seconds_sum{%s} %s"
+                           % (prefix, labels[name], _format_value(item["sum"])))
+            samples.append("%s_duration_seconds_count{%s} %d"
+                           % (prefix, labels[name], item["count"]))
+
+        add("duration_seconds", "histogram", "Total duration of the runs in seconds.", samples)
+        add("phase_seconds_total", "counter", "Sum of the duration of each phase in seconds.",
+            ["%s_phase_seconds_total{%s,phase=\"%s\"} %s"
+             % (prefix, labels[name], _escape(phase), _format_value(value))
+             for name in names for phase, value in sorted(state[name]["phases"].items())])
+        add("peak_rss_bytes", "gauge", "Peak resident set size of the last run in bytes.",
+            ["%s_peak_rss_bytes{%s} %d" % (prefix, labels[name], state[name]["peak_rss"])
+             for name in names if state[name]["peak_rss"] is not None])
+        return "\n".join(lines) + "\n"
+
+class StatsdClient(object):
+    """Metrics hook that sends StatsD lines over UDP.
+
+    Each run is sent as one datagram; delivery is not confirmed, and errors
+    are ignored so an unavailable endpoint does not affect the command.
+
+    Attributes:
+        host: StatsD host
+        port: StatsD port
+        prefix: prefix of the metric names
+    """
+    def __init__(self, host="127.0.0.1", port=8125, prefix="clitool"):
+        self.host = host
+        self.port = port
+        self.prefix = prefix
+        self._socket = None
+
+    def __getstate__(self):
+        # Sockets cannot be sent to worker processes
+        state = self.__dict__.copy()
+        state["_socket"] = None
+        return state
+
+    def format(self, name, result):
+        """Return the StatsD lines for the result"""
+        base = "%s.%s" % (self.prefix, name)
+        lines = ["%s.runs:1|c" % base]
+
+        if result.status:
+            lines.append("%s.failures:1|c" % base)
+
+        duration = _duration(result)
+
+        if duration is not None:
+            lines.append("%s.duration:%.3f|ms" % (base, duration * 1000))
+
+        for phase, value in sorted(_phases(result).items()):
+            lines.append("%s.phase.%s:%.3f|ms" % (base, phase, value * 1000))
+
+        if (result.timings or {}).get("peak_rss") is not None:
+            lines.append("%s.peak_rss:%d|g" % (base, result.timings["peak_rss"]))
+
+        return lines
+
+    def __call__(self, name, result):
+        data = "\n".join(self.format(name, result)).encode("utf-8")
+
+        try:
+            if self._socket is None:
+                self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+            self._socket.sendto(data, (self.host, self.port))
+        except (socket.error, OSError):
+            pass
@@ -0,0 +1,273 @@
+"""Run a script of toolbox commands in one process
+
+Each non-blank line of a script is one step:
+
+    extract: fetch --date 2020-01-01
+    clean: convert raw.csv clean.csv  after: extract
+    report: summarize clean.csv  after: clean
+    {"name": "notify", "command": ["mail", "after:"], "after": ["report"]}
+
+A step is an optional "name:" followed by a command line (shell syntax) and
+an optional "after:" clause that lists the steps it depends on. Steps without
+a name are named step1, step2, ... by their position. A JSON object can be
+used for a command line that includes the word "after:". Lines starting with
+"#" are ignored.
+
+Steps run on a Session, so the interpreter, imported modules, and logging
+configuration are shared. Steps whose dependencies have succeeded run
+concurrently on a bounded pool of threads.
+"""
+from __future__ import absolute_import, division, print_function
+from collections import deque, namedtuple, OrderedDict
+import json
+import logging
+from multiprocessing.pool import ThreadPool
+import shlex
+import sys
+from clitool2.clitool import Result
+from clitool2.deadline import cancel_status
+from clitool2.errors import ErrorInfo
+from clitool2.profiling import clock
+
+__version__ = "1.1"
+
+try:
+    import queue
+except ImportError:  # Python 2
+    import Queue as queue  # pylint: disable=import-error
+
+try:
+    _string_types = basestring  # pylint: disable=invalid-name
+except NameError:
+    _string_types = str
+
+FAILURE_POLICIES = ("stop", "continue")
+
+# Step describes one line of a script
+Step = namedtuple("Step", ("name", "argv", "after"))
+
+# StepResult describes the outcome of a step; status is None if the step was
+# skipped because the script stopped or a dependency failed.
+StepResult = namedtuple("StepResult", ("name", "status", "seconds", "result"))
+
+def parse_step(line, position):
+    """Parse one line of a script.
+
+    Args:
+        line: str
+        position: 1-based position of the step; used for the default name
+
+    Returns:
+        Step or None if the line is blank or a comment
+    """
+    line = line.strip()
+
+    if not line or line.startswith("#"):
+        return None
+    elif line.startswith("{"):
+        item = json.loads(line)
+        argv = item["command"]
+        after = item.get("after") or []
+
+        if isinstance(argv, _string_types):
+            argv = shlex.split(argv)
+
+        if isinstance(after, _string_types):
+            after = after.replace(",", " ").split()
+
+        return Step(item.get("name") or "step%d" % position, list(argv), tuple(after))
+
+    words = shlex.split(line)
+    name = "step%d" % position
+
+    if words and words[0].endswith(":") and len(words[0]) > 1 and words[0] != "after:":
+        name, words = words[0][:-1], words[1:]
+
+    after = ()
+
+    if "after:" in words:
+        index = words.index("after:")
+        after = tuple(" ".join(words[index + 1:]).replace(",", " ").split())
+        words = words[:index]
+
+    if not words:
+        raise ValueError("step '%s' has no command" % name)
+
+    return Step(name, words, after)
+
+def read_script(fobj):
+    """Return the list of steps in the file object.
+
+    Raises:
+        ValueError: if a step is invalid, a name is repeated, a dependency is
+            unknown, or the dependencies form a cycle.
+    """
+    steps = []
+
+    for line in fobj:
+        step = parse_step(line, len(steps) + 1)
+
+        if step is not None:
+            steps.append(step)
+
+    check_steps(steps)
+    return steps
+
+def check_steps(steps):
+    """Raise ValueError if the steps cannot be scheduled"""
+    names = set()
+
+    for step in steps:
+        if step.name in names:
+            raise ValueError("step name is already used; got '%s'" % step.name)
+
+        names.add(step.name)
+
+    for step in steps:
+        for name in step.after:
+            if name not in names:
+                raise ValueError("step '%s' runs after unknown step '%s'" % (step.name, name))
+
+    # Steps that remain after removing steps without pending dependencies
+    # are part of a cycle.
+    pending = dict((step.name, set(step.after)) for step in steps)
+
+    while True:
+        done = [name for name, after in pending.items() if not after]
+
+        if not done:
+            break
+
+        for name in done:
+            del pending[name]
+
+        for after in pending.values():
+            after.difference_update(done)
+
+    if pending:
+        raise ValueError("steps have circular dependencies: %s" % ", ".join(sorted(pending)))
+
+def _run_step(session, step):
+    """Run the step on the session and return StepResult.
+
+    Every exception is returned as a failed step, so the scheduler always
+    receives the result; run_steps raises interrupts again.
+    """
+    start = clock()
+
+    try:
+        result = session.run(step.argv)
+    except SystemExit as error:
+        code = error.code if isinstance(error.code, int) else 1
+        result = Result(code, None, ErrorInfo.from_exc_info())
+    except BaseException as error:  # pylint: disable=broad-except
+        result = Result(cancel_status(error) or 1, None, ErrorInfo.from_exc_info())
+
+    return StepResult(step.name, result.status, clock() - start, result)
+
+def _log_summary(results):
+    """Emit the per-step timing summary"""
+    logging.info("Step summary:")
+
+    for item in results:
+        if item.status is None:
+            state, elapsed = "SKIPPED", ""
+        else:
+            state = "SUCCEEDED" if item.status == 0 else "FAILED (%s)" % item.status
+            minutes, seconds = divmod(item.seconds, 60)
+            elapsed = "%d:%02d:%05.2f" % (minutes // 60, minutes % 60, seconds)
+
+        logging.info("  %-20s %-12s %s", item.name, state, elapsed)
+
+def run_steps(session, steps, jobs=1, on_failure="stop"):
+    """Run the steps in dependency order and return Result object.
+
+    Steps whose dependencies have succeeded are started in script order,
+    at most jobs at a time. Steps that depend on a failed step are skipped.
+
+    Args:
+        session: Session that runs the command lines
+        steps: list of Step; see read_script.
+        jobs: maximum number of concurrent steps
+        on_failure: "stop" to start no more steps after a failure, or
+            "continue" to run every step whose dependencies succeeded.
+
+    Returns:
+        Result: status is 0 if every step succeeded, otherwise 1; output is
+            the list of StepResult in script order; error is the error of the
+            first failed step; timings has the total duration.
+    """
+    if on_failure not in FAILURE_POLICIES:
+        raise ValueError("Expected one of %s; got '%s'" % (", ".join(FAILURE_POLICIES),
+                                                            on_failure))
+
+    check_steps(steps)
+    begin = clock()
+    waiting = OrderedDict((step.name, set(step.after)) for step in steps)
+    dependents = dict((step.name, []) for step in steps)
+    by_name = dict((step.name, step) for step in steps)
+
+    for step in steps:
+        for name in step.after:
+            dependents[name].append(step.name)
+
+    ready = deque(name for name, after in waiting.items() if not after)
+    results, failures, interrupt = {}, [], None
+    done = queue.Queue()
+    pool = ThreadPool(max(jobs, 1))
+    running = 0
+
+    # An error outside _run_step is put on the queue instead of a StepResult;
+    # error_callback is available since Python 3.2.
+    options = {"error_callback": done.put} if sys.version_info >= (3, 2) else {}
+
+    try:
+        while True:
+            while ready and running < max(jobs, 1) and not (failures and on_failure == "stop") \
+                    and interrupt is None:
+                pool.apply_async(_run_step, (session, by_name[ready.popleft()]),
+                                 callback=done.put, **options)
+                running += 1
+
+            if not running:
+                break
+
+            item = done.get()
+            running -= 1
+
+            if isinstance(item, BaseException):
+                raise item
+
+            results[item.name] = item
+            error = item.result.error
+
+            # Start no more steps after SIGINT or SIGTERM; raised after shutdown
+            if error is not None and interrupt is None and cancel_status(error[1]) is not None:
+                interrupt = error[1]
+
+            if item.status != 0:
+                failures.append(item)
+                continue
+
+            for name in dependents[item.name]:
+                waiting[name].discard(item.name)
+
+                if not waiting[name]:
+                    ready.append(name)
+    finally:
+        pool.close()
+        pool.join()
+
+    output = [results.get(step.name) or StepResult(step.name, None, 0.0, None)
+              for step in steps]
+    _log_summary(output)
+
+    if interrupt is not None:
+        raise interrupt
+
+    error = failures[0].result.error if failures else None
+    return Result(1 if failures else 0, output, error, {"total": clock() - begin})
+
+def run_script(session, fobj, jobs=1, on_failure="stop"):
+    """Read the script from the file object and run its steps; see run_steps"""
+    return run_steps(session, read_script(fobj), jobs, on_failure)
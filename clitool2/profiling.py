@@ -0,0 +1,66 @@
+"""Timing, resource usage, and profiling helpers for CLITool"""
+from __future__ import absolute_import, division, print_function
+from contextlib import contextmanager
+import logging
+import sys
+import time
+
+__version__ = "1.1"
+
+# Monotonic high-resolution clock; time.perf_counter is available since Python 3.3
+clock = getattr(time, "perf_counter", time.time)  # pylint: disable=invalid-name
+
+# CPU time of the process; time.process_time is available since Python 3.3
+cpu_time = getattr(time, "process_time", None) or time.clock  # pylint: disable=invalid-name,no-member
+
+def peak_rss():
+    """Return the peak resident set size of the process in bytes or None if
+    it is not available on this platform"""
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # ru_maxrss is in bytes on macOS and in kilobytes on other platforms
+    return usage if sys.platform == "darwin" else usage * 1024
+
+@contextmanager
+def profiled(profile=None, memprofile=None):
+    """Profile the block with cProfile and/or tracemalloc.
+
+    Args:
+        profile: If set, file name for the cProfile statistics; read them with
+            pstats.Stats(profile).
+        memprofile: If set, file name for the tracemalloc snapshot taken at
+            the end of the block; read it with tracemalloc.Snapshot.load.
+    """
+    profiler = None
+
+    if profile:
+        import cProfile
+        profiler = cProfile.Profile()
+
+    if memprofile:
+        import tracemalloc
+        tracemalloc.start()
+
+    if profiler:
+        profiler.enable()
+
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(profile)
+            logging.debug("Profile statistics written to %s", profile)
+
+        if memprofile:
+            snapshot = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            snapshot.dump(memprofile)
+            logging.debug("Memory snapshot written to %s (peak traced memory: %s bytes)",
+                          memprofile, peak)
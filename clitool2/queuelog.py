@@ -0,0 +1,239 @@
+"""Non-blocking logging manager for CLITool; requires Python 3.2 or later
+
+config_queue_logging is an alternative to config_logging. Log records are put
+on a bounded queue and written to the console and log files by a background
+thread, so logging calls do not wait for console or disk I/O:
+
+    tool = CLITool(func, logmngr=config_queue_logging)
+
+The listener writes the records in batches and flushes each handler once per
+batch. CLITool calls logging.shutdown when the function returns, which writes
+the queued records and stops the listener.
+
+A forked child process, such as a batch worker, receives a new queue and
+listener that write to the inherited handlers; see QueueLogHandler.after_fork.
+"""
+from __future__ import absolute_import, division, print_function
+import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import os
+import queue
+import weakref
+
+__version__ = "1.1"
+
+OVERFLOW_POLICIES = ("block", "drop", "drop-oldest")
+
+# Maximum number of records written between flushes
+BATCH_SIZE = 512
+
+# Running handlers; their listeners are restarted in forked child processes
+_handlers = weakref.WeakSet()  # pylint: disable=invalid-name
+
+def _check_overflow(overflow):
+    """Raise ValueError if overflow is not a supported policy"""
+    if overflow not in OVERFLOW_POLICIES:
+        raise ValueError("Expected one of %s; got '%s'"
+                         % (", ".join(OVERFLOW_POLICIES), overflow))
+
+class _DeferredFlush(object):
+    """Handler mixin that flushes once per batch instead of once per record"""
+    _pending = False
+
+    def flush(self):
+        # StreamHandler.emit calls flush after each record
+        self._pending = True
+
+    def commit(self):
+        """Flush the records written since the last commit"""
+        if self._pending:
+            self._pending = False
+            super(_DeferredFlush, self).flush()
+
+    def close(self):
+        self.commit()
+        super(_DeferredFlush, self).close()
+
+class _BatchedStreamHandler(_DeferredFlush, logging.StreamHandler):
+    """StreamHandler that flushes once per batch"""
+
+class _BatchedFileHandler(_DeferredFlush, RotatingFileHandler):
+    """RotatingFileHandler that flushes once per batch; rotation is disabled
+    if maxBytes is 0"""
+
+class _BatchListener(QueueListener):
+    """QueueListener that handles the queued records in batches"""
+    def __init__(self, queue_, handlers, batch_size=BATCH_SIZE):
+        QueueListener.__init__(self, queue_, *handlers, respect_handler_level=True)
+        self.batch_size = batch_size
+
+    def enqueue_sentinel(self):
+        # Wait for space instead of failing when the queue is full
+        self.queue.put(self._sentinel)
+
+    def _monitor(self):
+        stop = False
+
+        while not stop:
+            batch = [self.queue.get()]
+
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            for record in batch:
+                if record is self._sentinel:
+                    stop = True
+                else:
+                    self.handle(record)
+
+            for handler in self.handlers:
+                if isinstance(handler, _DeferredFlush):
+                    handler.commit()
+
+            for _ in batch:
+                self.queue.task_done()
+
+class QueueLogHandler(QueueHandler):
+    """Handler that passes records to other handlers on a background thread.
+
+    Closing the handler writes the queued records, stops the listener, closes
+    the target handlers, and removes the handler from the root logger.
+
+    Attributes:
+        handlers: target handlers
+        overflow: action when the queue is full: "block" waits for space,
+            "drop" discards the new record, and "drop-oldest" discards the
+            oldest queued record.
+        dropped: number of discarded records
+    """
+    def __init__(self, handlers, maxsize=10000, overflow="block", batch_size=BATCH_SIZE):
+        _check_overflow(overflow)
+        QueueHandler.__init__(self, queue.Queue(maxsize))
+        self.handlers = list(handlers)
+        self.overflow = overflow
+        self.dropped = 0
+        self._batch_size = batch_size
+        self._listener = _BatchListener(self.queue, self.handlers, batch_size)
+        self._listener.start()
+        self._running = True
+        self._pid = os.getpid()
+        _handlers.add(self)
+
+    def after_fork(self):
+        """Replace the queue and listener in a forked child process.
+
+        The listener thread of the parent does not exist in the child, so
+        records put on the inherited queue would never be written. The queued
+        records of the parent are discarded; the parent writes them.
+        """
+        if not self._running or self._pid == os.getpid():
+            return
+
+        self._pid = os.getpid()
+        self.queue = queue.Queue(self.queue.maxsize)
+        self.dropped = 0
+        self._listener = _BatchListener(self.queue, self.handlers, self._batch_size)
+        self._listener.start()
+
+    def enqueue(self, record):
+        if self.overflow == "block":
+            self.queue.put(record)
+            return
+
+        while True:
+            try:
+                self.queue.put_nowait(record)
+                return
+            except queue.Full:
+                if self.overflow == "drop":
+                    self.dropped += 1
+                    return
+
+            try:
+                self.queue.get_nowait()
+                self.queue.task_done()
+                self.dropped += 1
+            except queue.Empty:
+                pass
+
+    def flush(self):
+        """Wait until the queued records are written"""
+        if self._running and self._pid == os.getpid():
+            self.queue.join()
+
+    def close(self):
+        logging.getLogger().removeHandler(self)
+        _handlers.discard(self)
+
+        if self._running:
+            self.after_fork()
+            self._running = False
+            self._listener.stop()
+
+            if self.dropped:
+                record = logging.makeLogRecord({
+                    "name": __name__, "levelno": logging.WARNING, "levelname": "WARNING",
+                    "msg": "%s log records were dropped", "args": (self.dropped,)})
+                self._listener.handle(record)
+
+            for handler in self.handlers:
+                handler.close()
+
+        QueueHandler.close(self)
+
+def _before_fork():
+    """Write the queued records, so the child does not inherit buffered output"""
+    for handler in list(_handlers):
+        handler.flush()
+
+def _after_fork():
+    """Restart the listeners in the child process"""
+    for handler in list(_handlers):
+        handler.after_fork()
+
+if hasattr(os, "register_at_fork"):  # Python 3.7+
+    os.register_at_fork(before=_before_fork, after_in_child=_after_fork)
+
+def config_queue_logging(logfile=None, logwrite=None, loglevel=20, logqueue=10000,
+                         logoverflow="block", logmaxbytes=0, logbackups=0):
+    """Configure non-blocking logging to the console and optional log files.
+
+    Args:
+        logfile: log file name; file is opened in append mode.
+        logwrite: log file name; file is opened in write mode.
+        loglevel: logging level; default is 20 (logging.INFO).
+        logqueue: maximum number of queued log records.
+        logoverflow: block, drop, or drop-oldest when the queue is full.
+        logmaxbytes: rotate log files at this size; default is 0 (no rotation).
+        logbackups: number of rotated log files to keep.
+    """
+    stream_format = "[%(levelname)s] %(message)s"
+    file_format = "[%(asctime)s][%(levelname)s] %(message)s"
+    date_format = "%Y-%m-%d %H:%M:%S"
+
+    _check_overflow(logoverflow)
+    logger = logging.getLogger()
+    logger.setLevel(logging.NOTSET)
+
+    if logger.handlers:
+        return
+
+    stream_handler = _BatchedStreamHandler()
+    stream_handler.setFormatter(logging.Formatter(stream_format, date_format))
+    handlers = [stream_handler]
+
+    for filename, mode in ((logfile, "a"), (logwrite, "w")):
+        if filename:
+            file_handler = _BatchedFileHandler(filename, mode, logmaxbytes, logbackups)
+            file_handler.setFormatter(logging.Formatter(file_format, date_format))
+            handlers.append(file_handler)
+
+    for handler in handlers:
+        handler.setLevel(loglevel)
+
+    queue_handler = QueueLogHandler(handlers, logqueue, logoverflow)
+    queue_handler.setLevel(loglevel)
+    logger.addHandler(queue_handler)
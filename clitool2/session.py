@@ -0,0 +1,193 @@
+"""Run CLITool and CLIToolbox commands repeatedly in a long-lived process
+
+CLITool.__call__ and CLIToolbox.__call__ are entry points for scripts: they
+configure logging, call logging.shutdown, and exit the process for help and
+invalid arguments. A Session runs the same command lines and returns every
+outcome as a Result:
+
+    session = Session(toolbox)
+    result = session.run(["greet", "Bob"])
+
+    status 0, output is the help text       -h or --help
+    status 2, error is the ParseError       invalid arguments or command
+    status 0 or 1                           result of the function
+
+Logging is configured once when the session starts, and the log handlers are
+flushed, not closed, after each command. The logging arguments in a command
+line are validated but otherwise ignored, or rejected as a parse error if
+reject_log_options is True. A session can be used from several threads at
+once.
+"""
+from __future__ import absolute_import, division, print_function
+import logging
+import threading
+import weakref
+from clitool2.clitool import CLITool, ParseError, Result, config_logging
+from clitool2.clitool import _isawaitable, _raise_parse_errors, _wants_help
+from clitool2.clitoolbox import CLIToolbox, _LazyCommand
+from clitool2.errors import ErrorInfo
+
+__version__ = "1.1"
+
+_HELP = ("-h", "--help")
+
+class Session(object):
+    """Runs command lines for a CLIToolbox, CLITool, or callable object.
+
+    Attributes:
+        target: CLIToolbox object, CLITool object, or callable object that
+            accepts command line arguments and returns a Result object or
+            status code.
+        logmngr: Logging manager function called once when the session starts;
+            None to leave logging to the host application.
+        logkwargs: keyword arguments for the logging manager
+        reject_log_options: If True, a command line that sets the logging
+            arguments of a tool is a parse error instead of being ignored.
+    """
+    def __init__(self, target, logmngr=config_logging, logkwargs=None,
+                 reject_log_options=False):
+        self.target = target
+        self.logmngr = logmngr
+        self.logkwargs = logkwargs or {}
+        self.reject_log_options = reject_log_options
+        self._lock = threading.Lock()
+        self._started = False
+        self._prepared = weakref.WeakSet()
+
+    def start(self):
+        """Configure logging; called by the first run"""
+        with self._lock:
+            if not self._started:
+                if self.logmngr is not None:
+                    self.logmngr(**self.logkwargs)
+
+                self._started = True
+
+    def flush(self):
+        """Flush the handlers of the root logger"""
+        for handler in logging.getLogger().handlers:
+            handler.flush()
+
+    def close(self):
+        """Flush and close the log handlers if the session configured logging;
+        the session cannot log afterwards. Handlers of the host application
+        are flushed, not closed."""
+        if self.logmngr is None:
+            self.flush()
+        else:
+            logging.shutdown()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def run(self, argv):
+        """Run the command line and return Result object.
+
+        Args:
+            argv: command line arguments, excluding the program name
+
+        Returns:
+            Result
+        """
+        if not self._started:
+            self.start()
+
+        try:
+            with _raise_parse_errors():
+                result = self._run(self.target, list(argv))
+        except ParseError:
+            result = Result(2, None, ErrorInfo.from_exc_info())
+        finally:
+            self.flush()
+
+        return result
+
+    def _prepare(self, tool):
+        """Build the parser and binding plans of the tool once"""
+        if tool not in self._prepared:
+            with self._lock:
+                tool.parser  # pylint: disable=pointless-statement
+                tool.plans  # pylint: disable=pointless-statement
+                self._prepared.add(tool)
+
+    def _run(self, target, args):
+        """Run the command line for the target"""
+        if isinstance(target, _LazyCommand):
+            target = target.target
+
+        if isinstance(target, CLIToolbox):
+            return self._run_toolbox(target, args)
+        elif isinstance(target, CLITool):
+            return self._run_tool(target, args)
+
+        try:
+            result = target(*args)
+
+            if _isawaitable(result):
+                from clitool2.aio import run_coroutine
+                result = run_coroutine(result)
+        except SystemExit as error:
+            result = 1 if error.code is not None and not isinstance(error.code, int) \
+                else error.code or 0
+        except ParseError:
+            raise
+        except Exception:  # pylint: disable=broad-except
+            return Result(1, None, ErrorInfo.from_exc_info())
+
+        return result if isinstance(result, Result) else Result(result, None, None)
+
+    def _run_toolbox(self, toolbox, args):
+        """Select the subcommand and run the remaining arguments"""
+        if not args or args[0] in _HELP:
+            return Result(0, toolbox.format_help(), None)
+
+        try:
+            command = toolbox.get_command(args[0])
+        except ValueError as error:
+            raise ParseError(str(error))
+
+        if command is None:
+            raise ParseError("invalid choice: '%s'" % args[0])
+
+        if not args[1:] or _wants_help(args[1:]):
+            # The help of a command registered by reference may be cached
+            text = toolbox._command_help(command)  # pylint: disable=protected-access
+
+            if text is not None:
+                return Result(0, text, None)
+
+        # As in CLIToolbox, a command without arguments shows its help
+        return self._run(command.func, args[1:] or ["-h"])
+
+    def _run_tool(self, tool, args):
+        """Parse the arguments and execute the function of the tool"""
+        if _wants_help(args):
+            return Result(0, tool.format_help(), None)
+
+        self._prepare(tool)
+
+        params = vars(tool.parser.parse_args(args))
+
+        if params.get("batch") is not None and tool.batch:
+            raise ParseError("batch mode is not supported in a session; "
+                             "use CLITool.run_batch")
+
+        if self.reject_log_options:
+            plan = tool.plans[1]
+            names = [name for name in plan.positional + plan.keywords
+                     if name in params and params[name] != plan.defaults.get(name)]
+
+            if names:
+                raise ParseError("logging arguments are not supported in this session: %s"
+                                 % ", ".join(names))
+
+        try:
+            execargs, execkwargs = tool.plans[0].bind(params)
+        except (ValueError, TypeError) as error:
+            raise ParseError(str(error))
+
+        return tool._execute_params(execargs, execkwargs, params)  # pylint: disable=protected-access
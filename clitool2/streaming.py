@@ -0,0 +1,126 @@
+"""Write the items produced by generator and iterator functions as they are produced
+
+Each item is encoded and written before the next item is requested, so memory
+use does not depend on the number of items, and a slow destination slows the
+producer instead of buffering its output.
+
+Formats:
+
+    jsonl   one JSON value per line
+    csv     one row per item; dict items use the keys of the first item as header
+    lines   str(item) per line
+"""
+from __future__ import absolute_import, division, print_function
+import sys
+import threading
+
+__version__ = "1.1"
+
+FORMATS = ("jsonl", "csv", "lines")
+
+# Size of the write buffer for output files
+BUFFER_SIZE = 1 << 20
+
+def _write_jsonl(items, fobj):
+    """Write items as JSON lines and return the count"""
+    import json
+    count = 0
+
+    for item in items:
+        fobj.write(json.dumps(item, default=str))
+        fobj.write("\n")
+        count += 1
+
+    return count
+
+def _write_lines(items, fobj):
+    """Write str(item) per line and return the count"""
+    count = 0
+
+    for item in items:
+        fobj.write("%s\n" % (item,))
+        count += 1
+
+    return count
+
+def _write_csv(items, fobj):
+    """Write items as CSV rows and return the count"""
+    import csv
+    count, writer = 0, None
+
+    for item in items:
+        if writer is None:
+            if isinstance(item, dict):
+                writer = csv.DictWriter(fobj, fieldnames=list(item), lineterminator="\n")
+                writer.writeheader()
+            else:
+                writer = csv.writer(fobj, lineterminator="\n")
+
+        if isinstance(item, (dict, list, tuple)):
+            writer.writerow(item)
+        else:
+            writer.writerow([item])
+
+        count += 1
+
+    return count
+
+_WRITERS = {"jsonl": _write_jsonl, "csv": _write_csv, "lines": _write_lines}
+
+def is_iterator(obj):
+    """Return True if obj is an iterator, such as the result of a generator"""
+    return hasattr(obj, "__iter__") and (hasattr(obj, "__next__") or hasattr(obj, "next")) \
+        and not isinstance(obj, (str, bytes, dict, list, tuple))
+
+class StreamGate(object):
+    """Stops the items passed to a sink by a call that has been abandoned.
+
+    A call on a worker thread cannot be stopped when its time limit expires.
+    After close returns, the sink receives no more items, so it does not
+    write after the Result is returned.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def items(self, items):
+        """Yield the items until the gate is closed"""
+        for item in items:
+            # The lock is held while the sink writes the item
+            with self._lock:
+                if self._closed:
+                    return
+
+                yield item
+
+    def close(self):
+        """Wait for the item being written and stop the items"""
+        with self._lock:
+            self._closed = True
+
+class Sink(object):
+    """Destination for the items of a generator or iterator function.
+
+    Attributes:
+        path: output file name; "-" or None for stdout
+        format: "jsonl", "csv", or "lines"
+    """
+    def __init__(self, path=None, format="jsonl"):  # pylint: disable=redefined-builtin
+        if format not in _WRITERS:
+            raise ValueError("Expected one of %s; got '%s'" % (", ".join(FORMATS), format))
+
+        self.path = path
+        self.format = format
+
+    def __call__(self, items):
+        """Write the items and return the number of items written"""
+        write = _WRITERS[self.format]
+
+        if self.path in (None, "-"):
+            try:
+                return write(items, sys.stdout)
+            finally:
+                sys.stdout.flush()
+
+        with open(self.path, "w", BUFFER_SIZE) as fobj:
+            return write(items, fobj)
@@ -1,3 +1,15 @@
 from __future__ import absolute_import
+import sys
+from .test_benchmarks import BenchmarksTestCase
 from .test_clitool import CLIToolTestCase
-from .test_clitoolbox import CLIToolboxTestCase
\ No newline at end of file
+from .test_clitoolbox import CLIToolboxTestCase
+from .test_daemon import DaemonTestCase
+from .test_memo import MemoTestCase
+from .test_metrics import MetricsTestCase
+from .test_session import SessionTestCase
+
+if sys.version_info >= (3, 5):
+    from .test_aio import AioTestCase
+    from .test_converters import ConvertersTestCase
+    from .test_queuelog import QueueLogTestCase
+    from .test_startup import StartupTestCase
\ No newline at end of file
@@ -1,8 +1,14 @@
 """Execute tests for the clitool2 package"""
 from __future__ import absolute_import
+import sys
 import unittest
+from . import BenchmarksTestCase
 from . import CLIToolTestCase
 from . import CLIToolboxTestCase
+from . import DaemonTestCase
+from . import MemoTestCase
+from . import MetricsTestCase
+from . import SessionTestCase
 
 def run_tests():
     """Execute tests for the clitool2 package"""
@@ -10,6 +16,21 @@ def run_tests():
     suite = unittest.TestSuite()
     suite.addTest(loader.loadTestsFromTestCase(CLIToolTestCase))
     suite.addTest(loader.loadTestsFromTestCase(CLIToolboxTestCase))
+    suite.addTest(loader.loadTestsFromTestCase(DaemonTestCase))
+    suite.addTest(loader.loadTestsFromTestCase(MemoTestCase))
+    suite.addTest(loader.loadTestsFromTestCase(MetricsTestCase))
+    suite.addTest(loader.loadTestsFromTestCase(SessionTestCase))
+    suite.addTest(loader.loadTestsFromTestCase(BenchmarksTestCase))
+
+    if sys.version_info >= (3, 5):
+        from . import AioTestCase
+        from . import ConvertersTestCase
+        from . import QueueLogTestCase
+        from . import StartupTestCase
+        suite.addTest(loader.loadTestsFromTestCase(AioTestCase))
+        suite.addTest(loader.loadTestsFromTestCase(ConvertersTestCase))
+        suite.addTest(loader.loadTestsFromTestCase(QueueLogTestCase))
+        suite.addTest(loader.loadTestsFromTestCase(StartupTestCase))
     runner = unittest.TextTestRunner()
     runner.run(suite)
 
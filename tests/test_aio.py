@@ -0,0 +1,67 @@
+"""Test Case for the aio module"""
+from __future__ import absolute_import
+import asyncio
+from unittest import TestCase
+from clitool2 import CLITool, CLIToolbox
+
+async def _sleep_add(num1, num2):
+    """Add two numbers after a short sleep"""
+    await asyncio.sleep(0.01)
+    return float(num1) + float(num2)
+
+async def _command(*args):
+    """Async command that returns a status code"""
+    await asyncio.sleep(0)
+    return len(args)
+
+class AioTestCase(TestCase):
+    """Test Case for the aio module"""
+    def test_clitool_coroutine(self):
+        """Test the CLITool class with a coroutine function"""
+        result = CLITool(_sleep_add)("1", "2")
+        self.assertEqual(result.output, 3)
+        self.assertEqual(result.status, 0)
+
+    def test_clitool_coroutine_timeout(self):
+        """Test the cancellation of a coroutine function by the time limit"""
+        tool = CLITool(_sleep_add, timeout=0)
+        result = tool("1", "2", "--timeout", "0.001")
+        self.assertEqual(result.status, 124)
+        self.assertEqual(tool("1", "2", "--timeout", "5").output, 3)
+
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        tool.timeout = 0.001
+        self.assertEqual(loop.run_until_complete(tool.execute_async(1, 2)).status, 124)
+
+    def test_execute_many_async(self):
+        """Test concurrent execution with a concurrency limit"""
+        tool = CLITool(_sleep_add)
+        calls = [((num, 1), {}) for num in range(10)] + [(("a", 1), {})]
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        results = loop.run_until_complete(tool.execute_many_async(calls, limit=3))
+        self.assertEqual([item.output for item in results[:-1]],
+                         [num + 1.0 for num in range(10)])
+        self.assertEqual(results[-1].error[0], ValueError)
+
+    def test_execute_async(self):
+        """Test that async and sync results have the same shape"""
+        tool = CLITool(_sleep_add)
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        result = loop.run_until_complete(tool.execute_async(1, 2))
+        self.assertEqual(result, (0, 3, None))
+        self.assertEqual(set(result.timings), set(["call", "cpu", "peak_rss"]))
+
+        async def nested():
+            # The coroutine runs on a new loop while this loop is running
+            return tool.execute(2, 3)
+
+        self.assertEqual(loop.run_until_complete(nested()).output, 5)
+
+    def test_clitoolbox_coroutine(self):
+        """Test the CLIToolbox class with an async command"""
+        toolbox = CLIToolbox()
+        toolbox.add_command(_command, "count")
+        self.assertEqual(toolbox("count", "a", "b").status, 2)
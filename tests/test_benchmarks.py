@@ -0,0 +1,16 @@
+"""Test Case for the benchmarks package"""
+from __future__ import absolute_import
+from unittest import TestCase
+from benchmarks import compare, run_benchmarks
+
+class BenchmarksTestCase(TestCase):
+    """Test Case for the benchmarks package"""
+    def test_benchmarks(self):
+        """Run the quick benchmarks and compare them with a baseline"""
+        report = run_benchmarks("toolbox", quick=True)
+        self.assertEqual(sorted(report["results"]), ["toolbox.dispatch.10", "toolbox.help.10"])
+
+        baseline = {"results": {"toolbox.help.10": {"seconds": 1e-9, "number": 1},
+                                "toolbox.dispatch.10": {"seconds": 1e3, "number": 1}}}
+        regressions = compare(report, baseline, threshold=2)
+        self.assertEqual([item[0] for item in regressions], ["toolbox.help.10"])
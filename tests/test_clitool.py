@@ -1,9 +1,28 @@
 """Test Case for the clitool module"""
 from __future__ import absolute_import
 import inspect
+import json
 import os
+import pickle
+import pstats
+import shutil
+import signal
+import sys
+import tempfile
+import threading
+import time
 from unittest import TestCase
 from clitool2 import CLITool, parse_docstr
+from clitool2.batch import worker_log_params
+from clitool2.clitool import _getcallargs
+from clitool2.deadline import Cancelled, TimedOut
+from clitool2.errors import ErrorInfo, RemoteError
+from clitool2.docstring import get_docinfo
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
 
 def _test1(param1, param2, *args, **kwargs):
     """Sample function for TestCase.
@@ -35,6 +54,58 @@ def _test2(num1, num2):
     """
     return float(num1) + float(num2)
 
+def _test3(param1, param2=2, *args):
+    """Sample function with default value for TestCase"""
+    return (param1, param2, args)
+
+def _test4(count):
+    """Sample generator function for TestCase"""
+    for num in range(int(count)):
+        yield {"num": num, "square": num * num}
+
+    if int(count) > 3:
+        raise ValueError("count is too large")
+
+def _test5(seconds):
+    """Sample function that sleeps for the number of seconds"""
+    time.sleep(float(seconds))
+    return float(seconds)
+
+def _test6():
+    """Sample function that is cancelled by SIGTERM"""
+    raise Cancelled("cancelled by signal 15", 143)
+
+def _test9(count):
+    """Sample generator that is slower than its time limit"""
+    for num in range(int(count)):
+        time.sleep(0.02)
+        yield num
+
+def _test10():
+    """Sample function that is interrupted by Ctrl-C"""
+    raise KeyboardInterrupt()
+
+def _test11(seconds):
+    """Sample function that receives SIGINT"""
+    os.kill(os.getpid(), signal.SIGINT)
+    time.sleep(float(seconds))
+
+def _test7(offset, *values):
+    """Sample function for map mode that records the process of each chunk"""
+    return [(os.getpid(), int(offset) + int(value)) for value in values]
+
+class _LocalError(Exception):
+    """Exception that cannot be pickled"""
+    def __init__(self, code, text):
+        Exception.__init__(self, "%s %s" % (code, text))
+
+def _test8(value):
+    """Sample function that raises a chained exception"""
+    try:
+        int(value)
+    except ValueError:
+        raise _LocalError(1, "cannot convert")
+
 class CLIToolTestCase(TestCase):
     """Test Case for the clitool module"""
     def test_parse_docstr(self):
@@ -48,6 +119,58 @@ class CLIToolTestCase(TestCase):
         self.assertEqual(info.args, os.linesep.join(expected))
         self.assertEqual(info.returns, "tuple: (param1, param2, args, kwargs")
 
+    def test_parse_docstr_styles(self):
+        """Test parse_docstr with Google, NumPy, and reST style docstrings"""
+        google = """Summary.
+
+        Returns:
+            int: value
+
+        Args:
+            name (str): the name
+                continued
+            count: number
+        """
+        numpy = """Summary.
+
+        Parameters
+        ----------
+        name : str
+            the name
+            continued
+        count
+            number
+
+        Returns
+        -------
+        int
+            value
+        """
+        rest = """Summary.
+
+        :param str name: the name
+            continued
+        :param count: number
+        :returns: value
+        :rtype: int
+        :raises ValueError: if invalid
+        """
+        expected = (("name", "str", "the name continued"), ("count", None, "number"))
+
+        for text in (google, numpy, rest):
+            info = parse_docstr(text)
+            self.assertEqual(info.summary, "Summary.")
+            self.assertEqual(info.params, expected)
+            self.assertEqual(info.returns.split(), ["int", "value"] if text is numpy
+                             else ["int:", "value"])
+
+        self.assertEqual(parse_docstr(rest).raises, "ValueError: if invalid")
+        self.assertEqual(parse_docstr(None).summary, None)
+
+        # Results are memoized per function
+        self.assertIs(get_docinfo(_test2), get_docinfo(_test2))
+        self.assertEqual(get_docinfo(_test2).params[1], ("num2", None, "number 2"))
+
     def test_clitool_normal(self):
         """Test the CLITool class with normal exit"""
         tool = CLITool(_test1, parse_doc=False)
@@ -64,3 +187,249 @@ class CLIToolTestCase(TestCase):
         result = tool(*args)
         self.assertEqual(result.error[0], ValueError)
         self.assertEqual(result.status, 1)
+
+    def test_clitool_spec_cache(self):
+        """Test the CLITool class with a cached argument specification"""
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        build_spec = CLITool._build_spec
+
+        tool = CLITool(_test2, parse_doc=True, cache_dir=cache_dir)
+        expected = tool.parser.format_help()
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+        # The second tool must load the specification from the cache
+        def fail(self):
+            raise AssertionError("specification was not loaded from cache")
+
+        CLITool._build_spec = fail
+        self.addCleanup(setattr, CLITool, "_build_spec", build_spec)
+        tool = CLITool(_test2, parse_doc=True, cache_dir=cache_dir)
+        self.assertEqual(tool.parser.format_help(), expected)
+        self.assertEqual(tool("1", "2").output, 3)
+
+    def test_clitool_batch(self):
+        """Test the CLITool class in batch mode"""
+        handle, path = tempfile.mkstemp()
+        self.addCleanup(os.remove, path)
+
+        with os.fdopen(handle, "w") as fobj:
+            fobj.write('["1", "2"]\n# comment\n["--help"]\n{"num1": "3", "num2": "4"}\n5 b\n')
+
+        report = os.path.join(tempfile.gettempdir(), os.path.basename(path) + ".jsonl")
+        self.addCleanup(os.remove, report)
+        tool = CLITool(_test2, batch=True)
+        stdout, sys.stdout = sys.stdout, StringIO()
+
+        try:
+            result = tool("--batch", path, "--batch-report", report)
+        finally:
+            stdout, sys.stdout = sys.stdout, stdout
+
+        with open(report, "r") as fobj:
+            lines = [json.loads(line) for line in fobj]
+
+        self.assertEqual(result.status, 1)
+        self.assertEqual(result.output, {"total": 4, "failed": 2})
+        self.assertEqual([line["output"] for line in lines], [3, None, 7, None])
+        self.assertEqual(lines[1]["status"], 2)
+        self.assertTrue(lines[1]["error"].startswith("ParseError:"))
+        self.assertTrue(lines[3]["error"].startswith("ValueError:"))
+        self.assertEqual(stdout.getvalue(), "")
+
+    def test_clitool_batch_jobs(self):
+        """Test the CLITool class in batch mode with worker pools"""
+        tool = CLITool(_test2)
+        records = [[str(num), "1"] for num in range(20)] + [["a", "b"]]
+
+        for pool in ("process", "thread"):
+            results = list(tool.iter_batch(records, jobs=3, pool=pool))
+            self.assertEqual([item[0] for item in results], list(range(21)))
+            self.assertEqual([item[1].output for item in results[:-1]],
+                             [num + 1.0 for num in range(20)])
+            self.assertEqual(results[-1][1].error[0], ValueError)
+
+        # Workers append to the log file that the parent opened in write mode
+        params = worker_log_params({"logfile": None, "logwrite": "log.txt", "loglevel": 20})
+        self.assertEqual(params, {"logfile": "log.txt", "logwrite": None, "loglevel": 20})
+        params = worker_log_params({"logfile": "a.txt", "logwrite": "b.txt"})
+        self.assertEqual((params["logfile"], params["logwrite"]), ("a.txt", None))
+
+    def test_clitool_batch_cancel(self):
+        """Test SIGTERM during a batch on a process pool"""
+        handle, path = tempfile.mkstemp()
+        self.addCleanup(os.remove, path)
+
+        with os.fdopen(handle, "w") as fobj:
+            fobj.write('["0"]\n["0"]\n["5"]\n["5"]\n["5"]\n')
+
+        report = path + ".jsonl"
+        self.addCleanup(os.remove, report)
+        tool = CLITool(_test5, batch=True)
+        timer = threading.Timer(1.0, os.kill, (os.getpid(), signal.SIGTERM))
+        timer.start()
+        start = time.time()
+        result = tool("--batch", path, "--batch-report", report, "--jobs", "2")
+        timer.join()
+
+        with open(report, "r") as fobj:
+            lines = [json.loads(line) for line in fobj]
+
+        self.assertEqual(result.status, 143)
+        self.assertEqual(result.error[0], Cancelled)
+        self.assertEqual(result.output, {"total": 2, "failed": 0})
+        self.assertEqual([line["output"] for line in lines], [0, 0])
+        self.assertLess(time.time() - start, 5)
+
+    def test_getcallargs(self):
+        """Test binding of parameter values to function arguments"""
+        self.assertEqual(_getcallargs(_test3, param1=1, args=[3, 4]), ([1, 2, 3, 4], {}))
+        self.assertEqual(CLITool(_test3).plans[0].bind({"param1": 1}), ([1, 2], {}))
+        self.assertRaises(ValueError, _getcallargs, _test3, param2=1)
+
+    def test_clitool_stream(self):
+        """Test the CLITool class with a generator function"""
+        handle, path = tempfile.mkstemp()
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        tool = CLITool(_test4)
+
+        result = tool("3", "--stream-output", path, "--stream-format", "csv")
+        self.assertEqual(result.output, 3)
+
+        with open(path, "r") as fobj:
+            self.assertEqual(fobj.read(), "num,square\n0,0\n1,1\n2,4\n")
+
+        # Errors raised while items are produced are reported as failures
+        result = tool("4", "--stream-output", path)
+        self.assertEqual(result.status, 1)
+        self.assertEqual(result.error[0], ValueError)
+
+    def test_clitool_argfile(self):
+        """Test the CLITool class with nested argument files"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        outer, inner = os.path.join(directory, "outer.txt"), os.path.join(directory, "inner.txt")
+
+        with open(outer, "w") as fobj:
+            fobj.write("# comment\n'A B' @inner.txt  # trailing comment\n")
+
+        with open(inner, "w") as fobj:
+            fobj.write('"C D"\n\nE\n')
+
+        result = CLITool(_test1)("@" + outer, "F")
+        self.assertEqual(result.output, ("A B", "C D", ("E", "F"), {}))
+
+        # Backslashes in Windows paths are kept
+        with open(inner, "w") as fobj:
+            fobj.write('C:\\data\\in.txt "C:\\Program Files\\x" # comment\n')
+
+        result = CLITool(_test1)("@" + outer)
+        self.assertEqual(result.output[1:3], ("C:\\data\\in.txt", ("C:\\Program Files\\x",)))
+
+        # An argument file that includes itself is a parse error
+        with open(inner, "w") as fobj:
+            fobj.write("@inner.txt\n")
+
+        self.assertRaises(SystemExit, CLITool(_test1), "@" + outer)
+
+    def test_clitool_profile(self):
+        """Test the phase timings and profiling arguments of the CLITool class"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "stats.prof")
+
+        result = CLITool(_test2)("1", "2")
+        self.assertEqual(set(result.timings), set(["parser", "parse", "bind", "logging", "call",
+                                                   "cpu", "peak_rss", "shutdown", "total"]))
+        self.assertTrue(all(value is None or value >= 0 for value in result.timings.values()))
+        self.assertRaises(SystemExit, CLITool(_test2), "1", "2", "--profile", path)
+
+        # The timings are not part of the tuple
+        status, output, error = result
+        self.assertEqual((status, output, error), (0, 3, None))
+        self.assertEqual(result, (0, 3, None))
+        self.assertEqual(pickle.loads(pickle.dumps(result)).timings, result.timings)
+        self.assertIs(result._replace(output=4).timings, result.timings)
+
+        result = CLITool(_test2, profile=True)("1", "2", "--profile", path)
+        self.assertEqual(result.output, 3)
+        stats = pstats.Stats(path)
+        self.assertTrue(any(func[2] == "_test2" for func in stats.stats))
+
+    def test_clitool_timeout(self):
+        """Test the time limit and cancellation of the CLITool class"""
+        self.assertRaises(SystemExit, CLITool(_test5), "0", "--timeout", "1")
+
+        tool = CLITool(_test5, timeout=0)
+        self.assertEqual(tool("0.01").output, 0.01)
+        result = tool("5", "--timeout", "0.05")
+        self.assertEqual(result.status, 124)
+        self.assertEqual(result.error[0], TimedOut)
+        self.assertLess(result.timings["call"], 5)
+
+        for isolation in ("thread", "process"):
+            tool = CLITool(_test5, timeout=0.05, isolation=isolation)
+            self.assertEqual(tool.execute(5).status, 124)
+            self.assertEqual(tool.execute_timeout(0, 0.1).output, 0.1)
+            self.assertEqual(tool.execute(0).output, 0)
+            self.assertEqual(tool.execute("a").error[0], ValueError)
+
+        result = CLITool(_test6).execute()
+        self.assertEqual(result.status, 143)
+        self.assertEqual(result.error[0], Cancelled)
+        self.assertRaises(KeyboardInterrupt, CLITool(_test10).execute)
+        self.assertEqual(CLITool(_test11)("5").status, 130)
+
+        # The abandoned thread stops streaming when the time limit expires
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "items.txt")
+        result = CLITool(_test9, timeout=0)("30", "--timeout", "0.1", "--stream-output", path,
+                                            "--stream-format", "lines")
+        self.assertEqual(result.status, 124)
+        time.sleep(0.7)
+
+        with open(path, "r") as fobj:
+            self.assertLess(len(fobj.readlines()), 10)
+
+    def test_clitool_map(self):
+        """Test map mode of the CLITool class"""
+        values = [str(num) for num in range(20)]
+        result = CLITool(_test7, map_jobs=2)("100", *(values + ["--chunk-size", "3"]))
+        self.assertEqual(result.status, 0)
+        self.assertEqual([item[1] for item in result.output], list(range(100, 120)))
+        self.assertNotIn(os.getpid(), set(item[0] for item in result.output))
+
+        tool = CLITool(_test7, map_jobs=1, chunk_size=4, reducer=len)
+        self.assertEqual(tool.execute(0, *values).output, 5)
+        self.assertEqual(tool.execute(0, "a").error[0], ValueError)
+        self.assertRaises(ValueError, getattr, CLITool(_test2, map_jobs=2), "parser")
+
+    def test_clitool_error_record(self):
+        """Test the ErrorInfo record in the Result of the CLITool class"""
+        error = CLITool(_test8).execute("a").error
+        self.assertIsInstance(error, ErrorInfo)
+        self.assertEqual(error[0], _LocalError)
+        self.assertEqual(str(error[1]), "1 cannot convert")
+        self.assertEqual(len(list(error)), 3)
+        self.assertIn("Traceback", error[2])
+        self.assertIsNone(getattr(error[1], "__traceback__", None))
+
+        data = json.loads(json.dumps(error.to_dict()))
+        self.assertEqual((data["type"], data["message"]), ("_LocalError", "1 cannot convert"))
+
+        if hasattr(error[1], "__context__"):
+            self.assertEqual(data["chain"][0]["type"], "ValueError")
+
+        copy = pickle.loads(pickle.dumps(error))
+        self.assertEqual((copy[0], copy.name, copy.traceback), (RemoteError, "_LocalError",
+                                                                error.traceback))
+        # The message of the ValueError differs between Python 2 and 3
+        try:
+            float("a")
+        except ValueError as err:
+            message = str(err)
+
+        copy = pickle.loads(pickle.dumps(CLITool(_test2).execute("a", 1).error))
+        self.assertEqual((copy[0], str(copy[1])), (ValueError, message))
@@ -1,8 +1,19 @@
 """Test Case for the clitoolbox module"""
 from __future__ import absolute_import
+import json
 import logging
+import os
+import shutil
+import sys
+import tempfile
 from unittest import TestCase
 from clitool2 import CLITool, CLIToolbox
+from clitool2.completion import build_index, complete, script
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
 
 def _add(num1, num2):
     """Add two numbers"""
@@ -10,12 +21,23 @@ def _add(num1, num2):
     logging.info("%s + %s = %s", num1, num2, result)
     return result
 
+def _interrupt(value):
+    """Command that is interrupted by Ctrl-C"""
+    raise KeyboardInterrupt(value)
+
+def _exit(value):
+    """Command that exits the interpreter"""
+    sys.exit(int(value))
+
 def _subtract(num1, num2):
     """Subtract two numbers"""
     result = float(num1) - float(num2)
     logging.info("%s - %s = %s", num1, num2, result)
     return result
 
+# Module-level tool referenced by the lazy command test
+ADD_TOOL = CLITool(_add)
+
 class CLIToolboxTestCase(TestCase):
     """Test Case for the clitoolbox module"""
     def test_clitoolbox(self):
@@ -32,3 +54,132 @@ class CLIToolboxTestCase(TestCase):
 
         self.assertEqual(result1.output, 30)
         self.assertEqual(result2.output, 19)
+
+    def test_clitoolbox_lazy(self):
+        """Test the CLIToolbox class with commands registered by reference"""
+        toolbox = CLIToolbox()
+        toolbox.add_command("tests.test_clitoolbox:ADD_TOOL", "add")
+        toolbox.add_command("tests.missing_module:TOOL", "missing")
+
+        # Only the selected command is imported
+        result = toolbox("add", "1", "2")
+        self.assertEqual(result.output, 3)
+        self.assertRaises(ImportError, toolbox, "missing", "1")
+
+    def test_clitoolbox_groups(self):
+        """Test nested groups, aliases, and prefix matching"""
+        toolbox = CLIToolbox()
+        math = toolbox.add_group("math", "Arithmetic commands")
+        math.add_command(CLITool(_add), "add", aliases=("plus",))
+        math.add_command(CLITool(_subtract), "subtract")
+        toolbox.add_command(CLITool(_add), "mathadd")
+
+        self.assertEqual(toolbox("math", "plus", "1", "2").output, 3)
+        self.assertEqual(toolbox("math", "sub", "5", "2").output, 3)
+        self.assertEqual(toolbox.get_command("matha").name, "mathadd")
+        self.assertRaises(ValueError, toolbox.get_command, "mat")
+        self.assertIsNone(toolbox.get_command("divide"))
+        self.assertRaises(ValueError, math.add_command, _add, "plus")
+
+    def test_completion(self):
+        """Test shell completion from the completion index"""
+        toolbox = CLIToolbox()
+        math = toolbox.add_group("math", "Arithmetic commands")
+        math.add_command(CLITool(_add), "add", aliases=("plus",))
+        toolbox.add_command(CLITool(_subtract), "subtract")
+        index = json.loads(json.dumps(build_index(toolbox)))
+
+        self.assertEqual(complete(index, [], ""), ["math", "subtract"])
+        self.assertEqual(complete(index, ["math"], "p"), ["plus"])
+        self.assertEqual(complete(index, ["m", "add"], "--log"),
+                         ["--logfile", "--loglevel", "--logwrite"])
+        self.assertEqual(complete(index, ["subtract", "--logfile"], ""), [])
+        self.assertIn("complete -o default", script("bash", "tool", "index.json"))
+
+    def test_help_cache(self):
+        """Test help messages cached without importing the command modules"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        sys.path.insert(0, directory)
+        self.addCleanup(sys.path.remove, directory)
+        module = os.path.join(directory, "clitool2_help_command.py")
+
+        def write(doc):
+            with open(module, "w") as fobj:
+                fobj.write("from clitool2 import CLITool\n\n"
+                           "def scale(value):\n    '''%s'''\n\n"
+                           "TOOL = CLITool(scale, parse_doc=True)\n" % doc)
+
+        def run(*args):
+            sys.modules.pop("clitool2_help_command", None)
+            toolbox = CLIToolbox(cache_dir=os.path.join(directory, "cache"))
+            toolbox.add_command("clitool2_help_command:TOOL", "scale", parse_doc=True)
+            stdout, sys.stdout = sys.stdout, StringIO()
+
+            try:
+                self.assertRaises(SystemExit, toolbox, *args)
+                return sys.stdout.getvalue()
+            finally:
+                sys.stdout = stdout
+
+        write("Scale the value.")
+        self.assertIn("Scale the value.", run("-h"))
+        self.assertIn("Scale the value.", run("scale", "-h"))
+
+        # The cached messages are printed without importing the module
+        self.assertIn("Scale the value.", run("-h"))
+        self.assertIn("Scale the value.", run("scale", "--help"))
+        self.assertNotIn("clitool2_help_command", sys.modules)
+
+        # The messages are rendered again when the module changes
+        write("Scale the value by a factor.")
+        self.assertIn("by a factor", run("-h"))
+        self.assertIn("by a factor", run("scale"))
+
+    def test_script(self):
+        """Test script mode of the CLIToolbox class"""
+        toolbox = CLIToolbox()
+        toolbox.add_command(CLITool(_add), "add")
+        toolbox.add_command(CLITool(_subtract), "subtract")
+        lines = ["# pipeline", "first: add 1 2", "second: subtract 5 x  after: first",
+                 "third: add 3 4  after: second", "add 5 6",
+                 '{"name": "last", "command": "add 7 8", "after": ["first"]}']
+        text = "\n".join(lines) + "\n"
+
+        result = toolbox.run_script(StringIO(text), jobs=2)
+        self.assertEqual(result.status, 1)
+        self.assertEqual(result.error[0], ValueError)
+        self.assertEqual([item.name for item in result.output],
+                         ["first", "second", "third", "step4", "last"])
+        self.assertEqual(result.output[0].result.output, 3)
+        self.assertEqual(result.output[1].status, 1)
+        self.assertEqual(result.output[2].status, None)
+
+        result = toolbox.run_script(StringIO(text), jobs=2, on_failure="continue")
+        self.assertEqual([item.status for item in result.output], [0, 1, None, 0, 0])
+        self.assertEqual(result.output[4].result.output, 15)
+
+        for script_text in ("add 1 2  after: missing\n", "a: add 1 2  after: b\n"
+                            "b: add 1 2  after: a\n"):
+            self.assertRaises(ValueError, toolbox.run_script, StringIO(script_text))
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "script.txt")
+
+        with open(path, "w") as fobj:
+            fobj.write("add 1 2\nsum: add 2 3  after: step1\n")
+
+        result = toolbox("--script", path, "--jobs", "4")
+        self.assertEqual(result.status, 0)
+        self.assertEqual(result.output[1].result.output, 5)
+        self.assertRaises(SystemExit, toolbox, "--script", path, "--on-failure", "retry")
+
+        # Steps that raise SystemExit fail; interrupts are raised after the
+        # running steps finish
+        toolbox.add_command(CLITool(_exit), "exit")
+        toolbox.add_command(CLITool(_interrupt), "interrupt")
+        result = toolbox.run_script(StringIO("exit 3\nadd 1 2\n"), jobs=2, on_failure="continue")
+        self.assertEqual([item.status for item in result.output], [3, 0])
+        self.assertRaises(KeyboardInterrupt, toolbox.run_script,
+                          StringIO("interrupt 1\nadd 1 2  after: step1\n"), jobs=2)
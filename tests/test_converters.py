@@ -0,0 +1,71 @@
+"""Test Case for the converters module"""
+from __future__ import absolute_import
+import datetime
+import enum
+import mmap
+import os
+import pathlib
+import tempfile
+from typing import Iterable, List, Optional
+from unittest import TestCase
+from clitool2 import CLITool
+
+class Color(enum.Enum):
+    """Sample Enum for TestCase"""
+    RED = 1
+    GREEN = 2
+
+def _typed(count: int, ratio: float, when: datetime.date, color: Color,
+           path: Optional[pathlib.Path] = None, ids: List[int] = None, flag: bool = False,
+           *values: float):
+    """Sample function with annotations for TestCase"""
+    return (count, ratio, when, color, path, ids, flag, values)
+
+def _keyword_only(name, *, count: int, scale=1.5, **kwargs):
+    """Sample function with keyword-only parameters for TestCase"""
+    return (name, count, scale, kwargs)
+
+def _files(data: mmap.mmap, paths: Iterable[str]):
+    """Sample function with file parameters for TestCase"""
+    return (data[:5], paths, list(paths))
+
+class ConvertersTestCase(TestCase):
+    """Test Case for the converters module"""
+    def test_annotations(self):
+        """Test conversion of arguments by parameter annotations"""
+        tool = CLITool(_typed)
+        args = ("3", "0.5", "2020-04-21", "GREEN", "--path", "a/b", "--ids", "1", "2",
+                "--flag", "1")
+        expected = (3, 0.5, datetime.date(2020, 4, 21), Color.GREEN, pathlib.Path("a/b"),
+                    [1, 2], True, ())
+        self.assertEqual(tool(*args).output, expected)
+
+    def test_record_conversion(self):
+        """Test conversion of batch records by parameter annotations"""
+        tool = CLITool(_typed)
+        record = {"count": "3", "ratio": 0.5, "when": "21 April 2020", "color": "1",
+                  "ids": ["4", 5], "values": ["1.5"]}
+        index, result = next(tool.iter_batch([record]))
+        self.assertEqual(index, 0)
+        self.assertEqual(result.output, (3, 0.5, datetime.date(2020, 4, 21), Color.RED,
+                                         None, [4, 5], False, (1.5,)))
+
+    def test_keyword_only(self):
+        """Test keyword-only parameters"""
+        tool = CLITool(_keyword_only)
+        result = tool("a", "--count", "2", "--kwargs", '{"b": 1}')
+        self.assertEqual(result.output, ("a", 2, 1.5, {"b": 1}))
+        self.assertEqual(tool("a", "--count", "2", "--scale", "3").output[2], 3.0)
+
+    def test_file_parameters(self):
+        """Test memory-mapped files and lazy argument files"""
+        handle, path = tempfile.mkstemp()
+        self.addCleanup(os.remove, path)
+
+        with os.fdopen(handle, "w") as fobj:
+            fobj.write("a.txt 'b c.txt'\n# comment\nd.txt\n")
+
+        data, paths, items = CLITool(_files)(path, path).output
+        self.assertEqual(data, b"a.txt")
+        self.assertEqual(paths.path, path)
+        self.assertEqual(items, ["a.txt", "b c.txt", "d.txt"])
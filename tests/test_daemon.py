@@ -0,0 +1,67 @@
+"""Test Case for the daemon module"""
+from __future__ import absolute_import, print_function
+import io
+import os
+import shutil
+import socket
+import stat
+import tempfile
+import threading
+from unittest import TestCase, skipUnless
+from clitool2 import CLITool, CLIToolbox
+from clitool2.daemon import Server, request
+
+def _echo(text, status=0):
+    """Print text and return status"""
+    print(text)
+
+    if int(status):
+        raise ValueError(text)
+
+    return os.getcwd()
+
+class DaemonTestCase(TestCase):
+    """Test Case for the daemon module"""
+    @skipUnless(hasattr(socket, "AF_UNIX"), "requires Unix domain sockets")
+    def test_server(self):
+        """Test requests to the warm-process server"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "tool.sock")
+
+        toolbox = CLIToolbox()
+        toolbox.add_command(CLITool(_echo), "echo")
+        server = Server(toolbox, path, workers=2)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(server.shutdown)
+
+        while not os.path.exists(path):
+            thread.join(0.01)
+
+        stdout, stderr = io.StringIO(), io.StringIO()
+        status = request(path, ["echo", "hello"], cwd=directory, stdout=stdout, stderr=stderr)
+        self.assertEqual(status, 0)
+        self.assertEqual(stdout.getvalue(), "hello\n")
+        self.assertIn("SUCCEEDED", stderr.getvalue())
+
+        stdout, stderr = io.StringIO(), io.StringIO()
+        status = request(path, ["echo", "bye", "--status", "1"], stdout=stdout, stderr=stderr)
+        self.assertEqual(status, 1)
+        self.assertIn("ValueError: bye", stderr.getvalue())
+
+        # Only the user running the server can connect
+        self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o600)
+
+        stdout, stderr = io.StringIO(), io.StringIO()
+        self.assertEqual(request(path, ["echo", "-h"], stdout=stdout, stderr=stderr), 0)
+        self.assertIn("usage:", stdout.getvalue())
+
+        # The server's log handler is not closed by a request, and logging
+        # arguments are rejected
+        stdout, stderr = io.StringIO(), io.StringIO()
+        status = request(path, ["echo", "x", "--loglevel", "10"], stdout=stdout, stderr=stderr)
+        self.assertEqual(status, 2)
+        self.assertIn("logging arguments are not supported", stderr.getvalue())
+        self.assertEqual(request(path, ["echo", "x"], stdout=stdout, stderr=stderr), 0)
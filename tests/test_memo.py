@@ -0,0 +1,122 @@
+"""Test Case for the memo module"""
+from __future__ import absolute_import
+import logging
+import mmap
+import os
+import stat
+import shutil
+import tempfile
+import time
+from unittest import TestCase
+from clitool2 import CLITool
+from clitool2.memo import ResultCache
+
+_calls = []
+
+def _checksum(data):
+    """Sample function that records the sum of its input"""
+    _calls.append("checksum")
+    return sum(bytearray(data[:]))
+
+def _report(name, count=1):
+    """Sample function that records its calls"""
+    _calls.append(name)
+    return {"name": name, "count": count}
+
+class _Records(logging.Handler):
+    """Handler that keeps the messages"""
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+class MemoTestCase(TestCase):
+    """Test Case for the memo module"""
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        del _calls[:]
+
+    def test_clitool_memoize(self):
+        """Test hits, misses, and the cache arguments of the CLITool class"""
+        cache = ResultCache(self.directory)
+        tool = CLITool(_report, result_cache=cache)
+        handler = _Records()
+        logging.getLogger().addHandler(handler)
+        self.addCleanup(logging.getLogger().removeHandler, handler)
+
+        self.assertEqual(tool("a", "--cache").output, {"name": "a", "count": 1})
+        self.assertEqual(tool("a", "--cache").output, {"name": "a", "count": 1})
+        self.assertEqual(tool("a").status, 0)
+        self.assertEqual(tool("a", "--count", "2", "--cache").output["count"], 2)
+        self.assertEqual(_calls, ["a", "a", "a"])
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+        closing = [message for message in handler.messages if "Elapsed Time" in message]
+        self.assertIn("Result Cache: MISS", closing[0])
+        self.assertIn("Result Cache: HIT", closing[1])
+        self.assertNotIn("Result Cache", closing[2])
+
+        tool = CLITool(_report, result_cache=cache, memoize=True)
+        self.assertEqual(tool.execute("a", 1).output["name"], "a")
+        tool("a", "--no-cache")
+        self.assertEqual(_calls, ["a", "a", "a", "a"])
+
+    def test_result_cache_bounds(self):
+        """Test the expiry and least recently used eviction of ResultCache"""
+        cache = ResultCache(self.directory, max_entries=2)
+        keys = [cache.key(_report, (name,), {}) for name in "abc"]
+        self.assertEqual(len(set(keys)), 3)
+
+        for num, key in enumerate(keys[:2]):
+            cache.store(key, num)
+            os.utime(os.path.join(self.directory, key + ".pkl"), (num, num))
+
+        self.assertEqual(cache.load(keys[0]), (True, 0))
+        cache.store(keys[2], 2)
+        self.assertEqual(cache.load(keys[1]), (False, None))
+        self.assertEqual(cache.load(keys[2]), (True, 2))
+
+        cache = ResultCache(self.directory, ttl=0.01)
+        time.sleep(0.02)
+        self.assertEqual(cache.load(keys[0]), (False, None))
+        self.assertFalse(os.path.exists(os.path.join(self.directory, keys[0] + ".pkl")))
+        self.assertEqual(ResultCache(self.directory, version="2").load(keys[2]), (True, 2))
+        self.assertNotEqual(ResultCache(self.directory, version="2").key(_report, ("c",), {}),
+                            keys[2])
+
+    def test_result_cache_keys(self):
+        """Test that arguments without a value-based key are not cached"""
+        cache = ResultCache(os.path.join(self.directory, "cache"))
+        tool = CLITool(_checksum, result_cache=cache, memoize=True)
+        mapped = []
+
+        for num, data in enumerate((b"abcd", b"wxyz")):
+            path = os.path.join(self.directory, "input%d" % num)
+
+            with open(path, "wb") as fobj:
+                fobj.write(data)
+
+            with open(path, "rb") as fobj:
+                mapped.append(mmap.mmap(fobj.fileno(), 0, access=mmap.ACCESS_READ))
+                self.addCleanup(mapped[-1].close)
+
+        self.assertEqual(tool.execute(mapped[0]).output, sum(bytearray(b"abcd")))
+        self.assertEqual(tool.execute(mapped[1]).output, sum(bytearray(b"wxyz")))
+        self.assertIsNone(cache.key(_checksum, (memoryview(b"abcd"),), {}))
+        self.assertEqual(tool.execute(b"abcd").output, tool.execute(b"abcd").output)
+        self.assertEqual(_calls, ["checksum"] * 3)
+        self.assertEqual(stat.S_IMODE(os.stat(cache.directory).st_mode) & 0o077, 0)
+
+    def test_result_cache_expiry(self):
+        """Test that load and eviction both expire entries by creation time"""
+        cache = ResultCache(self.directory, ttl=0.2)
+        key = cache.key(_report, ("a",), {})
+        cache.store(key, 1)
+        time.sleep(0.3)
+        path = os.path.join(self.directory, key + ".pkl")
+        now = time.time()
+        os.utime(path, (now, now))
+        cache.evict()
+        self.assertFalse(os.path.exists(path))
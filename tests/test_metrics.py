@@ -0,0 +1,53 @@
+"""Test Case for the metrics module"""
+from __future__ import absolute_import
+import os
+import shutil
+import socket
+import tempfile
+from unittest import TestCase
+from clitool2 import CLITool
+from clitool2.metrics import PrometheusTextfile, StatsdClient
+
+def _divide(num1, num2):
+    """Divide two numbers"""
+    return float(num1) / float(num2)
+
+class MetricsTestCase(TestCase):
+    """Test Case for the metrics module"""
+    def test_prometheus_textfile(self):
+        """Test the PrometheusTextfile metrics hook"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "tool.prom")
+        tool = CLITool(_divide, metrics=PrometheusTextfile(path, buckets=(0.5, 60)))
+
+        tool("1", "2")
+        tool("1", "0")
+        tool.execute(4, 2)
+
+        with open(path, "r") as fobj:
+            lines = fobj.read().splitlines()
+
+        self.assertIn('clitool_runs_total{command="_divide"} 3', lines)
+        self.assertIn('clitool_failures_total{command="_divide"} 1', lines)
+        self.assertIn('clitool_duration_seconds_bucket{command="_divide",le="60"} 3', lines)
+        self.assertIn('clitool_duration_seconds_count{command="_divide"} 3', lines)
+        self.assertTrue(any(line.startswith('clitool_phase_seconds_total{command="_divide",'
+                                            'phase="parse"}') for line in lines))
+        self.assertIn("# TYPE clitool_duration_seconds histogram", lines)
+        self.assertEqual(sorted(os.listdir(directory)),
+                         ["tool.prom", "tool.prom.json", "tool.prom.lock"])
+
+    def test_statsd_client(self):
+        """Test the StatsdClient metrics hook"""
+        receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.addCleanup(receiver.close)
+        receiver.bind(("127.0.0.1", 0))
+        receiver.settimeout(5)
+        client = StatsdClient("127.0.0.1", receiver.getsockname()[1], prefix="app")
+
+        CLITool(_divide, metrics=client)("1", "0")
+        lines = receiver.recv(65536).decode("utf-8").splitlines()
+        self.assertEqual(lines[:2], ["app._divide.runs:1|c", "app._divide.failures:1|c"])
+        self.assertTrue(any(line.startswith("app._divide.duration:") and line.endswith("|ms")
+                            for line in lines))
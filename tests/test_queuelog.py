@@ -0,0 +1,103 @@
+"""Test Case for the queuelog module"""
+from __future__ import absolute_import
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from unittest import TestCase
+from clitool2 import CLITool
+from clitool2.queuelog import QueueLogHandler, config_queue_logging
+
+def _chatty(count):
+    """Log count messages"""
+    for num in range(int(count)):
+        logging.info("message %s", num)
+
+    return int(count)
+
+class _BlockingHandler(logging.Handler):
+    """Handler that waits for an event before handling each record"""
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.event = threading.Event()
+        self.records = []
+
+    def emit(self, record):
+        self.event.wait()
+        self.records.append(record.getMessage())
+
+class QueueLogTestCase(TestCase):
+    """Test Case for the queuelog module"""
+    def setUp(self):
+        # config_queue_logging does nothing if the root logger has handlers
+        logger = logging.getLogger()
+        self.addCleanup(setattr, logger, "handlers", logger.handlers)
+        logger.handlers = []
+
+    def test_config_queue_logging(self):
+        """Test CLITool with the queue logging manager"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "log.txt")
+        tool = CLITool(_chatty, logmngr=config_queue_logging)
+
+        result = tool("1000", "--logwrite", path, "--logmaxbytes", "30000",
+                      "--logbackups", "1", "--loglevel", "30")
+        self.assertEqual(result.output, 1000)
+        self.assertEqual(logging.getLogger().handlers, [])
+        self.assertRaises(ValueError, tool, "1", "--logoverflow", "x")
+
+        tool("1000", "--logwrite", path, "--logmaxbytes", "30000", "--logbackups", "1",
+             "--logoverflow", "drop-oldest")
+
+        with open(path + ".1", "r") as fobj:
+            lines = fobj.readlines()
+
+        with open(path, "r") as fobj:
+            lines.extend(fobj.readlines())
+
+        lines = [line for line in lines if line.strip()]
+
+        # Every record is written before __call__ returns
+        self.assertEqual(len(lines), 1002)
+        self.assertIn("SUCCEEDED", lines[-1])
+
+    def test_overflow(self):
+        """Test the drop overflow policy"""
+        target = _BlockingHandler()
+        handler = QueueLogHandler([target], maxsize=2, overflow="drop")
+        logger = logging.getLogger(__name__)
+        logger.addHandler(handler)
+        self.addCleanup(logger.removeHandler, handler)
+
+        for num in range(10):
+            logger.warning("message %s", num)
+
+        self.assertTrue(handler.dropped > 0)
+        target.event.set()
+        handler.close()
+        self.assertEqual(len(target.records), 11 - handler.dropped)
+        self.assertEqual(target.records[-1], "%s log records were dropped" % handler.dropped)
+
+    def test_batch_jobs(self):
+        """Worker processes of a batch write their records to the log file"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "batch.txt")
+        report = os.path.join(directory, "report.txt")
+        logfile = os.path.join(directory, "log.txt")
+
+        with open(path, "w") as fobj:
+            fobj.write("\n".join(["20"] * 6))
+
+        tool = CLITool(_chatty, batch=True, logmngr=config_queue_logging)
+        result = tool("--batch", path, "--batch-report", report, "--jobs", "2",
+                      "--logqueue", "5", "--logwrite", logfile)
+        self.assertEqual(result.output, {"total": 6, "failed": 0})
+
+        with open(logfile, "r") as fobj:
+            lines = fobj.readlines()
+
+        self.assertEqual(len([line for line in lines if "message 19" in line]), 6)
+        self.assertEqual(len([line for line in lines if "SUCCEEDED" in line]), 6)
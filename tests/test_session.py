@@ -0,0 +1,70 @@
+"""Test Case for the session module"""
+from __future__ import absolute_import
+import logging
+from multiprocessing.pool import ThreadPool
+from unittest import TestCase
+from clitool2 import CLITool, CLIToolbox, Session
+from clitool2.clitool import ParseError
+
+def _multiply(num1, num2):
+    """Multiply two numbers"""
+    return float(num1) * float(num2)
+
+def _status(*args):
+    """Command that returns a status code"""
+    return len(args)
+
+class _Handler(logging.Handler):
+    """Handler that records whether it was closed"""
+    closed = False
+
+    def emit(self, record):
+        pass
+
+    def close(self):
+        self.closed = True
+        logging.Handler.close(self)
+
+class SessionTestCase(TestCase):
+    """Test Case for the session module"""
+    def test_session(self):
+        """Test the Session class with a toolbox"""
+        toolbox = CLIToolbox()
+        toolbox.add_command(CLITool(_multiply), "multiply")
+        toolbox.add_command(_status, "status")
+        handlers = list(logging.getLogger().handlers)
+        session = Session(toolbox, logmngr=None)
+
+        self.assertEqual(session.run(["multiply", "2", "3"]).output, 6)
+        self.assertEqual(session.run(["status", "a", "b"]).status, 2)
+
+        # Help and parse errors are returned instead of exiting
+        result = session.run(["--help"])
+        self.assertEqual(result.status, 0)
+        self.assertIn("Commands:", result.output)
+        self.assertIn("usage:", session.run(["multiply"]).output)
+
+        for argv in (["divide", "1"], ["multiply", "2"], ["multiply", "a", "b", "c"]):
+            result = session.run(argv)
+            self.assertEqual(result.status, 2)
+            self.assertEqual(result.error[0], ParseError)
+
+        # Function errors are reported as for CLITool
+        self.assertEqual(session.run(["multiply", "a", "b"]).error[0], ValueError)
+        self.assertEqual(logging.getLogger().handlers, handlers)
+
+        # The handlers of the host application are not closed
+        handler = _Handler()
+        logging.getLogger().addHandler(handler)
+        self.addCleanup(logging.getLogger().removeHandler, handler)
+        session.close()
+        self.assertFalse(handler.closed)
+
+    def test_session_threads(self):
+        """Test the Session class from several threads"""
+        session = Session(CLITool(_multiply), logmngr=None)
+        pool = ThreadPool(4)
+        self.addCleanup(pool.terminate)
+
+        results = pool.map(session.run, [[str(num), "2"] for num in range(20)])
+        self.assertEqual([item.output for item in results], [num * 2.0 for num in range(20)])
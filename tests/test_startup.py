@@ -0,0 +1,39 @@
+"""Test Case for the import time of the clitool2 package"""
+from __future__ import absolute_import
+import sys
+from unittest import TestCase, skipIf
+from benchmarks import import_profile
+
+# Ceiling for the cumulative "import clitool2" time in seconds; the import
+# takes about 0.065 seconds on the development machine, and the margin allows
+# for slow or busy test machines.
+IMPORT_BUDGET = 0.25
+
+# Modules that must be imported on first use, not by "import clitool2"
+LAZY_MODULES = ("argparse", "asyncio", "csv", "datetime", "dateutil", "hashlib", "inspect",
+                "json", "multiprocessing", "pickle", "tempfile", "clitool2.docstring")
+
+@skipIf(sys.version_info < (3, 7), "-X importtime is available since Python 3.7")
+class StartupTestCase(TestCase):
+    """Test Case for the import time of the clitool2 package"""
+    def test_import_time(self):
+        """Import clitool2 within the budget"""
+        # The best of three runs, so a busy machine does not fail the test
+        seconds = min(import_profile("clitool2")["clitool2"] for _ in range(3))
+        self.assertLess(seconds, IMPORT_BUDGET)
+
+    def test_lazy_modules(self):
+        """Heavy modules are not imported by import clitool2"""
+        profile = import_profile("clitool2")
+        self.assertEqual([name for name in LAZY_MODULES if name in profile], [])
+
+    def test_lazy_attributes(self):
+        """Names imported on first use are available from the package"""
+        from clitool2 import DocInfo, parse_docstr
+        from clitool2.docstring import DocInfo as _DocInfo
+        self.assertIs(DocInfo, _DocInfo)
+        self.assertEqual(parse_docstr("Summary").summary, "Summary")
+
+        import clitool2
+        with self.assertRaises(AttributeError):
+            getattr(clitool2, "missing")